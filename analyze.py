@@ -0,0 +1,60 @@
+# analyze.py
+import argparse
+import time
+from datetime import UTC, datetime
+
+import config  # Para acceder a los parámetros de configuración
+from services import trade_logger
+from services.trade_analytics import daily_stats, load_columns, session_stats
+
+
+def parse_date(text):
+    """Convierte "2024-05-01" (o "2024-05-01 12:00") en milisegundos desde la época, sin zona horaria como el log."""
+    fmt = "%Y-%m-%d %H:%M" if ' ' in text else "%Y-%m-%d"
+    return int(datetime.strptime(text, fmt).replace(tzinfo=UTC).timestamp() * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PnL, win rate, drawdown y exposición de todas las sesiones del log de operaciones.")
+    parser.add_argument("--folder", default=trade_logger.LOG_FOLDER, help="Carpeta con los archivos trade_log_*")
+    parser.add_argument("--by", default="day", choices=["day", "session"], help="Agrupar por símbolo y día o por sesión")
+    parser.add_argument("--symbol", action="append", default=None, help="Solo este símbolo. Se puede repetir.")
+    parser.add_argument("--since", default=None, help="Desde esta fecha (YYYY-MM-DD [HH:MM]), incluida")
+    parser.add_argument("--until", default=None, help="Hasta esta fecha (YYYY-MM-DD [HH:MM]), excluida")
+    parser.add_argument("--cache", default=config.TRADE_LOG_CACHE_FILE,
+                        help="Archivo consolidado que evita volver a leer los logs sin cambios")
+    parser.add_argument("--no-cache", action="store_true", help="Lee todos los logs sin usar ni actualizar el archivo consolidado")
+    parser.add_argument("--workers", type=int, default=8, help="Hilos para leer los archivos de log")
+    parser.add_argument("--output", default=None, help="CSV donde guardar la tabla completa")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    columns, stats = load_columns(args.folder, cache_path=None if args.no_cache else args.cache, symbols=args.symbol,
+                                  start=parse_date(args.since) if args.since else None,
+                                  end=parse_date(args.until) if args.until else None, max_workers=args.workers)
+    t1 = time.perf_counter()
+    table = daily_stats(columns) if args.by == "day" else session_stats(columns)
+    t2 = time.perf_counter()
+
+    print(f"Logs: {stats['parsed']} leídos, {stats['reused']} sin cambios, {stats['removed']} quitados; "
+          f"{len(columns['timestamp'])} operaciones (carga {t1 - t0:.2f}s, cálculo {t2 - t1:.2f}s)")
+    if table.empty:
+        print("No hay operaciones ejecutadas para analizar.")
+        return
+    with_pct = table.assign(win_rate=(table['win_rate'] * 100).round(1))
+    if 'time_in_market' in with_pct:
+        with_pct['time_in_market'] = (with_pct['time_in_market'] * 100).round(1)
+    print(with_pct.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    trades = int(table['trades'].sum())
+    wins = int(table['wins'].sum())
+    print(f"Total: {trades} cierres, Win rate: {wins / trades * 100 if trades else 0:.1f}%, "
+          f"PnL realizado: {table['realized_pnl'].sum():.2f}, Peor drawdown: {table['max_drawdown'].max():.2f}")
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Tabla guardada en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
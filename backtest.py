@@ -0,0 +1,36 @@
+# backtest.py
+import argparse
+import time
+
+import config  # Para acceder a los parámetros de configuración
+from services.backtester import default_output_path, load_ohlcv, run_backtest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest vectorizado de la estrategia de cruce de SMAs sobre un archivo OHLCV local.")
+    parser.add_argument("file", help="Archivo OHLCV (.csv, .npy o .candles del almacén de velas) con columnas start_time, open, high, low, close, volume, turnover")
+    parser.add_argument("--symbol", default=config.SYMBOL)
+    parser.add_argument("--short", type=int, default=config.SMA_SHORT_PERIOD, help="Período de la SMA corta")
+    parser.add_argument("--long", type=int, default=config.SMA_LONG_PERIOD, help="Período de la SMA larga")
+    parser.add_argument("--quantity", type=float, default=config.TRADE_QUANTITY)
+    parser.add_argument("--balance", type=float, default=config.BACKTEST_INITIAL_BALANCE, help="Balance inicial (USDT)")
+    parser.add_argument("--output", default=None, help="CSV de salida con las operaciones (formato del trade log)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    start_times, closes = load_ohlcv(args.file)
+    t1 = time.perf_counter()
+    result = run_backtest(start_times, closes, args.short, args.long, args.quantity, args.balance, args.symbol)
+    t2 = time.perf_counter()
+
+    output_path = result.to_csv(args.output or default_output_path())
+
+    summary = result.summary
+    print(f"Velas: {summary['bars']} (carga {t1 - t0:.2f}s, backtest {t2 - t1:.2f}s)")
+    print(f"Operaciones cerradas: {summary['closed_trades']}, Win rate: {summary['win_rate'] * 100:.1f}%")
+    print(f"PnL realizado: {summary['realized_pnl']:.2f}, Equity final: {summary['final_equity']:.2f}, Max drawdown: {summary['max_drawdown']:.2f}")
+    print(f"Operaciones guardadas en {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_account_cache.py
+"""
+Compara la cantidad de solicitudes REST y el tiempo por vuelta del bucle con y sin AccountStateCache,
+usando un backend HTTP falso (misma interfaz que pybit HTTP) con latencia fija por solicitud.
+
+Uso:
+    python -m benchmarks.bench_account_cache --symbols 30 --rounds 5 --latency-ms 30
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import config
+import main
+from services.bybit_client import BybitClient
+from services.market_scheduler import MarketScheduler, SymbolState
+from services.order_manager import OrderManager
+
+
+class StubHTTPSession:
+    """Backend falso con la interfaz de pybit.unified_trading.HTTP que cuenta las solicitudes por endpoint."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _request(self, endpoint):
+        with self._lock:
+            self.calls[endpoint] += 1
+        time.sleep(self.latency)
+
+    def get_kline(self, category, symbol, interval, limit=200, start=None, end=None):
+        self._request('get_kline')
+        now_ms = int(time.time() * 1000)
+        current = now_ms - now_ms % 60_000
+        first = max(start, current - limit * 60_000) if start is not None else current - (limit - 1) * 60_000
+        last = min(end, current) if end is not None else current
+        rows = [[str(t), "100", "101", "99", str(100 + (t // 60_000) % 7), "1", "100"] for t in range(first, last + 1, 60_000)]
+        return {'retCode': 0, 'result': {'list': rows[::-1]}}
+
+    def get_positions(self, category, symbol=None, settleCoin=None, limit=20, cursor=None):
+        self._request('get_positions')
+        return {'retCode': 0, 'result': {'list': [], 'nextPageCursor': ''}}
+
+    def get_wallet_balance(self, accountType, coin):
+        self._request('get_wallet_balance')
+        return {'retCode': 0, 'result': {'list': [{'coin': [{'coin': 'USDT', 'walletBalance': '10000'}]}]}}
+
+    def place_order(self, **params):
+        self._request('place_order')
+        return {'retCode': 0, 'result': {'orderId': 'stub'}}
+
+    def get_open_orders(self, category, symbol, orderId):
+        self._request('get_open_orders')
+        return {'retCode': 0, 'result': {'list': [
+            {'orderId': orderId, 'orderStatus': 'Filled', 'avgPrice': '100', 'cumExecQty': '1'}]}}
+
+
+def run(n_symbols, rounds, latency, cache_ttl):
+    session = StubHTTPSession(latency)
+    client = BybitClient(session=session, account_cache_ttl=cache_ttl)
+    states = [SymbolState(f"SYM{i}USDT", "1", config.TRADE_QUANTITY) for i in range(n_symbols)]
+    order_manager = OrderManager(client, poll_initial=0)
+    scheduler = MarketScheduler(states, lambda state: main.run_symbol_tick(client, order_manager, state),
+                                check_interval=60, max_workers=config.MAX_CONCURRENT_MARKETS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler.run_once() # Backfill inicial de las velas, fuera de la medición
+        session.calls.clear()
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            if client.account_cache is not None:
+                client.account_cache.invalidate() # Cada vuelta simula un nuevo minuto: TTL vencido
+            scheduler.run_once()
+        elapsed = (time.perf_counter() - t0) / rounds
+    return session.calls, elapsed, client.account_cache.stats() if client.account_cache else None
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Solicitudes REST por vuelta con y sin caché de cuenta.")
+    parser.add_argument("--symbols", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench_candles_")
+    config.CANDLE_STORE_FOLDER = folder
+    config.CANDLE_STORE_BACKFILL = max(config.SMA_SHORT_PERIOD, config.SMA_LONG_PERIOD) + 5
+    try:
+        for label, ttl in (("sin caché", None), ("con caché", 5)):
+            calls, per_round, stats = run(args.symbols, args.rounds, args.latency_ms / 1000, ttl)
+            account_calls = calls['get_positions'] + calls['get_wallet_balance']
+            print(f"{label:>10}: {sum(calls.values()) / args.rounds:6.1f} solicitudes/vuelta "
+                  f"({account_calls / args.rounds:.1f} de cuenta), {per_round * 1000:7.1f} ms/vuelta")
+            if stats:
+                print(f"{'':>10}  {stats}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_benchmark()
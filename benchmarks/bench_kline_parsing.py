@@ -0,0 +1,102 @@
+# benchmarks/bench_kline_parsing.py
+"""
+Compara el costo por iteración de convertir la respuesta de get_klines y calcular la señal:
+    - pandas: el camino original de main.py (DataFrame, astype, to_datetime, set_index,
+      sort_index y generate_signal sobre una copia).
+    - numpy: parse_klines sobre un array preasignado y la señal del cruce sobre ese array.
+    - incremental: solo la vela en formación (Candle) evaluada por SMACrossoverEngine en O(1).
+Mide tiempo de CPU por iteración y memoria asignada (pico y bloques vivos) con tracemalloc.
+
+Uso:
+    python -m benchmarks.bench_kline_parsing --rows 25 200 --iterations 2000
+"""
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+import numpy as np
+
+import config
+from services.candle_store import CANDLE_DTYPE, Candle, parse_klines
+from strategies.simple_ma_strategy import SMACrossoverEngine, generate_signal
+
+
+def synthetic_klines(rows, seed=0):
+    """Klines con el formato de get_klines: listas de strings, la más antigua primero."""
+    rng = np.random.default_rng(seed)
+    closes = 30000 + np.cumsum(rng.normal(0, 25, rows))
+    start = 1_700_000_000_000
+    return [
+        [str(start + i * 60_000), f"{c:.2f}", f"{c + 10:.2f}", f"{c - 10:.2f}", f"{c:.2f}", "1.5", f"{c * 1.5:.4f}"]
+        for i, c in enumerate(closes)
+    ]
+
+
+def pandas_tick(klines):
+    import pandas as pd
+    df_klines = pd.DataFrame(klines, columns=['start_time', 'open', 'high', 'low', 'close', 'volume', 'turnover'])
+    df_klines[['open', 'high', 'low', 'close', 'volume']] = df_klines[['open', 'high', 'low', 'close', 'volume']].astype(float)
+    df_klines['start_time'] = pd.to_datetime(df_klines['start_time'].astype(int), unit='ms')
+    df_klines = df_klines.set_index('start_time').sort_index()
+    return generate_signal(df_klines.copy())
+
+
+def build_numpy_tick(rows):
+    buffer = np.empty(rows, dtype=CANDLE_DTYPE)
+    strategy = SMACrossoverEngine(config.SMA_SHORT_PERIOD, config.SMA_LONG_PERIOD)
+
+    def numpy_tick(klines):
+        return strategy.signal(parse_klines(klines, out=buffer))
+    return numpy_tick
+
+
+def build_incremental_tick(klines):
+    engine = SMACrossoverEngine(config.SMA_SHORT_PERIOD, config.SMA_LONG_PERIOD)
+    engine.warm_up(parse_klines(klines[:-1]))
+
+    def incremental_tick(klines):
+        kline = klines[-1]
+        return engine.evaluate(Candle(int(kline[0]), *(float(v) for v in kline[1:7])))
+    return incremental_tick
+
+
+def measure(tick, klines, iterations):
+    # Las funciones imprimen mensajes DEBUG: se descartan para no medir la consola
+    with contextlib.redirect_stdout(io.StringIO()):
+        signal = tick(klines) # Calentamiento (imports, cachés)
+        started = time.process_time()
+        for _ in range(iterations):
+            tick(klines)
+        cpu_us = (time.process_time() - started) / iterations * 1e6
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        snapshot_before = tracemalloc.take_snapshot()
+        tick(klines)
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot_after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, 'filename') if stat.count_diff > 0)
+    return signal, cpu_us, (peak - before) / 1024, blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo por iteración de pandas frente a NumPy al procesar las klines.")
+    parser.add_argument("--rows", type=int, nargs='+', default=[25, 200], help="Velas por respuesta de get_klines")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'velas':>6} {'camino':>12} {'señal':>6} {'CPU/iter':>12} {'pico mem.':>11} {'bloques':>8}")
+    for rows in args.rows:
+        klines = synthetic_klines(rows)
+        paths = [("pandas", pandas_tick), ("numpy", build_numpy_tick(rows)), ("incremental", build_incremental_tick(klines))]
+        for name, tick in paths:
+            signal, cpu_us, peak_kib, blocks = measure(tick, klines, args.iterations)
+            print(f"{rows:>6} {name:>12} {signal:>6} {cpu_us:>9.1f} µs {peak_kib:>7.1f} KiB {blocks:>8}")
+
+
+if __name__ == "__main__":
+    main()
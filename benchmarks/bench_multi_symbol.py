@@ -0,0 +1,104 @@
+# benchmarks/bench_multi_symbol.py
+"""
+Mide cómo escala la latencia de una vuelta completa del bucle (una iteración de cada mercado)
+al pasar de 1 a 100 símbolos, con un cliente falso que simula la latencia de la API REST.
+
+Uso:
+    python -m benchmarks.bench_multi_symbol --latency-ms 50
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+
+import config
+import main
+from services.market_scheduler import MarketScheduler, SymbolState
+from services.order_manager import OrderManager
+from services.rate_limiter import RateLimiter
+
+
+class LatencyStubClient:
+    """Implementa los métodos de BybitClient que usa el bucle, esperando 'latency' segundos por llamada."""
+
+    def __init__(self, latency, rate_limiter=None):
+        self.latency = latency
+        self.rate_limiter = rate_limiter
+        self.calls = 0
+
+    def _call(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        self.calls += 1
+        time.sleep(self.latency)
+
+    def get_klines(self, symbol, interval, limit=200, start=None, end=None):
+        self._call()
+        now_ms = int(time.time() * 1000)
+        current = now_ms - now_ms % 60_000
+        first = max(start, current - limit * 60_000) if start is not None else current - (limit - 1) * 60_000
+        last = min(end, current) if end is not None else current
+        return [[str(t), "100", "101", "99", str(100 + (t // 60_000) % 7), "1", "100"]
+                for t in range(first, last + 1, 60_000)]
+
+    def get_current_position(self, symbol):
+        self._call()
+        return 0.0, "None", None
+
+    def get_wallet_balance(self, coin="USDT"):
+        self._call()
+        return 10000.0
+
+    def place_order(self, symbol, side, qty, order_type="Market"):
+        self._call()
+        return {"orderId": "bench"}
+
+    def get_order(self, symbol, order_id):
+        self._call()
+        return {"orderId": order_id, "orderStatus": "Filled", "avgPrice": "100", "cumExecQty": "1"}
+
+
+def measure_round(n_symbols, latency, max_workers, requests_per_second):
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+    client = LatencyStubClient(latency, limiter)
+    states = [SymbolState(f"SYM{i}USDT", "1", config.TRADE_QUANTITY) for i in range(n_symbols)]
+    order_manager = OrderManager(client, poll_initial=0)
+    scheduler = MarketScheduler(states, lambda state: main.run_symbol_tick(client, order_manager, state),
+                                check_interval=60, max_workers=max_workers)
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler.run_once() # Primera vuelta: backfill inicial de cada almacén de velas
+        t0 = time.perf_counter()
+        scheduler.run_once()
+        elapsed = time.perf_counter() - t0
+    return elapsed, max(s.last_tick_seconds for s in states)
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Escalado de la latencia del bucle con la cantidad de símbolos.")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latencia simulada por llamada REST")
+    parser.add_argument("--workers", type=int, default=config.MAX_CONCURRENT_MARKETS)
+    parser.add_argument("--requests-per-second", type=float, default=0,
+                        help="Límite de solicitudes del RateLimiter (0 = sin límite)")
+    parser.add_argument("--symbols", default="1,5,10,25,50,100")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench_candles_")
+    config.CANDLE_STORE_FOLDER = folder
+    config.CANDLE_STORE_BACKFILL = max(config.SMA_SHORT_PERIOD, config.SMA_LONG_PERIOD) + 5
+    latency = args.latency_ms / 1000
+    try:
+        print(f"Latencia simulada por llamada: {args.latency_ms:.0f} ms, hilos: {args.workers}")
+        print(f"{'símbolos':>9} {'vuelta (s)':>11} {'secuencial (s)':>15} {'tick más lento (ms)':>20}")
+        for n in (int(x) for x in args.symbols.split(',')):
+            elapsed, slowest = measure_round(n, latency, args.workers, args.requests_per_second)
+            # Una vuelta secuencial hace 3 llamadas REST por símbolo (klines, posición, balance)
+            sequential = n * 3 * latency
+            print(f"{n:>9} {elapsed:>11.3f} {sequential:>15.3f} {slowest * 1000:>20.1f}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_benchmark()
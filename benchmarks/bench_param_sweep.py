@@ -0,0 +1,90 @@
+# benchmarks/bench_param_sweep.py
+"""
+Mide cómo escala services/param_sweep.run_sweep con la cantidad de procesos trabajadores.
+
+Corre la misma búsqueda (grid de SMA corta x SMA larga sobre velas sintéticas de 1m) con 1, 2, ...
+--max-workers procesos e informa el tiempo, la aceleración y la eficiencia respecto de 1 proceso,
+además del tiempo de evaluar todos los lotes en el mismo proceso (sin pool), para ver el costo de
+arrancar los procesos. Verifica que la tabla de resultados sea la misma con cualquier cantidad de procesos.
+La aceleración no puede superar la cantidad de núcleos disponibles (os.cpu_count()).
+
+Uso:
+    python -m benchmarks.bench_param_sweep --candles 1000000 --max-workers 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.exchange_simulator import synthetic_candle_array
+from services.param_sweep import (
+    _batches,
+    build_grid,
+    evaluate_batch,
+    run_sweep,
+    share_dataset,
+)
+
+QUANTITY, BALANCE = 0.001, 10000.0
+MARKET = ("BENCH", "1")
+
+
+def write_dataset(folder, candles):
+    """Guarda las velas como .npy con las columnas de KLINE_COLUMNS (el formato que lee load_ohlcv)."""
+    path = os.path.join(folder, "bench_1m.npy")
+    np.save(path, np.column_stack([candles[name].astype(np.float64) for name in candles.dtype.names]))
+    return path
+
+
+def in_process(folder, path, combos, batch_size):
+    """Segundos para evaluar todos los lotes en este proceso, sin ProcessPoolExecutor."""
+    base = share_dataset(folder, "inline", path)
+    started = time.perf_counter()
+    for batch in _batches(combos, batch_size):
+        evaluate_batch(base, *MARKET, batch, QUANTITY, BALANCE)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalado de la búsqueda de parámetros con la cantidad de procesos.")
+    parser.add_argument("--candles", type=int, default=1_000_000, help="Velas sintéticas de 1m del dataset")
+    parser.add_argument("--short", type=int, nargs=2, default=(5, 30), help="Rango de la SMA corta (incluido)")
+    parser.add_argument("--long", type=int, nargs=2, default=(20, 100), help="Rango de la SMA larga (incluido)")
+    parser.add_argument("--step", type=int, default=5, help="Paso de ambos rangos")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    combos = build_grid(range(args.short[0], args.short[1] + 1, args.step), range(args.long[0], args.long[1] + 1, args.step))
+    folder = tempfile.mkdtemp(prefix="bench_sweep_")
+    try:
+        path = write_dataset(folder, synthetic_candle_array(args.candles, MARKET[1], seed=3))
+        print(f"{len(combos)} combinaciones sobre {args.candles} velas; {os.cpu_count()} núcleos disponibles")
+        print(f"Sin pool (un proceso): {in_process(folder, path, combos, args.batch_size):.2f} s")
+        print(f"{'procesos':>8} {'tiempo (s)':>10} {'aceleración':>11} {'eficiencia':>10}")
+        reference, baseline = None, None
+        for workers in range(1, args.max_workers + 1):
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                table = run_sweep({MARKET: path}, combos, QUANTITY, BALANCE, max_workers=workers,
+                                  batch_size=args.batch_size)
+            elapsed = time.perf_counter() - started
+            table = table.sort_values(['short', 'long']).reset_index(drop=True)
+            if reference is None:
+                reference, baseline = table, elapsed
+            else:
+                pd.testing.assert_frame_equal(table, reference) # Mismos resultados con cualquier cantidad de procesos
+            speedup = baseline / elapsed
+            print(f"{workers:>8} {elapsed:>10.2f} {speedup:>10.2f}x {speedup / workers:>10.0%}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_request_layer.py
+"""
+Prueba de carga de la capa de solicitudes de BybitClient (pybit real) contra services/fake_rest_server.py,
+que inyecta HTTP 429, retCode 10006 y respuestas demoradas (timeouts del cliente).
+
+Varios hilos piden klines y balance sin pausa (datos de mercado) mientras otro envía órdenes
+periódicamente. Para cada escenario informa:
+    - solicitudes exitosas por tipo y reintentos (solicitudes recibidas por el servidor de más)
+    - latencia p50/p99 de órdenes y de datos, incluida la espera del RateLimiter
+    - conexiones TCP abiertas frente a solicitudes (reutilización del pool keep-alive)
+
+Uso:
+    python -m benchmarks.bench_request_layer --seconds 5 --error-rate 0.05 --timeout-rate 0.01
+"""
+import argparse
+import contextlib
+import io
+import threading
+import time
+
+import numpy as np
+
+import config
+from services.bybit_client import BybitClient, build_http_session
+from services.fake_rest_server import build_server
+from services.rate_limiter import RateLimiter
+
+
+def run_load(server, seconds, data_threads, order_interval, requests_per_second, reserve):
+    session = build_http_session(False, "bench-key", "bench-secret", base_url=server.url)
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = BybitClient(session=session, rate_limiter=RateLimiter(requests_per_second, reserve=reserve))
+    symbol, interval = config.MARKETS[0]
+    latencies = {"orden": [], "datos": []}
+    failures = {"orden": 0, "datos": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def record(kind, started, ok):
+        with lock:
+            latencies[kind].append(time.perf_counter() - started)
+            failures[kind] += not ok
+
+    def data_worker(i):
+        while not stop.is_set():
+            started = time.perf_counter()
+            if i % 2:
+                ok = client.get_klines(symbol, interval, limit=50) is not None # None si falló
+            else:
+                ok = client.fetch_wallet_balances(["USDT"]) is not None
+            record("datos", started, ok)
+
+    def order_worker():
+        side = "Buy"
+        while not stop.is_set():
+            started = time.perf_counter()
+            record("orden", started, client.place_order(symbol, side, config.TRADE_QUANTITY) is not None)
+            side = "Sell" if side == "Buy" else "Buy"
+            stop.wait(order_interval)
+
+    before = dict(server.stats)
+    threads = [threading.Thread(target=data_worker, args=(i,)) for i in range(data_threads)]
+    threads.append(threading.Thread(target=order_worker))
+    with contextlib.redirect_stdout(io.StringIO()): # Mensajes de reintentos y respuestas de órdenes
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    stats = {key: server.stats[key] - before[key] for key in before}
+    return latencies, failures, stats
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Carga de la capa de solicitudes contra un Bybit REST falso con fallas.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duración de cada escenario")
+    parser.add_argument("--data-threads", type=int, default=8, help="Hilos que piden datos de mercado sin pausa")
+    parser.add_argument("--order-interval", type=float, default=0.25, help="Segundos entre órdenes")
+    parser.add_argument("--requests-per-second", type=float, default=40, help="Límite del RateLimiter del cliente")
+    parser.add_argument("--limit-per-second", type=int, default=30, help="Límite del servidor por endpoint")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Probabilidad de HTTP 429")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02, help="Probabilidad de retCode 10006")
+    parser.add_argument("--timeout-rate", type=float, default=0.01, help="Probabilidad de respuesta demorada")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Timeout HTTP del cliente (segundos)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    config.API_TIMEOUT_SECONDS = args.timeout
+    config.API_RETRY_BASE_SECONDS = 0.05
+    config.API_RETRY_MAX_SECONDS = 1.0
+    server = build_server(seed=args.seed, limit_per_second=args.limit_per_second, error_rate=args.error_rate,
+                          rate_limit_rate=args.rate_limit_rate, timeout_rate=args.timeout_rate,
+                          stall_seconds=args.timeout + 0.5)
+    server.start_in_thread()
+    print(f"Servidor falso en {server.url}: 429 {args.error_rate:.0%}, 10006 {args.rate_limit_rate:.0%}, "
+          f"demoras {args.timeout_rate:.0%}, límite {args.limit_per_second}/s por endpoint")
+    print(f"{'reserva':>8} {'tipo':>6} {'solicitudes':>12} {'fallidas':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    try:
+        for reserve in (0.0, config.API_ORDER_RESERVE):
+            latencies, failures, stats = run_load(server, args.seconds, args.data_threads, args.order_interval,
+                                                  args.requests_per_second, reserve)
+            for kind in ("orden", "datos"):
+                values = np.array(latencies[kind]) * 1000
+                p50, p99 = np.percentile(values, [50, 99]) if len(values) else (0.0, 0.0)
+                print(f"{reserve:>8.0%} {kind:>6} {len(values):>12} {failures[kind]:>9} {p50:>9.1f} {p99:>9.1f}")
+            calls = sum(len(values) for values in latencies.values())
+            print(f"{'':>8} servidor: {stats['requests']} solicitudes para {calls} llamadas "
+                  f"({stats['requests'] - calls} reintentos; 429: {stats['http_429']}, 10006: {stats['rate_limited']}, "
+                  f"demoras: {stats['stalled']}), {stats['connections']} conexiones TCP")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main_benchmark()
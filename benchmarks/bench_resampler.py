@@ -0,0 +1,129 @@
+# benchmarks/bench_resampler.py
+"""
+Verifica y mide services/resampler.py: velas de 5m/15m/1h construidas a partir de velas de 1m.
+
+    - Sin conexión (por defecto): velas sintéticas de 1m; compara CandleResampler (incremental)
+      con resample() (vectorizado) y con pandas (groupby por grupo alineado a la época UTC),
+      informando la mayor diferencia relativa (solo redondeo de las sumas de volumen), y mide
+      el costo por vela base de la actualización incremental.
+    - Con --exchange: descarga de Bybit (endpoint público, sin claves) las velas de 1m de las
+      últimas --hours horas y las velas de cada intervalo mayor del mismo período, y compara
+      las velas completas construidas localmente con las de Bybit.
+
+Uso:
+    python -m benchmarks.bench_resampler --candles 100000
+    python -m benchmarks.bench_resampler --exchange --symbol BTCUSDT --hours 24
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from services.candle_store import (
+    CANDLE_DTYPE,
+    KLINE_PAGE_LIMIT,
+    interval_to_ms,
+    parse_klines,
+)
+from services.exchange_simulator import synthetic_candle_array
+from services.resampler import CandleResampler, resample
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+def stream(candles, base_interval, interval):
+    """Velas mayores cerradas por CandleResampler alimentado vela a vela (y el costo por vela en µs)."""
+    resampler = CandleResampler(base_interval, interval)
+    closed = []
+    started = time.perf_counter()
+    for candle in candles:
+        closed.extend(resampler.update(candle))
+    elapsed_us = (time.perf_counter() - started) / len(candles) * 1e6
+    return np.array([tuple(bar) for bar in closed], dtype=CANDLE_DTYPE), elapsed_us
+
+
+def pandas_resample(candles, interval):
+    import pandas as pd
+    df = pd.DataFrame(candles)
+    df['bucket'] = df['start_time'] // interval_to_ms(interval) * interval_to_ms(interval)
+    grouped = df.groupby('bucket')
+    bars = grouped.agg(open=('open', 'first'), high=('high', 'max'), low=('low', 'min'), close=('close', 'last'),
+                       volume=('volume', 'sum'), turnover=('turnover', 'sum'))
+    return bars.reset_index().rename(columns={'bucket': 'start_time'}).to_records(index=False)
+
+
+def max_difference(a, b):
+    """Mayor diferencia relativa entre dos arrays de velas con los mismos start_time (inf si no coinciden)."""
+    if len(a) != len(b) or not np.array_equal(a['start_time'], b['start_time']):
+        return float('inf')
+    if not len(a):
+        return 0.0
+    return max(float(np.max(np.abs(a[c] - b[c]) / np.maximum(np.abs(b[c]), 1e-12))) for c in CANDLE_DTYPE.names[1:])
+
+
+def fetch_klines(client, symbol, interval, start, end):
+    """Velas cerradas de Bybit con start <= start_time < end, paginando de a KLINE_PAGE_LIMIT."""
+    interval_ms = interval_to_ms(interval)
+    chunks = []
+    while start < end:
+        page_end = min(end - interval_ms, start + (KLINE_PAGE_LIMIT - 1) * interval_ms)
+        page = client.get_klines(symbol, interval, limit=KLINE_PAGE_LIMIT, start=start, end=page_end)
+        if not page:
+            raise RuntimeError(f"Bybit no devolvió velas de {symbol} ({interval})")
+        chunks.append(parse_klines(page))
+        start = page_end + interval_ms
+    candles = np.concatenate(chunks)
+    return candles[candles['start_time'] < end]
+
+
+def offline(args):
+    candles = synthetic_candle_array(args.candles, "1", seed=1)
+    print(f"{args.candles} velas sintéticas de 1m")
+    print(f"{'intervalo':>10} {'velas':>7} {'dif. incremental':>17} {'dif. pandas':>12} {'µs/vela base':>13}")
+    for interval in args.intervals:
+        streamed, per_candle_us = stream(candles, "1", interval)
+        batch = resample(candles, interval, complete_only=True, base_interval="1")
+        reference = pandas_resample(candles, interval)
+        reference = reference[np.isin(reference['start_time'], batch['start_time'])]
+        print(f"{interval:>10} {len(batch):>7} {max_difference(streamed, batch):>17.2e} "
+              f"{max_difference(batch, reference):>12.2e} {per_candle_us:>13.2f}")
+
+
+def against_exchange(args):
+    from services.bybit_client import BybitClient, build_http_session
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = BybitClient(session=build_http_session(False, None, None))
+    largest = max(interval_to_ms(interval) for interval in args.intervals)
+    end = int(time.time() * 1000) // largest * largest # Solo grupos completos y cerrados
+    start = end - int(args.hours * 3_600_000) // largest * largest
+    base = fetch_klines(client, args.symbol, "1", start, end)
+    print(f"{len(base)} velas de 1m de {args.symbol} desde Bybit")
+    print(f"{'intervalo':>10} {'velas':>7} {'coinciden OHLC':>15} {'dif. volumen':>13}")
+    for interval in args.intervals:
+        local, _ = stream(base, "1", interval)
+        remote = fetch_klines(client, args.symbol, interval, start, end)
+        remote = remote[np.isin(remote['start_time'], local['start_time'])]
+        local = local[np.isin(local['start_time'], remote['start_time'])]
+        same_prices = all(np.array_equal(local[c], remote[c]) for c in PRICE_COLUMNS)
+        volume_diff = float(np.max(np.abs(local['volume'] - remote['volume']) / np.maximum(remote['volume'], 1e-12))) if len(local) else 0.0
+        print(f"{interval:>10} {len(local):>7} {same_prices!s:>15} {volume_diff:>13.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificación y costo del armado de velas de temporalidades mayores.")
+    parser.add_argument("--candles", type=int, default=100_000, help="Velas sintéticas de 1m (sin --exchange)")
+    parser.add_argument("--intervals", nargs='+', default=["5", "15", "60"])
+    parser.add_argument("--exchange", action="store_true", help="Compara con las velas de Bybit (requiere conexión)")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--hours", type=float, default=24)
+    args = parser.parse_args()
+    if args.exchange:
+        against_exchange(args)
+    else:
+        offline(args)
+
+
+if __name__ == "__main__":
+    main()
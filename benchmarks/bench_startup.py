@@ -0,0 +1,221 @@
+# benchmarks/bench_startup.py
+"""
+Mide el arranque del bot: tiempo de importación en frío y tiempo hasta la primera señal, cada uno
+en un proceso nuevo de Python.
+
+    - Importación: 'import main' con python -X importtime, y qué módulos pesados quedan cargados
+      (pybit, requests, dotenv, websocket y pandas solo se importan cuando se usan).
+    - Primera señal: desde que arranca el proceso hasta que termina la primera iteración de
+      run_symbol_tick contra el Bybit simulado (services/exchange_simulator.py), con --latency-ms
+      de demora por solicitud REST y estrategias en el intervalo del mercado y en uno mayor
+      (las del intervalo mayor necesitan muchas velas base de precarga). Tres escenarios:
+        vacío:     sin almacén de velas (descarga todo el historial y precarga)
+        almacén:   con el almacén de velas de una ejecución anterior, sin snapshot (precarga)
+        snapshot:  con el almacén y services/state_snapshot.py (retoma el estado, sin precarga)
+    - Costo de guardar el snapshot en cada iteración, y verificación: un motor retomado del snapshot
+      da las mismas señales que uno que nunca se detuvo (también se compara uno precargado solo con
+      la ventana de velas).
+
+Uso:
+    python -m benchmarks.bench_startup --candles 20000 --latency-ms 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+STARTED = time.perf_counter() # Lo antes posible: el proceso hijo mide desde aquí
+
+import numpy as np
+
+HEAVY_MODULES = ('pybit', 'requests', 'dotenv', 'websocket', 'pandas')
+BASE_INTERVAL = "1"
+SPECS = [("sma_crossover", {}), ("rsi_reversion", {})]
+TIMEFRAME_SPECS = {"60": [("sma_crossover", {}), ("rsi_reversion", {})]}
+
+
+def import_profile():
+    """Segundos de 'import main' en un proceso nuevo y los módulos pesados que quedaron cargados."""
+    code = f"import main, sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    total_us = next(int(line.split('|')[1]) for line in result.stderr.splitlines() if line.rstrip().endswith('| main'))
+    return total_us / 1e6, result.stdout.strip()
+
+
+def configure():
+    import config
+    config.STRATEGIES = SPECS
+    config.STRATEGY_TIMEFRAMES = TIMEFRAME_SPECS
+    config.MARKET_STRATEGIES = {}
+    config.MARKET_STRATEGY_TIMEFRAMES = {}
+
+
+def child(args):
+    """Un arranque del bot: importación, cliente, snapshot (si hay) y la primera iteración del mercado."""
+    import main
+    from services import trade_logger
+    from services.bybit_client import BybitClient
+    from services.candle_store import CandleStore, interval_to_ms
+    from services.exchange_simulator import (
+        SimulatedClock,
+        SimulatedExchange,
+        SimulatedHTTPSession,
+        candles_from_file,
+    )
+    from services.market_scheduler import SymbolState
+    from services.order_manager import OrderManager
+    from services.state_snapshot import StateSnapshot
+    imported = time.perf_counter()
+
+    class LatencySession(SimulatedHTTPSession):
+        """Cada solicitud REST demora latency_ms, como la red hasta Bybit."""
+        def __getattribute__(self, name):
+            attr = super().__getattribute__(name)
+            if callable(attr) and not name.startswith('_'):
+                def delayed(*a, **kw):
+                    time.sleep(args.latency_ms / 1000)
+                    return attr(*a, **kw)
+                return delayed
+            return attr
+
+    configure()
+    trade_logger.LOG_FOLDER = os.path.join(args.workdir, "logs")
+    candles = candles_from_file(args.data)
+    clock = SimulatedClock(int(candles['start_time'][0]) + args.at * interval_to_ms(BASE_INTERVAL) + 30_000)
+    exchange = SimulatedExchange({(args.symbol, BASE_INTERVAL): candles}, clock)
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = BybitClient(session=LatencySession(exchange))
+        order_manager = OrderManager(client, poll_initial=0)
+        snapshot = StateSnapshot(os.path.join(args.workdir, "bot_state.pkl"))
+        snapshot.restore_session(order_manager)
+        state = SymbolState(args.symbol, BASE_INTERVAL, 0.001)
+        state.candle_store = CandleStore(args.symbol, BASE_INTERVAL, folder=os.path.join(args.workdir, "candles"),
+                                         backfill_bars=args.backfill, clock=clock.time)
+        restored = snapshot.loaded is not None
+        main.run_symbol_tick(client, order_manager, state, snapshot)
+    first_signal = time.perf_counter()
+    print(json.dumps({'import': imported - STARTED, 'first_signal': first_signal - STARTED,
+                      'restored': restored, 'candles': len(state.candle_store)}))
+
+
+def run_child(args, workdir, at):
+    command = [sys.executable, "-m", "benchmarks.bench_startup", "--child", "--workdir", workdir, "--data", args.data,
+               "--at", str(at), "--latency-ms", str(args.latency_ms), "--backfill", str(args.backfill),
+               "--symbol", args.symbol]
+    started = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    wall = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(result.stderr)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['wall'] = wall
+    return report
+
+
+def signals(engine, candles):
+    return [engine.update(candle) for candle in candles]
+
+
+def check_restore(candles):
+    """Señales de un motor que nunca se detuvo, uno retomado del snapshot y uno precargado con la ventana."""
+    from strategies.base import MultiTimeframeStrategySet
+    configure()
+    split = len(candles) // 2
+    build = lambda: MultiTimeframeStrategySet.from_config(BASE_INTERVAL, SPECS, TIMEFRAME_SPECS)
+    continuous = build()
+    continuous.warm_up(candles[:split // 2])
+    signals(continuous, candles[split // 2:split])
+    # Igual que StateSnapshot: el estado viaja como datos simples y se carga en un motor nuevo
+    state = pickle.loads(pickle.dumps(continuous.get_state(), protocol=pickle.HIGHEST_PROTOCOL))
+    restored = build()
+    restored.set_state(state)
+    warmed = build()
+    warmed.warm_up(candles[:split][-warmed.lookback:])
+    reference = signals(continuous, candles[split:])
+    return (sum(a == b for a, b in zip(signals(restored, candles[split:]), reference)),
+            sum(a == b for a, b in zip(signals(warmed, candles[split:]), reference)), len(reference),
+            len(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)))
+
+
+def record_cost(candles, folder, repeat=50):
+    """Milisegundos por StateSnapshot.record (serialización del motor + escritura atómica con fsync)."""
+    from services.candle_store import CandleStore
+    from services.state_snapshot import StateSnapshot
+    from strategies.base import MultiTimeframeStrategySet
+    configure()
+    store = CandleStore("BENCH", BASE_INTERVAL, folder=folder)
+    store.append(candles)
+    engine = MultiTimeframeStrategySet.from_config(BASE_INTERVAL, SPECS, TIMEFRAME_SPECS)
+    engine.warm_up(candles[-engine.lookback:])
+    snapshot = StateSnapshot(os.path.join(folder, "bot_state.pkl"))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        snapshot.record(store, engine)
+    return (time.perf_counter() - started) / repeat * 1000, os.path.getsize(snapshot.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación en frío y tiempo hasta la primera señal del bot.")
+    parser.add_argument("--candles", type=int, default=20_000, help="Velas sintéticas de 1m del mercado simulado")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Demora por solicitud REST")
+    parser.add_argument("--backfill", type=int, default=5000, help="Velas a descargar con el almacén vacío")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--at", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    from services.exchange_simulator import synthetic_candle_array
+    seconds, loaded = import_profile()
+    print(f"import main: {seconds * 1000:.0f} ms; módulos pesados cargados: {loaded or 'ninguno'}")
+
+    root = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        candles = synthetic_candle_array(args.candles, BASE_INTERVAL, seed=1)
+        args.data = os.path.join(root, "market.candles")
+        candles.tofile(args.data)
+        at = args.backfill + 100
+        results = {'vacío': [], 'almacén': [], 'snapshot': []}
+        for i in range(args.repeat):
+            workdir = os.path.join(root, f"run{i}")
+            os.makedirs(workdir)
+            results['vacío'].append(run_child(args, workdir, at))
+            # Se reinicia 5 minutos después: el almacén y el snapshot quedaron de la ejecución anterior
+            os.rename(os.path.join(workdir, "bot_state.pkl"), os.path.join(workdir, "bot_state.saved"))
+            results['almacén'].append(run_child(args, workdir, at + 5))
+            os.replace(os.path.join(workdir, "bot_state.saved"), os.path.join(workdir, "bot_state.pkl"))
+            results['snapshot'].append(run_child(args, workdir, at + 5))
+        with contextlib.redirect_stdout(io.StringIO()):
+            per_record_ms, snapshot_size = record_cost(candles[:at], os.path.join(root, "record"))
+        print(f"Latencia por solicitud: {args.latency_ms:.0f} ms; estrategias en 1m y 60m; {args.backfill} velas de precarga")
+        print(f"{'escenario':>10} {'velas':>7} {'retomado':>9} {'importación':>12} {'1ª señal':>10} {'proceso':>10}")
+        for name, runs in results.items():
+            last = runs[-1]
+            print(f"{name:>10} {last['candles']:>7} {last['restored']!s:>9} "
+                  f"{np.median([r['import'] for r in runs]) * 1000:>9.0f} ms "
+                  f"{np.median([r['first_signal'] for r in runs]) * 1000:>7.0f} ms "
+                  f"{np.median([r['wall'] for r in runs]) * 1000:>7.0f} ms")
+        print(f"Guardar el snapshot en cada iteración: {per_record_ms:.2f} ms ({snapshot_size / 1024:.1f} KB)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        same_restored, same_warmed, total, size = check_restore(candles[:8000])
+    print(f"Señales iguales a un motor sin reinicio: retomado {same_restored}/{total}, precargado {same_warmed}/{total} "
+          f"(snapshot del motor: {size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
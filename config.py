@@ -16,5 +16,75 @@ TRADE_QUANTITY = 0.001 # Cantidad a operar por transacción (ej. 0.001 BTC). ¡A
 SMA_SHORT_PERIOD = 10 # Período para la Media Móvil Corta (ej. 10 velas)
 SMA_LONG_PERIOD = 20  # Período para la Media Móvil Larga (ej. 20 velas)
 
+# Estrategias que evalúa cada mercado: lista de (nombre, parámetros) registrados en strategies/base.py
+# (ver available_strategies()). Con varias estrategias se opera solo si ninguna da la señal contraria.
+# Ej.: STRATEGIES = [("sma_crossover", {"short_period": 10, "long_period": 20}), ("rsi_reversion", {"period": 14})]
+STRATEGIES = [("sma_crossover", {})] # Sin parámetros usa SMA_SHORT_PERIOD y SMA_LONG_PERIOD
+MARKET_STRATEGIES = {} # Estrategias por símbolo (ej. {"ETHUSDT": [("rsi_reversion", {})]}); los demás usan STRATEGIES
+# Estrategias en temporalidades mayores, con velas construidas a partir de las del intervalo del mercado
+# (sin más solicitudes a Bybit). Cada intervalo debe ser múltiplo del del mercado.
+# Ej.: STRATEGY_TIMEFRAMES = {"15": [("sma_crossover", {})], "60": [("rsi_reversion", {})]}
+STRATEGY_TIMEFRAMES = {}
+MARKET_STRATEGY_TIMEFRAMES = {} # Por símbolo, como MARKET_STRATEGIES; los demás usan STRATEGY_TIMEFRAMES
+
 # --- LOGGING & RECORDING ---
 TRADE_LOG_FILE = "data/trade_log.csv" # Ruta del archivo para registrar operaciones
+TRADE_LOG_FORMAT = "csv" # "csv", "parquet" o "arrow" (Arrow IPC). Parquet y Arrow requieren pyarrow.
+# Parquet solo se puede leer una vez cerrado: si el bot se corta, el log de esa sesión se pierde aunque se use fsync.
+# CSV y Arrow conservan las filas escritas hasta el corte.
+TRADE_LOG_FSYNC = "batch" # "never", "batch" (fsync tras cada lote) o "interval" (cada TRADE_LOG_FSYNC_SECONDS)
+TRADE_LOG_FSYNC_SECONDS = 5.0
+TRADE_LOG_BATCH_SIZE = 100 # Filas máximas por escritura
+TRADE_LOG_FLUSH_SECONDS = 1.0 # Tiempo máximo que una fila espera en memoria antes de escribirse
+TRADE_LOG_CACHE_FILE = "data/trade_journal_cache.npz" # Logs de todas las sesiones consolidados para analyze.py; None lo desactiva
+
+# --- BACKTESTING ---
+BACKTEST_INITIAL_BALANCE = 10000.0 # Balance inicial (USDT) usado por backtest.py
+
+# --- STREAMING (WebSocket) ---
+STREAM_MODE = False # True para operar con los streams de Bybit en lugar del polling cada CHECK_INTERVAL_SECONDS
+# URLs de los streams. None usa las de Bybit (Testnet o producción según TESTNET).
+# Para pruebas sin conexión: "ws://127.0.0.1:8765/v5/public/linear" y "ws://127.0.0.1:8765/v5/private"
+WS_PUBLIC_URL = None
+WS_PRIVATE_URL = None
+
+# --- CANDLE STORE ---
+CANDLE_STORE_FOLDER = "data/candles" # Carpeta con el historial de velas por símbolo e intervalo
+CANDLE_STORE_BACKFILL = 1000 # Velas a descargar la primera vez que se usa un símbolo/intervalo
+# Estado de las estrategias, órdenes pendientes y log de la sesión, guardado en cada iteración para
+# retomar sin precarga tras un reinicio; None lo desactiva
+STATE_SNAPSHOT_FILE = "data/bot_state.pkl"
+STATE_SNAPSHOT_MAX_AGE_CANDLES = 60 # Velas del intervalo de cada mercado tras las que su estado guardado se descarta (None: sin límite)
+
+# --- MULTI-SYMBOL ---
+# Mercados (símbolo, intervalo) que opera el bot en paralelo desde un único proceso.
+# Ej.: MARKETS = [("BTCUSDT", "1"), ("ETHUSDT", "1"), ("SOLUSDT", "5")]
+MARKETS = [(SYMBOL, INTERVAL)]
+TRADE_QUANTITIES = {} # Cantidad por símbolo (ej. {"ETHUSDT": 0.01}); los demás usan TRADE_QUANTITY
+MAX_CONCURRENT_MARKETS = 16 # Hilos del pool que ejecutan las iteraciones de los mercados
+API_REQUESTS_PER_SECOND = 10 # Límite de solicitudes REST compartido por todos los mercados
+
+# --- REQUEST LAYER ---
+API_BASE_URL = None # URL base de la API REST; None usa Bybit. Pruebas: "http://127.0.0.1:8766" (services/fake_rest_server.py)
+API_TIMEOUT_SECONDS = 5 # Timeout de cada solicitud HTTP
+API_MAX_RETRIES = 4 # Reintentos ante límites de solicitudes (429, 10006), timeouts, errores de conexión y 5xx
+API_RETRY_BASE_SECONDS = 0.25 # Espera del primer reintento; se duplica en cada intento (con jitter)
+API_RETRY_MAX_SECONDS = 10.0
+API_ORDER_RESERVE = 0.2 # Fracción del límite reservada a las órdenes: cerca del límite, los datos de mercado esperan
+API_POOL_SIZE = MAX_CONCURRENT_MARKETS # Conexiones keep-alive reutilizadas por los hilos del bot
+
+# --- ACCOUNT CACHE ---
+# Segundos durante los que se reutilizan posiciones y balance (una sola consulta para todos los símbolos).
+# Se invalida al enviar una orden. None o 0 desactiva la caché.
+ACCOUNT_CACHE_TTL_SECONDS = 5
+
+# --- ORDER EXECUTION ---
+ORDER_FILL_TIMEOUT_SECONDS = 10 # Tiempo máximo de espera de la ejecución de una orden de mercado
+REVERSE_IN_SINGLE_ORDER = False # True: revierte Long <-> Short con una sola orden del doble de tamaño
+
+# --- METRICS ---
+# Latencias por etapa del bucle y por endpoint de la API, contadores de llamadas y errores.
+# Desactivadas no tienen costo apreciable en el bucle.
+METRICS_ENABLED = False
+METRICS_PORT = 9108 # Endpoint Prometheus en http://127.0.0.1:9108/metrics (None para no exponerlo)
+METRICS_SUMMARY_SECONDS = 60 # Cada cuántos segundos se imprime el resumen en consola (None para no imprimirlo)
@@ -0,0 +1,2 @@
+# conftest.py
+# Hace importables los módulos del bot (config, services, strategies) desde tests/ con cualquier forma de correr pytest.
@@ -1,139 +1,413 @@
 # main.py
+import asyncio
 import time
-import pandas as pd
 from datetime import datetime
 
 # Importa los módulos de tu proyecto
 import config # Para acceder a los parámetros de configuración
-from services.bybit_client import BybitClient # Tu clase para interactuar con Bybit
-from strategies.simple_ma_strategy import generate_signal # Tu función de estrategia
+from services.bybit_client import AccountStateUnavailable, BybitClient # Tu clase para interactuar con Bybit
+from strategies.base import StrategySet, MultiTimeframeStrategySet # Estrategias registradas que evalúa cada mercado
 from services.trade_logger import log_trade # Tu función para registrar operaciones
+from services.order_manager import OrderManager # Envío de órdenes y espera de su ejecución
+from services.candle_store import CandleStore # Historial de velas persistido en disco
+from services.rate_limiter import RateLimiter # Límite de solicitudes compartido por todos los mercados
+from services.market_scheduler import SymbolState, MarketScheduler # Estado y planificación por mercado
+from services.state_snapshot import StateSnapshot # Estado guardado para retomar tras un reinicio
+from services.metrics import metrics, start_http_server, start_summary_reporter # Latencias y contadores del bot
+
+def execute_signal(order_manager, symbol, signal, current_price, current_position_size, current_position_side,
+                   current_avg_entry_price, current_balance, quantity=None):
+    """
+    Ejecuta las operaciones que corresponden a la señal según la posición actual:
+    abre Long/Short si no hay posición, revierte la posición contraria o la mantiene.
+    Es compartida por el bucle de polling y el modo streaming.
+    Las órdenes se envían con el OrderManager, que espera la ejecución real: solo se registran
+    las órdenes con ejecución confirmada, con su precio de ejecución (o current_price si no se conoce).
+    quantity: cantidad a operar en este mercado (por defecto config.TRADE_QUANTITY).
+    """
+    if signal not in ("BUY", "SELL"):
+        print("Señal de HOLD/WAIT: No se toma ninguna acción.")
+        return
+
+    if quantity is None:
+        quantity = config.TRADE_QUANTITY
+    order_side = "Buy" if signal == "BUY" else "Sell"
+    signal_name = "COMPRA" if signal == "BUY" else "VENTA"
+    new_position_name = "Long" if order_side == "Buy" else "Short"
+
+    if current_position_size == 0:
+        print(f"Señal de {signal_name}: Abriendo posición {new_position_name} por {quantity} {symbol}...")
+        open_fill = order_manager.execute(symbol, order_side, quantity)
+        log_open_position(symbol, order_side, quantity, open_fill, current_price, current_balance)
+
+    elif current_position_side != order_side:
+        old_position_name = "Long" if current_position_side == "Buy" else "Short"
+        print(f"Señal de {signal_name}: Hay posición {old_position_name}. Cerrando {old_position_name} y abriendo {new_position_name}...")
+        close_qty = current_position_size
+
+        close_fill, open_fill = order_manager.reverse_position(symbol, current_position_side, close_qty, quantity)
+        if close_fill is None:
+            print(f"No se pudo enviar la orden de cierre para {symbol}.")
+            return
+        if not close_fill.filled:
+            # Sin ejecución confirmada no hay cierre que registrar ni PnL realizado
+            print(f"El cierre de {symbol} no se confirmó ({close_fill.status}): no se registra ni se abre la posición {new_position_name}.")
+            return
+
+        # --- PNL CON EL PRECIO REAL DE EJECUCIÓN DEL CIERRE Y current_avg_entry_price ---
+        close_price = close_fill.price_or(current_price)
+        pnl_on_close = 0.0 # Inicializar por defecto
+        if current_avg_entry_price is not None:
+            if current_position_side == "Buy":
+                # PNL para cerrar un LONG: (precio_cierre - precio_entrada) * cantidad
+                pnl_on_close = (close_price - current_avg_entry_price) * close_qty
+            else:
+                # PNL para cerrar un SHORT: (precio_entrada - precio_cierre) * cantidad
+                pnl_on_close = (current_avg_entry_price - close_price) * close_qty
+        # -------------------------------------------------------------------------------
+
+        log_trade(symbol, "CLOSE_POSITION", order_side, close_qty, close_price,
+                  pnl=pnl_on_close, balance_after_trade=current_balance, order_id=close_fill.order_id,
+                  status=f"CLOSED {old_position_name.upper()}")
+        log_open_position(symbol, order_side, quantity, open_fill, current_price, current_balance)
+
+    else: # Ya en posición del mismo lado que la señal
+        print(f"Señal de {signal_name}: Ya en posición {new_position_name}. Manteniendo.")
+
+
+def log_open_position(symbol, side, quantity, fill, fallback_price, current_balance):
+    """Registra la apertura con el precio de ejecución; si la orden no se ejecutó (o no se sabe) no se registra nada."""
+    if fill is None:
+        return
+    if not fill.filled:
+        print(f"La apertura {side} de {symbol} no se confirmó ({fill.status}): no se registra.")
+        return
+    log_trade(symbol, "OPEN_POSITION", side, quantity, fill.price_or(fallback_price),
+              balance_after_trade=current_balance, order_id=fill.order_id, status="FILLED")
+
+
+def warm_up_strategy(api_client, candle_store, snapshot=None):
+    """
+    Completa el almacén de velas con lo que falte desde la última ejecución y precarga las
+    estrategias del mercado (config.MARKET_STRATEGIES o config.STRATEGIES, más las de
+    config.MARKET_STRATEGY_TIMEFRAMES o config.STRATEGY_TIMEFRAMES) con las velas
+    cerradas más recientes (vista sin copia sobre el archivo).
+    Si 'snapshot' (StateSnapshot) tiene el estado de estas estrategias, se retoma de ahí sin precarga.
+    """
+    new_bars = candle_store.sync(api_client)
+    specs = config.MARKET_STRATEGIES.get(candle_store.symbol, config.STRATEGIES)
+    timeframe_specs = config.MARKET_STRATEGY_TIMEFRAMES.get(candle_store.symbol, config.STRATEGY_TIMEFRAMES)
+    if timeframe_specs:
+        strategy_engine = MultiTimeframeStrategySet.from_config(candle_store.interval, specs, timeframe_specs)
+    else:
+        strategy_engine = StrategySet.from_config(specs)
+    restored = snapshot.restore(candle_store, strategy_engine) if snapshot is not None else None
+    if restored is not None:
+        return restored
+    # Los indicadores solo dependen de las últimas velas: no hace falta recorrer todo el historial
+    strategy_engine.warm_up(candle_store.view()[-strategy_engine.lookback:])
+    if len(candle_store) < strategy_engine.lookback:
+        print(f"Aviso: {candle_store.symbol} ({candle_store.interval}) tiene {len(candle_store)} velas y las estrategias "
+              f"necesitan {strategy_engine.lookback}; darán WAIT hasta completarlas (ver CANDLE_STORE_BACKFILL).")
+    print(f"Almacén de velas {candle_store.path}: {len(candle_store)} velas ({new_bars} nuevas). "
+          f"Estrategias: {', '.join(map(str, strategy_engine.strategies))}")
+    return strategy_engine
+
+
+def catch_up(api_client, state, before=None):
+    """
+    Completa el almacén de velas por REST con las velas cerradas que no llegaron por el stream
+    (reconexión o hueco entre velas confirmadas) y las registra en el motor sin operar con ellas.
+    before: start_time de la vela confirmada que se va a procesar a continuación; esa vela y las
+    posteriores no se registran aquí. Devuelve cuántas velas se registraron.
+    """
+    new_bars = state.candle_store.sync(api_client)
+    view = state.candle_store.view()
+    missed = view[len(view) - new_bars:]
+    if before is not None:
+        missed = missed[missed['start_time'] < before]
+    for candle in missed:
+        state.strategy_engine.update(candle)
+    return len(missed)
+
+
+def build_market_states():
+    """Un SymbolState por cada (símbolo, intervalo) de config.MARKETS."""
+    return [
+        SymbolState(symbol, interval, config.TRADE_QUANTITIES.get(symbol, config.TRADE_QUANTITY))
+        for symbol, interval in config.MARKETS
+    ]
+
+
+def build_api_client():
+    """
+    Un único cliente (y una única sesión HTTP) compartido por todos los mercados, con límite de
+    solicitudes y caché de posiciones/balance (una consulta para todos los símbolos).
+    """
+    return BybitClient(testnet=config.TESTNET, rate_limiter=RateLimiter(config.API_REQUESTS_PER_SECOND, reserve=config.API_ORDER_RESERVE),
+                       account_cache_ttl=config.ACCOUNT_CACHE_TTL_SECONDS)
+
+
+def build_state_snapshot():
+    """StateSnapshot de config.STATE_SNAPSHOT_FILE (con el estado de la ejecución anterior, si hay), o None."""
+    return StateSnapshot(config.STATE_SNAPSHOT_FILE) if config.STATE_SNAPSHOT_FILE else None
+
+
+def run_symbol_tick(api_client, order_manager, state, snapshot=None):
+    """
+    Una iteración de la estrategia para un mercado: sincroniza velas, genera la señal,
+    consulta posición y balance, y ejecuta las operaciones correspondientes.
+    Al terminar, guarda el estado del mercado en 'snapshot' (StateSnapshot), si se indica.
+    Los errores se propagan al MarketScheduler, que aplica el backoff solo a este mercado.
+    """
+    with metrics.timer("bot_stage_seconds", stage="tick"):
+        _run_symbol_tick(api_client, order_manager, state, snapshot)
+    if snapshot is not None:
+        with metrics.timer("bot_stage_seconds", stage="snapshot"):
+            snapshot.record(state.candle_store, state.strategy_engine, order_manager)
+
+
+def _run_symbol_tick(api_client, order_manager, state, snapshot=None):
+    symbol = state.symbol
+    tick_started_at = time.perf_counter()
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"\n[{current_time}] Obteniendo datos para {symbol} con intervalo {state.interval}...")
+
+    # 1. Precarga del historial y del motor de la estrategia en la primera iteración del mercado
+    # (la precarga ya sincroniza las velas: no se vuelven a pedir en el paso 2)
+    new_bars = None
+    if state.strategy_engine is None:
+        with metrics.timer("bot_stage_seconds", stage="warm_up"):
+            if state.candle_store is None:
+                state.candle_store = CandleStore(symbol, state.interval)
+            state.strategy_engine = warm_up_strategy(api_client, state.candle_store, snapshot)
+            new_bars = 0
+
+    # 2. Obtener datos de mercado (Klines): solo las velas nuevas desde la última guardada
+    if new_bars is None:
+        with metrics.timer("bot_stage_seconds", stage="klines"):
+            new_bars = state.candle_store.sync(api_client)
+
+    if state.candle_store.forming is None:
+        raise RuntimeError(f"No se pudieron obtener klines para {symbol} ({state.interval})")
+
+    # 3. Generar la señal de trading usando la estrategia
+    # Las velas cerradas nuevas se registran en el motor; la vela en formación
+    # se evalúa sin modificar su estado.
+    with metrics.timer("bot_stage_seconds", stage="signal"):
+        if new_bars:
+            for candle in state.candle_store.view()[-new_bars:]:
+                state.strategy_engine.update(candle)
+        forming = state.candle_store.forming
+        current_price = forming.close
+        signal = state.strategy_engine.evaluate(forming)
+    metrics.inc("bot_signals_total", signal=signal)
+    print(f"DEBUG: Señal detectada: {signal} (en {current_price:.2f})")
+    print(f"Precio actual de {symbol}: {current_price:.2f}, Señal de estrategia: {signal}")
+
+    # 4. Obtener información de la posición actual en Bybit
+    # --- ¡AQUÍ ES DONDE CAPTURAMOS LOS TRES VALORES, INCLUIDO avg_entry_price! ---
+    with metrics.timer("bot_stage_seconds", stage="account"):
+        current_position_size, current_position_side, current_avg_entry_price = api_client.get_current_position(symbol)
+        current_balance = api_client.get_wallet_balance("USDT")
+    state.position = (current_position_size, current_position_side, current_avg_entry_price)
+    # -----------------------------------------------------------------------------
+
+    print(f"DEBUG: Variable current_position_side (dentro de main.py, ANTES DE LA LÓGICA DE SEÑAL): '{current_position_side}' (Tipo: {type(current_position_side)})")
+
+    # 5. Obtener el balance actual de la cuenta (en USDT, o la moneda base)
+    print(f"Balance actual (USDT): {current_balance:.2f}, Tamaño de posición actual ({symbol}): {current_position_size}, Lado: {current_position_side}")
+    # Este print es útil para depuración, muestra el avgPrice si hay una posición abierta
+    if current_avg_entry_price is not None:
+        print(f"Precio de Entrada Promedio de la posición actual: {current_avg_entry_price:.2f}")
+
+    # 6. Ejecutar operaciones según la señal y la posición actual
+    with metrics.timer("bot_stage_seconds", stage="execute"):
+        execute_signal(order_manager, symbol, signal, current_price, current_position_size,
+                       current_position_side, current_avg_entry_price, current_balance, state.trade_quantity)
+    if signal in ("BUY", "SELL"):
+        # Desde que se empiezan a pedir los datos hasta que las órdenes de la señal se ejecutaron
+        metrics.observe("bot_signal_latency_seconds", time.perf_counter() - tick_started_at, symbol=symbol)
+
+
+def start_metrics():
+    """Si las métricas están activadas, expone el endpoint Prometheus y el resumen periódico en consola."""
+    if not metrics.enabled:
+        return
+    if config.METRICS_PORT:
+        start_http_server(metrics, config.METRICS_PORT)
+    if config.METRICS_SUMMARY_SECONDS:
+        start_summary_reporter(metrics, config.METRICS_SUMMARY_SECONDS)
+
 
 def main_bot_loop():
     print("Iniciando Bot de Trading de Bybit...")
+    start_metrics()
+
+    # Un solo cliente de la API para todos los mercados, con límite de solicitudes compartido
+    api_client = build_api_client()
+    order_manager = OrderManager(api_client)
+    # Tras un reinicio: mismo log de operaciones y órdenes pendientes de la ejecución anterior
+    snapshot = build_state_snapshot()
+    if snapshot is not None:
+        snapshot.restore_session(order_manager)
+    states = build_market_states()
+    print(f"Mercados: {', '.join(f'{s.symbol} ({s.interval})' for s in states)}. "
+          f"Verificación cada {config.CHECK_INTERVAL_SECONDS} segundos por mercado.")
 
-    # 1. Inicializa el cliente de la API de Bybit
-    api_client = BybitClient(testnet=config.TESTNET)
+    # Cada mercado se ejecuta en un hilo del pool: uno lento o con errores no demora a los demás
+    scheduler = MarketScheduler(states, lambda state: run_symbol_tick(api_client, order_manager, state, snapshot),
+                                config.CHECK_INTERVAL_SECONDS, max_workers=config.MAX_CONCURRENT_MARKETS)
+    scheduler.run_forever()
 
-    # Bucle principal del bot: se ejecuta continuamente
-    while True:
+async def main_stream_loop():
+    """
+    Modo streaming: en lugar de consultar la API cada CHECK_INTERVAL_SECONDS, se suscribe a los
+    streams de klines (de todos los mercados), posición y billetera, y evalúa la estrategia
+    en cuanto Bybit confirma una vela.
+    """
+    # El cliente WebSocket solo se importa en modo streaming
+    from services.bybit_stream import (
+        CONNECTED_TOPIC,
+        BybitStream,
+        default_urls,
+        parse_kline_message,
+        parse_position_message,
+        parse_wallet_message,
+    )
+    print("Iniciando Bot de Trading de Bybit (modo streaming)...")
+    start_metrics()
+    loop = asyncio.get_running_loop()
+    api_client = build_api_client()
+    order_manager = OrderManager(api_client)
+    snapshot = build_state_snapshot()
+    if snapshot is not None:
+        await loop.run_in_executor(None, snapshot.restore_session, order_manager)
+    states = {state.key: state for state in build_market_states()}
+
+    async def refresh_position(state):
+        # None si la posición no se pudo consultar tras una orden: execute la vuelve a pedir antes de operar
         try:
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"\n[{current_time}] Obteniendo datos para {config.SYMBOL} con intervalo {config.INTERVAL}...")
-
-            # 2. Obtener datos de mercado (Klines)
-            klines_data = api_client.get_klines(config.SYMBOL, config.INTERVAL, limit=config.SMA_LONG_PERIOD + 5) 
-            
-            if not klines_data:
-                print("No se pudieron obtener klines. Reintentando en 1 minuto...")
-                time.sleep(60)
-                continue
-
-            # Convertir los datos de klines a un DataFrame de Pandas
-            df_klines = pd.DataFrame(klines_data, columns=[
-                'start_time', 'open', 'high', 'low', 'close', 'volume', 'turnover'
-            ])
-            df_klines[['open', 'high', 'low', 'close', 'volume']] = \
-                df_klines[['open', 'high', 'low', 'close', 'volume']].astype(float)
-            df_klines['start_time'] = pd.to_datetime(df_klines['start_time'].astype(int), unit='ms')
-            df_klines = df_klines.set_index('start_time').sort_index()
-
-            # 3. Generar la señal de trading usando la estrategia
-            signal = generate_signal(df_klines.copy()) 
-            current_price = df_klines['close'].iloc[-1]
-            print(f"DEBUG: Señal detectada: {signal} (en {current_price:.2f})")
-            print(f"Precio actual de {config.SYMBOL}: {current_price:.2f}, Señal de estrategia: {signal}")
-
-            # 4. Obtener información de la posición actual en Bybit
-            # --- ¡AQUÍ ES DONDE CAPTURAMOS LOS TRES VALORES, INCLUIDO avg_entry_price! ---
-            current_position_size, current_position_side, current_avg_entry_price = api_client.get_current_position(config.SYMBOL)
-            # -----------------------------------------------------------------------------
-            
-            print(f"DEBUG: Variable current_position_side (dentro de main.py, ANTES DE LA LÓGICA DE SEÑAL): '{current_position_side}' (Tipo: {type(current_position_side)})")
-
-            # 5. Obtener el balance actual de la cuenta (en USDT, o la moneda base)
-            current_balance = api_client.get_wallet_balance("USDT")
-            print(f"Balance actual (USDT): {current_balance:.2f}, Tamaño de posición actual: {current_position_size}, Lado: {current_position_side}")
-            # Este print es útil para depuración, muestra el avgPrice si hay una posición abierta
-            if current_avg_entry_price is not None:
-                print(f"Precio de Entrada Promedio de la posición actual: {current_avg_entry_price:.2f}")
-
-
-            # 6. Ejecutar operaciones según la señal y la posición actual
-            if signal == "BUY":
-                if current_position_size == 0:
-                    print(f"Señal de COMPRA: Abriendo posición Long por {config.TRADE_QUANTITY} {config.SYMBOL}...")
-                    order_response = api_client.place_order(config.SYMBOL, "Buy", config.TRADE_QUANTITY)
-                    if order_response:
-                        log_trade(config.SYMBOL, "OPEN_POSITION", "Buy", config.TRADE_QUANTITY, current_price,
-                                  balance_after_trade=current_balance, order_id=order_response.get('orderId'), status="SUBMITTED")
-                elif current_position_side == "Sell": 
-                    print(f"Señal de COMPRA: Hay posición Short. Cerrando Short y abriendo Long...")
-                    close_qty = current_position_size
-                    
-                    # --- CÁLCULO DE PNL ACTUALIZADO UTILIZANDO current_avg_entry_price ---
-                    pnl_on_close = 0.0 # Inicializar por defecto
-                    if current_avg_entry_price is not None:
-                        # PNL para cerrar un SHORT: (precio_entrada - precio_cierre) * cantidad
-                        pnl_on_close = (current_avg_entry_price - current_price) * close_qty
-                    # -------------------------------------------------------------------
-                    
-                    api_client.close_position(config.SYMBOL, current_position_side, close_qty)
-                    log_trade(config.SYMBOL, "CLOSE_POSITION", "Buy", close_qty, current_price, 
-                              pnl=pnl_on_close, balance_after_trade=current_balance, status="CLOSED SHORT")
-                    
-                    time.sleep(5) # Esperar un momento para asegurar que la orden de cierre se procese
-
-                    # Abrir la nueva posición Long
-                    order_response = api_client.place_order(config.SYMBOL, "Buy", config.TRADE_QUANTITY)
-                    if order_response:
-                        log_trade(config.SYMBOL, "OPEN_POSITION", "Buy", config.TRADE_QUANTITY, current_price,
-                                  balance_after_trade=current_balance, order_id=order_response.get('orderId'), status="SUBMITTED")
-                else: # Ya en posición Long (current_position_side == "Buy")
-                    print("Señal de COMPRA: Ya en posición Long. Manteniendo.")
-            
-            elif signal == "SELL":
-                if current_position_size == 0:
-                    print(f"Señal de VENTA: Abriendo posición Short por {config.TRADE_QUANTITY} {config.SYMBOL}...")
-                    order_response = api_client.place_order(config.SYMBOL, "Sell", config.TRADE_QUANTITY)
-                    if order_response:
-                        log_trade(config.SYMBOL, "OPEN_POSITION", "Sell", config.TRADE_QUANTITY, current_price,
-                                  balance_after_trade=current_balance, order_id=order_response.get('orderId'), status="SUBMITTED")
-                elif current_position_side == "Buy": 
-                    print(f"Señal de VENTA: Hay posición Long. Cerrando Long y abriendo Short...")
-                    close_qty = current_position_size
-                    
-                    # --- CÁLCULO DE PNL ACTUALIZADO UTILIZANDO current_avg_entry_price ---
-                    pnl_on_close = 0.0 # Inicializar por defecto
-                    if current_avg_entry_price is not None:
-                        # PNL para cerrar un LONG: (precio_cierre - precio_entrada) * cantidad
-                        pnl_on_close = (current_price - current_avg_entry_price) * close_qty
-                    # -------------------------------------------------------------------
-                    
-                    api_client.close_position(config.SYMBOL, current_position_side, close_qty)
-                    log_trade(config.SYMBOL, "CLOSE_POSITION", "Sell", close_qty, current_price, 
-                              pnl=pnl_on_close, balance_after_trade=current_balance, status="CLOSED LONG")
-                    
-                    time.sleep(5) # Esperar un momento para asegurar que la orden de cierre se procese
-                    
-                    # Abrir la nueva posición Short
-                    order_response = api_client.place_order(config.SYMBOL, "Sell", config.TRADE_QUANTITY)
-                    if order_response:
-                        log_trade(config.SYMBOL, "OPEN_POSITION", "Sell", config.TRADE_QUANTITY, current_price,
-                                  balance_after_trade=current_balance, order_id=order_response.get('orderId'), status="SUBMITTED")
-                else: # Ya en posición Short (current_position_side == "Sell")
-                    print("Señal de VENTA: Ya en posición Short. Manteniendo.")
-            
-            elif signal == "HOLD" or signal == "WAIT":
-                print("Señal de HOLD/WAIT: No se toma ninguna acción.")
-
-            print(f"Esperando {config.CHECK_INTERVAL_SECONDS} segundos hasta la próxima verificación...")
-            time.sleep(config.CHECK_INTERVAL_SECONDS) 
-
-        except Exception as e:
-            print(f"¡Un error inesperado ocurrió en el bucle principal! Error: {e}")
-            print("Reintentando en 5 minutos para evitar saturar la API o la CPU...")
-            time.sleep(300)
+            state.position = await loop.run_in_executor(None, api_client.get_current_position, state.symbol)
+        except AccountStateUnavailable as e:
+            print(f"Aviso: {e}")
+            state.position = None
+
+    # Precarga una única vez (todos los mercados en paralelo): historial de velas, posición y balance
+    async def warm_up(state):
+        state.candle_store = CandleStore(state.symbol, state.interval)
+        state.strategy_engine = await loop.run_in_executor(None, warm_up_strategy, api_client, state.candle_store, snapshot)
+        await refresh_position(state)
+        state.order_lock = asyncio.Lock() # Las órdenes de un mismo mercado se ejecutan en orden
+
+    await asyncio.gather(*(warm_up(state) for state in states.values()))
+    last_closed_start_times = {key: state.candle_store.last_start_time for key, state in states.items()}
+    balance = await loop.run_in_executor(None, api_client.get_wallet_balance, "USDT")
+    print(f"Precarga completa: {len(states)} mercado(s), balance {balance:.2f}")
+
+    async def execute(state, signal, close, received_at):
+        async with state.order_lock:
+            if state.position is None:
+                await refresh_position(state)
+                if state.position is None:
+                    print(f"Se omite la señal {signal} de {state.symbol}: la posición actual es desconocida.")
+                    return
+            current_position_size, current_position_side, current_avg_entry_price = state.position
+            # Las llamadas REST de las órdenes son bloqueantes: se ejecutan fuera del event loop
+            await loop.run_in_executor(None, execute_signal, order_manager, state.symbol, signal, close,
+                                       current_position_size, current_position_side,
+                                       current_avg_entry_price, balance, state.trade_quantity)
+            latency = time.perf_counter() - received_at
+            # Las órdenes propias cambian la posición: se actualiza antes de la próxima señal del mercado sin
+            # esperar al stream privado (place_order invalida la caché de cuenta, así que se consulta a la API)
+            await refresh_position(state)
+        metrics.observe("bot_signal_latency_seconds", latency, symbol=state.symbol)
+        print(f"Latencia vela confirmada -> orden ({state.symbol}): {latency * 1000:.1f} ms")
+
+    public_url, private_url = default_urls(config.TESTNET)
+    stream = BybitStream(list(states.keys()),
+                         config.WS_PUBLIC_URL or public_url, config.WS_PRIVATE_URL or private_url,
+                         api_key=api_client.session.api_key, api_secret=api_client.session.api_secret)
+    queue = asyncio.Queue()
+    flush_future = None # Última escritura del snapshot, en otro hilo
+
+    def report_flush(future):
+        # Los errores de la escritura no llegan al bucle de mensajes: se informan al terminar el future
+        if not future.cancelled() and future.exception() is not None:
+            metrics.inc("bot_errors_total", stage="snapshot")
+            print(f"¡Error guardando el snapshot de estado! Error: {future.exception()}")
+
+    stream.start(loop, queue)
+
+    try:
+        while True:
+            received_at, message = await queue.get()
+            try:
+                topic = message['topic']
+                if topic == CONNECTED_TOPIC:
+                    # Tras una reconexión (o entre la precarga y la suscripción) se pudieron perder mensajes
+                    for state in states.values():
+                        if message['private']:
+                            await refresh_position(state)
+                        else:
+                            missed = await loop.run_in_executor(None, catch_up, api_client, state)
+                            last_closed_start_times[state.key] = state.candle_store.last_start_time
+                            if missed:
+                                print(f"{state.symbol} ({state.interval}): {missed} velas recuperadas por REST tras conectar el stream.")
+                elif topic == 'position':
+                    for state in states.values():
+                        update = parse_position_message(message, state.symbol)
+                        if update is not None:
+                            state.position = update
+                            if api_client.account_cache is not None:
+                                api_client.account_cache.update_position(state.symbol, update)
+                elif topic == 'order':
+                    # Despierta a las órdenes que esperan su ejecución sin esperar al próximo polling
+                    order_manager.handle_order_message(message)
+                elif topic == 'wallet':
+                    update = parse_wallet_message(message, "USDT")
+                    if update is not None:
+                        balance = update
+                elif topic.startswith('kline.'):
+                    _, interval, symbol = topic.split('.', 2)
+                    state = states.get((symbol, interval))
+                    if state is None:
+                        continue
+                    for *kline, confirmed in parse_kline_message(message):
+                        start_time, close = kline[0], kline[4]
+                        # Solo se evalúa la estrategia con velas confirmadas y nuevas
+                        last_closed_start_time = last_closed_start_times[state.key]
+                        if not confirmed or (last_closed_start_time is not None and start_time <= last_closed_start_time):
+                            continue
+                        if last_closed_start_time is not None and start_time != last_closed_start_time + state.candle_store.interval_ms:
+                            # Faltan velas entre la última registrada y esta: se completan por REST antes de evaluarla
+                            missed = await loop.run_in_executor(None, catch_up, api_client, state, start_time)
+                            print(f"{symbol} ({interval}): {missed} velas recuperadas por REST (hueco en el stream).")
+                        last_closed_start_times[state.key] = start_time
+                        state.candle_store.append([kline])
+                        with metrics.timer("bot_stage_seconds", stage="signal"):
+                            signal = state.strategy_engine.update(kline)
+                        metrics.inc("bot_signals_total", signal=signal)
+                        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Vela confirmada {symbol} ({interval}): {close:.2f}, Señal: {signal}")
+                        if signal in ("BUY", "SELL"):
+                            # Cada orden corre en su propia tarea: un mercado lento no frena a los demás
+                            loop.create_task(execute(state, signal, close, received_at))
+                            await asyncio.sleep(0) # La tarea envía la orden antes de guardar el snapshot
+                        if snapshot is not None:
+                            # El motor se serializa antes de la próxima vela; la escritura (con fsync) va a otro hilo
+                            snapshot.capture(state.candle_store, state.strategy_engine)
+                            flush_future = loop.run_in_executor(None, snapshot.flush, order_manager)
+                            flush_future.add_done_callback(report_flush)
+            except Exception as e: # noqa: BLE001 - un mensaje con error no debe cortar el stream
+                metrics.inc("bot_errors_total", stage="stream")
+                print(f"¡Error procesando un mensaje del stream! Error: {e}")
+    finally:
+        stream.stop()
+        if flush_future is not None:
+            await asyncio.wait([flush_future]) # El último snapshot se termina de escribir antes de salir
 
 if __name__ == "__main__":
-    main_bot_loop()
\ No newline at end of file
+    if config.STREAM_MODE:
+        asyncio.run(main_stream_loop())
+    else:
+        main_bot_loop()
@@ -0,0 +1,218 @@
+# services/backtester.py
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from services.candle_store import CANDLE_DTYPE
+from services.trade_logger import TRADE_LOG_HEADER
+from strategies.indicators import sma_from_tick_cumsum, tick_cumsum
+
+# Columnas de las klines tal como las devuelve Bybit (y como las usa main.py)
+KLINE_COLUMNS = ['start_time', 'open', 'high', 'low', 'close', 'volume', 'turnover']
+
+
+class BacktestResult:
+    """Resultado de un backtest: operaciones en formato del log, curva de equity y métricas resumidas."""
+
+    def __init__(self, trades, equity, summary):
+        self.trades = trades      # pd.DataFrame con las columnas de TRADE_LOG_HEADER
+        self.equity = equity      # np.ndarray con la equity (realizada + no realizada) en cada vela
+        self.summary = summary    # dict con métricas agregadas
+
+    def to_csv(self, path):
+        """Escribe las operaciones en un CSV con el mismo formato que log_trade."""
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.trades.to_csv(path, index=False)
+        return path
+
+
+def load_ohlcv(path):
+    """
+    Carga un archivo OHLCV local y devuelve (start_time_ms, close) como arrays de NumPy.
+    Formatos soportados:
+        - .candles: archivo de services/candle_store.CandleStore (vistas sin copia sobre el archivo).
+        - .npy: array 2D con las columnas en el orden de KLINE_COLUMNS (se abre con mmap).
+        - .csv: con encabezado que incluya 'start_time' y 'close', o sin encabezado
+                con las columnas en el orden de KLINE_COLUMNS (como las devuelve Bybit).
+    """
+    if path.endswith('.candles'):
+        # El almacén de velas ya está ordenado y sin NaN: se devuelven las columnas tal cual
+        candles = np.memmap(path, dtype=CANDLE_DTYPE, mode='r')
+        return candles['start_time'], candles['close']
+    if path.endswith('.npy'):
+        data = np.load(path, mmap_mode='r')
+        start_times = np.asarray(data[:, 0], dtype=np.int64)
+        closes = np.asarray(data[:, KLINE_COLUMNS.index('close')], dtype=np.float64)
+    else:
+        with open(path, 'r') as f:
+            first_line = f.readline()
+        if 'close' in first_line:
+            df = pd.read_csv(path, usecols=['start_time', 'close'])
+        else:
+            df = pd.read_csv(path, header=None, names=KLINE_COLUMNS, usecols=['start_time', 'close'])
+        start_times = df['start_time'].to_numpy(dtype=np.int64)
+        closes = pd.to_numeric(df['close'], errors='coerce').to_numpy(dtype=np.float64)
+
+    # Las klines de Bybit vienen de la más nueva a la más antigua: ordenamos cronológicamente
+    if len(start_times) > 1 and start_times[0] > start_times[-1]:
+        start_times, closes = start_times[::-1], closes[::-1]
+    valid = ~np.isnan(closes)
+    if not valid.all():
+        start_times, closes = start_times[valid], closes[valid]
+    return np.ascontiguousarray(start_times), np.ascontiguousarray(closes)
+
+
+def close_cumsum(closes):
+    """
+    Suma acumulada de los cierres en ticks enteros (int64) con un 0 inicial, base para calcular cualquier
+    SMA en O(n). Una suma acumulada en float64 pierde precisión a lo largo de la serie y cambia el
+    resultado de los cruces con SMAs iguales; en ticks la suma de cada ventana es exacta.
+    """
+    return tick_cumsum(closes)
+
+
+def sma_from_cumsum(cumsum, window):
+    """
+    SMA de 'window' velas a partir de close_cumsum, idéntica a la de SMACrossoverEngine.
+    Las primeras window-1 posiciones quedan en NaN.
+    """
+    return sma_from_tick_cumsum(cumsum, window)
+
+
+def crossover_signals(sma_short, sma_long):
+    """
+    Señales del cruce de SMAs para cada vela, con la misma lógica que generate_signal:
+    1 = BUY, -1 = SELL, 0 = HOLD/WAIT. Las comparaciones con NaN son falsas, por lo que
+    no hay señales mientras falten datos.
+    """
+    signals = np.zeros(len(sma_short), dtype=np.int8)
+    if len(sma_short) < 2:
+        return signals
+    prev_short, prev_long = sma_short[:-1], sma_long[:-1]
+    last_short, last_long = sma_short[1:], sma_long[1:]
+    signals[1:][(last_short > last_long) & (prev_short <= prev_long)] = 1
+    signals[1:][(last_short < last_long) & (prev_short >= prev_long)] = -1
+    return signals
+
+
+def positions_from_signals(signals):
+    """
+    Posición mantenida tras cada vela (1 Long, -1 Short, 0 sin posición), replicando
+    main_bot_loop: una señal abre o revierte la posición y se mantiene hasta la señal contraria.
+    """
+    n = len(signals)
+    last_signal_idx = np.where(signals != 0, np.arange(n), 0)
+    np.maximum.accumulate(last_signal_idx, out=last_signal_idx)
+    return signals[last_signal_idx]
+
+
+def simulate_positions(start_times, closes, positions, quantity, initial_balance, symbol):
+    """
+    Calcula operaciones, PnL y curva de equity a partir de la posición vela a vela.
+    Los PnL usan las mismas fórmulas que main.py:
+        cerrar LONG:  (precio_cierre - precio_entrada) * cantidad
+        cerrar SHORT: (precio_entrada - precio_cierre) * cantidad
+    """
+    # Equity: balance inicial + PnL marcado a mercado de la posición que se tenía en la vela anterior
+    price_changes = np.diff(closes, prepend=closes[:1])
+    held = np.concatenate(([0], positions[:-1])) if len(positions) else positions
+    equity = initial_balance + quantity * np.cumsum(held * price_changes)
+
+    # Velas en las que cambia la posición (apertura o reversión)
+    change_idx = np.flatnonzero(np.diff(positions, prepend=0) != 0)
+    new_side = positions[change_idx].astype(np.int64)
+    prev_side = np.zeros_like(new_side)
+    prev_side[1:] = new_side[:-1]
+    prices = closes[change_idx]
+    entry_prices = np.full_like(prices, np.nan)
+    entry_prices[1:] = prices[:-1]
+
+    closing = prev_side != 0
+    close_pnl = np.where(closing, (prices - entry_prices) * quantity * prev_side, 0.0)
+    realized = np.cumsum(close_pnl)
+
+    # Cada cambio genera (opcionalmente) una fila CLOSE_POSITION seguida de una fila OPEN_POSITION
+    n_changes = len(change_idx)
+    row_is_close = np.tile([True, False], n_changes)
+    keep = np.repeat(closing, 2) | ~row_is_close
+    row_change = np.repeat(np.arange(n_changes), 2)[keep]
+    row_is_close = row_is_close[keep]
+
+    # Lado de la orden: para cerrar un Short se compra y para cerrar un Long se vende,
+    # en ambos casos coincide con el lado de la nueva posición
+    row_side = np.where(new_side[row_change] > 0, 'Buy', 'Sell')
+    row_pnl = np.where(row_is_close, close_pnl[row_change], 0.0)
+    # Mismos estados que las filas de main.py para órdenes ejecutadas
+    row_status = np.where(row_is_close, np.where(prev_side[row_change] < 0, 'CLOSED SHORT', 'CLOSED LONG'), 'FILLED')
+    row_timestamps = pd.to_datetime(start_times[change_idx][row_change], unit='ms').strftime("%Y-%m-%d %H:%M:%S")
+
+    trades = pd.DataFrame({
+        'Timestamp': row_timestamps,
+        'Symbol': symbol,
+        'Action': np.where(row_is_close, 'CLOSE_POSITION', 'OPEN_POSITION'),
+        'Side': row_side,
+        'Quantity': [f"{quantity:.8f}"] * len(row_change),
+        'Price': np.char.mod('%.2f', prices[row_change]) if len(row_change) else [],
+        'PNL': np.char.mod('%.2f', row_pnl) if len(row_change) else [],
+        'BalanceAfterTrade': np.char.mod('%.2f', initial_balance + realized[row_change]) if len(row_change) else [],
+        'OrderID': '',
+        'Status': row_status,
+    }, columns=TRADE_LOG_HEADER)
+
+    summary = summarize_positions(closes, positions, quantity, initial_balance, equity=equity)
+    return BacktestResult(trades, equity, summary)
+
+
+def summarize_positions(closes, positions, quantity, initial_balance, equity=None):
+    """
+    Métricas del backtest (PnL realizado, win rate, drawdown...) sin construir las filas del log.
+    Es la versión liviana de simulate_positions que usan las búsquedas de parámetros.
+    """
+    if equity is None:
+        price_changes = np.diff(closes, prepend=closes[:1])
+        held = np.concatenate(([0], positions[:-1])) if len(positions) else positions
+        equity = initial_balance + quantity * np.cumsum(held * price_changes)
+
+    change_idx = np.flatnonzero(np.diff(positions, prepend=0) != 0)
+    new_side = positions[change_idx].astype(np.int64)
+    prev_side = np.zeros_like(new_side)
+    prev_side[1:] = new_side[:-1]
+    prices = closes[change_idx]
+    closing = prev_side != 0
+    close_pnl = (prices[1:] - prices[:-1]) * quantity * prev_side[1:] if len(prices) else prices
+
+    closed_trades = int(np.count_nonzero(closing))
+    wins = np.count_nonzero(close_pnl > 0)
+    running_max = np.maximum.accumulate(equity) if len(equity) else equity
+    return {
+        'bars': len(closes),
+        'signals': len(change_idx),
+        'closed_trades': closed_trades,
+        'win_rate': float(wins / closed_trades) if closed_trades else 0.0,
+        'realized_pnl': float(close_pnl.sum()) if closed_trades else 0.0,
+        'final_equity': float(equity[-1]) if len(equity) else initial_balance,
+        'max_drawdown': float(np.max(running_max - equity)) if len(equity) else 0.0,
+    }
+
+
+def run_backtest(start_times, closes, short_period, long_period, quantity, initial_balance, symbol, cumsum=None):
+    """
+    Reproduce la estrategia de cruce de SMAs y la lógica de reversión de main_bot_loop
+    sobre toda la serie en una sola pasada vectorizada (sin llamar a generate_signal por vela).
+    'cumsum' permite reutilizar una suma acumulada ya calculada con close_cumsum.
+    """
+    if cumsum is None:
+        cumsum = close_cumsum(closes)
+    sma_short = sma_from_cumsum(cumsum, short_period)
+    sma_long = sma_from_cumsum(cumsum, long_period)
+    positions = positions_from_signals(crossover_signals(sma_short, sma_long))
+    return simulate_positions(start_times, closes, positions, quantity, initial_balance, symbol)
+
+
+def default_output_path(folder="data"):
+    timestamp_file_name = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return os.path.join(folder, f'backtest_{timestamp_file_name}.csv')
@@ -1,52 +1,154 @@
 # services/bybit_client.py
 import os
-from pybit.unified_trading import HTTP
-from dotenv import load_dotenv
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 
-# Carga las variables de entorno del archivo .env al inicio de la ejecución
-load_dotenv()
+import config  # Para acceder a los parámetros de la capa de solicitudes
+from services.metrics import metrics
+from services.rate_limiter import PRIORITY_DATA, PRIORITY_ORDER
+
+# retCode de Bybit por exceso de solicitudes (10006: por cuenta, 10018: por IP)
+RATE_LIMIT_CODES = {10006, 10018}
+_RATE_LIMIT_CODE_BYTES = tuple(str(code).encode() for code in RATE_LIMIT_CODES)
+# Códigos HTTP que se reintentan: límites (403 por IP, 429) y errores temporales del servidor
+RETRYABLE_HTTP_STATUSES = {403, 429, 500, 502, 503, 504}
+# retCode de Bybit cuando ya existe una orden con el mismo orderLinkId (el reintento ya se había ejecutado)
+DUPLICATE_ORDER_LINK_ID = 110072
 
 class BybitClient:
-    def __init__(self, testnet=False):
-        # Obtiene las claves API de las variables de entorno
-        api_key = os.getenv("BYBIT_API_KEY")
-        api_secret = os.getenv("BYBIT_API_SECRET")
-
-        if not api_key or not api_secret:
-            raise ValueError("BYBIT_API_KEY o BYBIT_API_SECRET no se encontraron en el archivo .env. Asegúrate de configurarlos.")
-
-        # Inicializa la sesión HTTP con la API unificada de Bybit
-        self.session = HTTP(
-            testnet=testnet,
-            api_key=api_key,
-            api_secret=api_secret
-        )
+    def __init__(self, testnet=False, rate_limiter=None, session=None, account_cache_ttl=None, max_retries=None):
+        """
+        rate_limiter: limitador de solicitudes compartido (services/rate_limiter.RateLimiter), opcional.
+        session: sesión con la interfaz de pybit HTTP; si se omite se crea una con las claves del .env
+                 (permite usar un backend falso en pruebas y benchmarks).
+        account_cache_ttl: si se indica, posiciones y balance se sirven desde un AccountStateCache
+                           con esa vigencia en segundos.
+        max_retries: reintentos por solicitud (por defecto config.API_MAX_RETRIES).
+        """
+        if session is None:
+            # Carga las variables de entorno del archivo .env solo cuando se crea una sesión real
+            # (pybit, requests y dotenv se importan aquí: importar el módulo no los carga)
+            from dotenv import load_dotenv
+            load_dotenv()
+            # Obtiene las claves API de las variables de entorno
+            api_key = os.getenv("BYBIT_API_KEY")
+            api_secret = os.getenv("BYBIT_API_SECRET")
+
+            if not api_key or not api_secret:
+                raise ValueError("BYBIT_API_KEY o BYBIT_API_SECRET no se encontraron en el archivo .env. Asegúrate de configurarlos.")
+
+            session = build_http_session(testnet, api_key, api_secret)
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries if max_retries is not None else config.API_MAX_RETRIES
+        self.account_cache = AccountStateCache(self, account_cache_ttl) if account_cache_ttl else None
         print(f"Bybit API Client inicializado (Testnet: {testnet})")
 
-    def get_klines(self, symbol, interval, limit=200):
+    def _throttle(self, endpoint=None, priority=PRIORITY_ORDER):
+        """Espera un turno del limitador de solicitudes antes de llamar a la API."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(endpoint, priority)
+
+    def _call(self, endpoint, method, priority=PRIORITY_DATA, **params):
+        """
+        Llama a un endpoint de la API respetando el límite de solicitudes y registrando
+        cantidad de llamadas, errores, reintentos y latencia por endpoint en services/metrics.
+
+        Los límites de solicitudes (429, 10006), timeouts, errores de conexión y 5xx se reintentan
+        hasta max_retries veces con backoff exponencial con jitter; ante un límite se espera hasta
+        el reinicio que informa Bybit. Si se agotan los reintentos se propaga el último error
+        (o se devuelve la última respuesta con retCode de límite).
+        """
+        attempt = 0
+        while True:
+            self._throttle(endpoint, priority)
+            metrics.inc("bybit_api_calls_total", endpoint=endpoint)
+            headers = None
+            try:
+                with metrics.timer("bybit_api_latency_seconds", endpoint=endpoint):
+                    response = method(**params)
+            except Exception as e:
+                metrics.inc("bybit_api_errors_total", endpoint=endpoint)
+                retryable, rate_limited = _classify_error(e)
+                headers = getattr(e, 'resp_headers', None)
+                if isinstance(e, RateLimitedResponse) and self.rate_limiter is not None:
+                    self.rate_limiter.update_from_headers(endpoint, headers)
+                if not retryable or attempt >= self.max_retries:
+                    if isinstance(e, RateLimitedResponse):
+                        return e.response
+                    raise
+                reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+            else:
+                if isinstance(response, tuple):
+                    # pybit con return_response_headers=True: (json, tiempo, encabezados)
+                    response, _, headers = response
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.update_from_headers(endpoint, headers)
+                ret_code = response.get('retCode', 0) if isinstance(response, dict) else 0
+                if ret_code == 0:
+                    return response
+                metrics.inc("bybit_api_errors_total", endpoint=endpoint)
+                rate_limited = ret_code in RATE_LIMIT_CODES
+                if not rate_limited or attempt >= self.max_retries:
+                    return response
+                reason = f"retCode {ret_code}: {response.get('retMsg')}"
+
+            delay = self._retry_delay(attempt, headers if rate_limited else None)
+            if rate_limited and self.rate_limiter is not None:
+                self.rate_limiter.block(endpoint, delay)
+            attempt += 1
+            metrics.inc("bybit_api_retries_total", endpoint=endpoint)
+            print(f"Reintentando {endpoint} en {delay:.2f}s (intento {attempt}/{self.max_retries}): {reason}")
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(attempt, headers=None):
+        # Con el reinicio del límite informado por Bybit se espera hasta ese momento más un jitter
+        # (nunca antes del reinicio); si no, backoff exponencial con jitter (mitad fija, mitad al azar),
+        # en ambos casos para no reintentar todos a la vez
+        try:
+            reset_in = int(headers['X-Bapi-Limit-Reset-Timestamp']) / 1000 - time.time()
+        except (KeyError, TypeError, ValueError):
+            reset_in = None
+        if reset_in is not None and reset_in > 0:
+            return min(config.API_RETRY_MAX_SECONDS, reset_in) + random.uniform(0, config.API_RETRY_BASE_SECONDS)
+        delay = min(config.API_RETRY_MAX_SECONDS, config.API_RETRY_BASE_SECONDS * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def get_klines(self, symbol, interval, limit=200, start=None, end=None):
         """
         Obtiene datos de velas (candlesticks) de Bybit.
         symbol: El par de trading (ej. "BTCUSDT")
         interval: La temporalidad de las velas (ej. "1", "5", "60", "D")
         limit: Número de velas a obtener (máximo 1000 por solicitud).
+        start, end: Rango opcional de start_time en milisegundos (para paginar el historial).
+        Devuelve [] si Bybit no tiene velas en el rango y None si la solicitud falló.
         """
         try:
-            response = self.session.get_kline(
-                category="linear", # Para futuros perpetuos (USD-M)
-                symbol=symbol,
-                interval=interval,
-                limit=limit
-            )
+            kline_params = {
+                "category": "linear", # Para futuros perpetuos (USD-M)
+                "symbol": symbol,
+                "interval": interval,
+                "limit": limit
+            }
+            if start is not None:
+                kline_params["start"] = int(start)
+            if end is not None:
+                kline_params["end"] = int(end)
+            response = self._call("get_kline", self.session.get_kline, priority=PRIORITY_DATA, **kline_params)
             if response and 'result' in response and 'list' in response['result']:
                 # Las klines se devuelven en orden descendente (las más nuevas primero).
                 # Las invertimos para que las más antiguas estén al principio, que es útil para análisis.
                 return response['result']['list'][::-1]
             else:
                 print(f"Error al obtener klines para {symbol} ({interval}): {response}")
-                return []
+                return None
         except Exception as e:
             print(f"Excepción en get_klines para {symbol} ({interval}): {e}")
-            return []
+            return None
 
     def place_order(self, symbol, side, qty, order_type="Market"):
         """
@@ -64,38 +166,91 @@ class BybitClient:
                 "orderType": order_type,
                 "qty": str(qty), # La cantidad debe ser un string para la API
                 "isLeverage": 1, # Generalmente 1 para futuros perpetuos (apalancamiento habilitado)
-                "timeInForce": "GTC" # Good Till Cancel (la orden permanece hasta que se ejecuta o se cancela)
+                "timeInForce": "GTC", # Good Till Cancel (la orden permanece hasta que se ejecuta o se cancela)
+                # Identificador propio: si un reintento llega después de que la orden se ejecutó,
+                # Bybit lo rechaza como duplicado en lugar de abrir una segunda orden
+                "orderLinkId": f"bot-{uuid.uuid4().hex[:28]}",
             }
-            
-            response = self.session.place_order(**order_params)
+
+            try:
+                response = self._call("place_order", self.session.place_order, priority=PRIORITY_ORDER, **order_params)
+            except Exception as e:
+                # pybit lanza InvalidRequestError con el retCode en status_code
+                if getattr(e, 'status_code', None) != DUPLICATE_ORDER_LINK_ID:
+                    raise
+                response = self._find_order_by_link_id(symbol, order_params["orderLinkId"])
             print(f"Respuesta de orden enviada: {response}")
             if response and 'result' in response and 'orderId' in response['result']:
+                # Una orden nueva cambia posición y balance: la próxima consulta debe ir a la API
+                if self.account_cache is not None:
+                    self.account_cache.invalidate()
                 return response['result'] # Retorna el ID de la orden y otros detalles
             return None
         except Exception as e:
             print(f"Excepción al enviar orden para {symbol} ({side} {qty}): {e}")
             return None
 
+    def _find_order_by_link_id(self, symbol, order_link_id):
+        # La orden ya existía: se devuelve en el mismo formato que la respuesta de place_order
+        response = self._call("get_open_orders", self.session.get_open_orders, priority=PRIORITY_ORDER,
+                              category="linear", symbol=symbol, orderLinkId=order_link_id)
+        orders = response['result']['list'] if response and response.get('retCode') == 0 else []
+        if not orders:
+            return None
+        return {'retCode': 0, 'result': {'orderId': orders[0]['orderId'], 'orderLinkId': order_link_id}}
+
+    def get_order(self, symbol, order_id):
+        """
+        Obtiene el estado de una orden (orderStatus, avgPrice, cumExecQty...).
+        Primero busca entre las órdenes en tiempo real (incluye las ejecutadas recientemente)
+        y, si no aparece, en el historial. Retorna el dict de la orden o None.
+        """
+        try:
+            response = self._call("get_open_orders", self.session.get_open_orders, priority=PRIORITY_ORDER,
+                                  category="linear", symbol=symbol, orderId=order_id)
+            orders = response['result']['list'] if response and response.get('retCode') == 0 else []
+            if not orders:
+                response = self._call("get_order_history", self.session.get_order_history, priority=PRIORITY_ORDER,
+                                      category="linear", symbol=symbol, orderId=order_id)
+                orders = response['result']['list'] if response and response.get('retCode') == 0 else []
+            return orders[0] if orders else None
+        except Exception as e: # noqa: BLE001 - como los demás métodos de consulta, un error devuelve None
+            print(f"Excepción al consultar la orden {order_id} ({symbol}): {e}")
+            return None
+
     def get_wallet_balance(self, coin="USDT"):
         """
         Obtiene el balance de la billetera para una moneda específica.
         coin: La moneda a consultar (ej. "USDT", "BTC")
         """
+        if self.account_cache is not None:
+            return self.account_cache.get_wallet_balance(coin)
+        balances = self.fetch_wallet_balances([coin])
+        return balances.get(coin, 0.0) if balances is not None else 0.0 # 0.0 si no se encuentra el balance o hay un error
+
+    def fetch_wallet_balances(self, coins):
+        """
+        Consulta a la API el balance de varias monedas en una sola solicitud.
+        Retorna {moneda: walletBalance}, o None si hubo un error.
+        """
         try:
-            response = self.session.get_wallet_balance(
+            response = self._call("get_wallet_balance", self.session.get_wallet_balance,
                 accountType="UNIFIED", # Tipo de cuenta (Unified Trading Account, SPOT, CONTRACT)
-                coin=coin
+                coin=",".join(coins)
             )
-            if response and 'result' in response and 'list' in response['result'] and len(response['result']['list']) > 0:
-                # La respuesta puede contener balances de varias cuentas. Buscamos la de 'UNIFIED' y el 'coin' específico.
+            if response and 'result' in response and 'list' in response['result']:
+                # La respuesta puede contener balances de varias cuentas. Buscamos las monedas pedidas.
+                balances = {}
                 for account in response['result']['list']:
                     for c in account['coin']:
-                        if c['coin'] == coin:
-                            return float(c['walletBalance'])
-            return 0.0 # Retorna 0.0 si no se encuentra el balance o hay un error
+                        if c['coin'] in coins:
+                            balances[c['coin']] = float(c['walletBalance'])
+                return balances
+            print(f"Error al obtener balance (Bybit API): {response}")
+            return None
         except Exception as e:
-            print(f"Excepción al obtener balance para {coin}: {e}")
-            return 0.0
+            print(f"Excepción al obtener balance para {coins}: {e}")
+            return None
 
     def get_current_position(self, symbol):
         """
@@ -104,8 +259,10 @@ class BybitClient:
         lado_de_la_posicion puede ser "Buy", "Sell" o "None".
         avg_entry_price será float o None si no hay posición.
         """
+        if self.account_cache is not None:
+            return self.account_cache.get_position(symbol)
         try:
-            response = self.session.get_positions(category="linear", symbol=symbol)
+            response = self._call("get_positions", self.session.get_positions, category="linear", symbol=symbol)
             
             if response and response['retCode'] == 0 and 'list' in response['result']:
                 positions = response['result']['list']
@@ -130,6 +287,33 @@ class BybitClient:
             return 0.0, "None", None # <-- En caso de excepción, avg_price es None
 
 
+    def fetch_all_positions(self, settle_coin="USDT"):
+        """
+        Consulta en una sola solicitud (paginada) las posiciones de todos los símbolos liquidados en 'settle_coin'.
+        Retorna {símbolo: (tamaño, lado, avg_entry_price)} solo con las posiciones abiertas, o None si hubo un error.
+        """
+        try:
+            positions = {}
+            cursor = None
+            while True:
+                params = {"category": "linear", "settleCoin": settle_coin, "limit": 200}
+                if cursor:
+                    params["cursor"] = cursor
+                response = self._call("get_positions", self.session.get_positions, **params)
+                if not response or response['retCode'] != 0 or 'list' not in response['result']:
+                    print(f"Error al obtener posiciones (Bybit API): {response}")
+                    return None
+                for position in response['result']['list']:
+                    size = float(position['size'])
+                    if size > 0:
+                        positions[position['symbol']] = (size, position['side'].capitalize(), float(position['avgPrice']))
+                cursor = response['result'].get('nextPageCursor')
+                if not cursor:
+                    return positions
+        except Exception as e: # noqa: BLE001 - como los demás métodos de consulta, un error devuelve None
+            print(f"Excepción al obtener las posiciones de {settle_coin}: {e}")
+            return None
+
     def close_position(self, symbol, current_position_side, qty):
         """
         Cierra una posición abierta.
@@ -154,4 +338,212 @@ class BybitClient:
         if close_order_side:
             print(f"Cerrando posición: Símbolo={symbol}, Lado de cierre={close_order_side}, Cantidad={qty}")
             return self.place_order(symbol, close_order_side, qty, order_type="Market")
-        return None
\ No newline at end of file
+        return None
+
+
+def build_http_session(testnet, api_key, api_secret, base_url=None):
+    """
+    Sesión de pybit para la capa de solicitudes de BybitClient: los reintentos y los límites los maneja
+    BybitClient._call (pybit solo repite una vez la solicitud rechazada por recv_window, no duerme por
+    su cuenta y devuelve los encabezados de límite de cada respuesta), y un pool de conexiones
+    keep-alive compartido por todos los hilos.
+    """
+    from pybit.unified_trading import HTTP
+    from requests.adapters import HTTPAdapter
+    session = HTTP(
+        testnet=testnet,
+        api_key=api_key,
+        api_secret=api_secret,
+        timeout=config.API_TIMEOUT_SECONDS,
+        # pybit cuenta intentos, no reintentos: con 2 repite una vez la solicitud rechazada por recv_window
+        # (10002) con 2.5 s más de ventana; los errores de red no los reintenta (force_retry=False) y el
+        # resto se reintenta en _call
+        max_retries=2,
+        retry_delay=0,
+        retry_codes={10002},
+        return_response_headers=True,
+    )
+    # pybit reenvía las respuestas con retCode en ignore_codes y, agotados sus intentos, lanza un
+    # FailedRequestError sin encabezados: los límites se cortan antes, en el hook de requests
+    session.client.hooks["response"].append(_raise_on_rate_limit)
+    base_url = base_url or config.API_BASE_URL
+    if base_url:
+        session.endpoint = base_url.rstrip('/')
+    # requests.Session guarda hasta 10 conexiones por host: con más hilos se abrirían conexiones nuevas
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=config.API_POOL_SIZE, max_retries=0)
+    session.client.mount("https://", adapter)
+    session.client.mount("http://", adapter)
+    return session
+
+
+class RateLimitedResponse(Exception):
+    """Respuesta de Bybit con retCode de límite de solicitudes (10006, 10018), con sus encabezados."""
+
+    def __init__(self, response, resp_headers):
+        self.response = response
+        self.resp_headers = resp_headers
+        self.status_code = response.get('retCode')
+        super().__init__(f"retCode {self.status_code}: {response.get('retMsg')}")
+
+
+def _raise_on_rate_limit(response, *args, **kwargs):
+    """Hook de requests.Session: lanza RateLimitedResponse si el cuerpo trae un retCode de límite."""
+    # Filtro barato sobre los bytes: solo se decodifica el JSON de las respuestas que pueden serlo
+    if response.status_code != 200 or not any(code in response.content for code in _RATE_LIMIT_CODE_BYTES):
+        return
+    try:
+        body = response.json()
+    except ValueError:
+        return
+    if isinstance(body, dict) and body.get('retCode') in RATE_LIMIT_CODES:
+        raise RateLimitedResponse(body, response.headers)
+    return
+
+
+def _classify_error(error):
+    """(reintentable, por_límite_de_solicitudes) para una excepción de la llamada a la API."""
+    if isinstance(error, RateLimitedResponse):
+        return True, True
+    import requests
+    from pybit.exceptions import FailedRequestError, InvalidRequestError
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True, False
+    if isinstance(error, FailedRequestError) and error.status_code in RETRYABLE_HTTP_STATUSES:
+        return True, error.status_code in (403, 429)
+    if isinstance(error, InvalidRequestError) and error.status_code in RATE_LIMIT_CODES:
+        return True, True
+    return False, False
+
+
+class AccountStateUnavailable(RuntimeError):
+    """Las posiciones no se pudieron consultar y las que había en caché ya no valen (se envió una orden)."""
+
+
+class AccountStateCache:
+    """
+    Caché de posiciones y balance compartida por todos los mercados del bot.
+
+    Cada actualización trae las posiciones de TODOS los símbolos con una sola solicitud y el balance
+    con otra, ambas en paralelo. Los datos se reutilizan durante 'ttl_seconds' o hasta que se envía
+    una orden (invalidate), en lugar de consultar la API por cada símbolo en cada iteración.
+
+    Las consultas se hacen fuera del lock y una sola a la vez: los hilos que llegan mientras tanto
+    esperan ese resultado. Tras invalidate los datos anteriores se descartan; si la consulta siguiente
+    falla, get_position lanza AccountStateUnavailable en lugar de devolver la posición previa a la orden.
+    """
+
+    def __init__(self, client, ttl_seconds, settle_coin="USDT", coins=("USDT",)):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.settle_coin = settle_coin
+        self.coins = list(coins)
+        self._positions = None
+        self._balances = None
+        self._fetched_at = None
+        self._generation = 0  # Aumenta con cada invalidate: una consulta anterior no puede dar datos por vigentes
+        self._refresh = None  # (generación, Future) de la consulta en curso
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="account")
+        # Contadores: aciertos/fallos de caché, solicitudes a la API y latencia por endpoint
+        self.hits = 0
+        self.misses = 0
+        self.round_trips = 0
+        self.latency = {'positions': [0, 0.0, 0.0], 'wallet': [0, 0.0, 0.0]} # [llamadas, total_s, max_s]
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._positions = None
+            self._balances = None
+            self._fetched_at = None
+
+    def update_position(self, symbol, position):
+        """Actualiza una posición conocida por otra vía (p. ej. el stream privado) sin consultar la API."""
+        with self._lock:
+            if self._positions is not None:
+                if position[0] > 0:
+                    self._positions[symbol] = position
+                else:
+                    self._positions.pop(symbol, None)
+
+    def get_position(self, symbol):
+        positions, _ = self._ensure_fresh()
+        if positions is None:
+            raise AccountStateUnavailable(f"No se pudo obtener la posición de {symbol} (Bybit API)")
+        return positions.get(symbol, (0.0, "None", None))
+
+    def get_wallet_balance(self, coin="USDT"):
+        with self._lock:
+            if coin not in self.coins:
+                self.coins.append(coin)
+                self._generation += 1
+                self._fetched_at = None
+        _, balances = self._ensure_fresh()
+        if balances is None:
+            return 0.0
+        return balances.get(coin, 0.0)
+
+    def stats(self):
+        """Resumen de los contadores: aciertos, fallos, solicitudes y latencia media/máxima (ms)."""
+        summary = {'hits': self.hits, 'misses': self.misses, 'round_trips': self.round_trips}
+        for endpoint, (calls, total, worst) in self.latency.items():
+            summary[f'{endpoint}_avg_ms'] = total / calls * 1000 if calls else 0.0
+            summary[f'{endpoint}_max_ms'] = worst * 1000
+        return summary
+
+    def _ensure_fresh(self):
+        # (posiciones, balances) para quien llama: los de la caché si están vigentes o los de la consulta
+        with self._lock:
+            if self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl_seconds:
+                self.hits += 1
+                return self._positions, self._balances
+            generation = self._generation
+            if self._refresh is not None and self._refresh[0] == generation:
+                # Otro hilo ya está consultando datos posteriores a la última orden: se espera su resultado
+                self.hits += 1
+                refresh = self._refresh[1]
+            else:
+                self.misses += 1
+                refresh = None
+                own = Future()
+                self._refresh = (generation, own)
+                coins = list(self.coins)
+        if refresh is not None:
+            return refresh.result()
+
+        fetched_at = time.monotonic()
+        positions = balances = None
+        try:
+            positions_future = self._executor.submit(self._timed, 'positions', self.client.fetch_all_positions, self.settle_coin)
+            wallet_future = self._executor.submit(self._timed, 'wallet', self.client.fetch_wallet_balances, coins)
+            positions, balances = positions_future.result(), wallet_future.result()
+        finally:
+            with self._lock:
+                if generation == self._generation:
+                    if positions is not None:
+                        self._positions = positions
+                    if balances is not None:
+                        self._balances = balances
+                    # Solo se considera vigente si ambas consultas salieron bien; si no, se reintenta en la próxima llamada
+                    self._fetched_at = fetched_at if positions is not None and balances is not None else None
+                    result = self._positions, self._balances
+                else:
+                    # Se envió una orden durante la consulta: el resultado puede ser anterior a la orden, así que
+                    # solo lo reciben quienes lo pidieron antes de ella y no queda en la caché
+                    result = positions, balances
+                if self._refresh is not None and self._refresh[1] is own:
+                    self._refresh = None
+            own.set_result(result)
+        return result
+
+    def _timed(self, endpoint, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - t0
+            counters = self.latency[endpoint]
+            counters[0] += 1
+            counters[1] += elapsed
+            counters[2] = max(counters[2], elapsed)
+            self.round_trips += 1
@@ -0,0 +1,182 @@
+# services/bybit_stream.py
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+import websocket  # websocket-client (dependencia de pybit)
+
+# Endpoints de los streams V5 de Bybit para futuros perpetuos (USD-M)
+PUBLIC_URL_MAINNET = "wss://stream.bybit.com/v5/public/linear"
+PUBLIC_URL_TESTNET = "wss://stream-testnet.bybit.com/v5/public/linear"
+PRIVATE_URL_MAINNET = "wss://stream.bybit.com/v5/private"
+PRIVATE_URL_TESTNET = "wss://stream-testnet.bybit.com/v5/private"
+
+# Bybit corta la conexión si no recibe un ping cada 20 segundos
+HEARTBEAT_SECONDS = 20
+
+# Topic de los avisos propios de BybitStream (no los envía Bybit): una conexión se abrió o se reabrió.
+# Lo que pasó mientras estuvo cortada no llega por el stream y hay que pedirlo por REST.
+CONNECTED_TOPIC = "stream.connected"
+
+
+def default_urls(testnet):
+    """Devuelve (url_publica, url_privada) según se use Testnet o producción."""
+    if testnet:
+        return PUBLIC_URL_TESTNET, PRIVATE_URL_TESTNET
+    return PUBLIC_URL_MAINNET, PRIVATE_URL_MAINNET
+
+
+class _StreamConnection:
+    """Una conexión WebSocket en un hilo propio, con heartbeat y reconexión automática."""
+
+    def __init__(self, url, topics, on_message, auth=None, on_open=None):
+        self.url = url
+        self.topics = topics
+        self.auth = auth # (api_key, api_secret) para el stream privado, None para el público
+        self._on_message = on_message
+        self._on_open = on_open # Se llama con la conexión cada vez que se abre el socket
+        self._stop = threading.Event()
+        self._ws = None
+        self._thread = None
+        self._heartbeat_stop = None # Detiene el heartbeat de la conexión actual (uno por socket)
+
+    def start(self):
+        self._ws = websocket.WebSocketApp(
+            self.url,
+            on_open=self._handle_open,
+            on_message=lambda ws, message: self._on_message(message),
+            on_error=lambda ws, error: print(f"Error en el stream {self.url}: {error}"),
+            on_close=self._handle_close,
+        )
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._stop_heartbeat()
+        if self._ws is not None:
+            self._ws.close()
+
+    def _run(self):
+        # reconnect: segundos de espera antes de reconectar si se cae la conexión
+        self._ws.run_forever(reconnect=5)
+
+    def _handle_open(self, ws):
+        print(f"Stream conectado: {self.url}")
+        if self.auth is not None:
+            api_key, api_secret = self.auth
+            expires = int((time.time() + 10) * 1000)
+            signature = hmac.new(api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+            ws.send(json.dumps({"op": "auth", "args": [api_key, expires, signature]}))
+        ws.send(json.dumps({"op": "subscribe", "args": self.topics}))
+        if self._on_open is not None:
+            self._on_open(self)
+        # Al reconectar, el heartbeat del socket anterior se detiene antes de iniciar el del nuevo
+        self._stop_heartbeat()
+        self._heartbeat_stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(ws, self._heartbeat_stop), daemon=True).start()
+
+    def _handle_close(self, ws, status_code, message):
+        self._stop_heartbeat()
+
+    def _stop_heartbeat(self):
+        if self._heartbeat_stop is not None:
+            self._heartbeat_stop.set()
+
+    def _heartbeat(self, ws, stop):
+        while not stop.wait(HEARTBEAT_SECONDS) and not self._stop.is_set():
+            try:
+                ws.send(json.dumps({"op": "ping"}))
+            except (websocket.WebSocketException, OSError):
+                return # La conexión se cerró; al reconectar se inicia un nuevo heartbeat
+
+
+class BybitStream:
+    """
+    Suscripción a los streams de Bybit (klines, posición y billetera) que entrega cada mensaje
+    en una asyncio.Queue del event loop del bot. Las conexiones corren en hilos propios,
+    así que el event loop nunca se bloquea esperando datos de red.
+
+    Cada elemento de la cola es una tupla (recibido_en, mensaje), donde recibido_en es
+    time.perf_counter() al llegar el mensaje, para medir la latencia hasta la orden.
+    Cada vez que una conexión se abre (también al reconectar) se encola un mensaje con topic
+    CONNECTED_TOPIC y 'private' (True para el stream privado).
+    """
+
+    def __init__(self, markets, public_url, private_url=None, api_key=None, api_secret=None):
+        # markets: lista de (símbolo, intervalo); todas las klines comparten una sola conexión pública
+        self.markets = list(markets)
+        self._connections = [
+            _StreamConnection(public_url, [f"kline.{interval}.{symbol}" for symbol, interval in self.markets], self._dispatch,
+                              on_open=self._connected),
+        ]
+        if private_url and api_key and api_secret:
+            self._connections.append(
+                _StreamConnection(private_url, ["position", "wallet", "order"], self._dispatch, auth=(api_key, api_secret),
+                                  on_open=self._connected)
+            )
+        self._loop = None
+        self._queue = None
+
+    def start(self, loop, queue):
+        self._loop = loop
+        self._queue = queue
+        for connection in self._connections:
+            connection.start()
+
+    def stop(self):
+        for connection in self._connections:
+            connection.stop()
+
+    def _dispatch(self, raw_message):
+        received_at = time.perf_counter()
+        try:
+            message = json.loads(raw_message)
+        except ValueError:
+            print(f"Mensaje no válido en el stream: {raw_message!r}")
+            return
+        if 'topic' not in message:
+            # Respuestas a subscribe/auth/ping: solo interesan si fallaron
+            if message.get('success') is False:
+                print(f"El stream rechazó la operación: {message}")
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (received_at, message))
+
+    def _connected(self, connection):
+        message = {'topic': CONNECTED_TOPIC, 'url': connection.url, 'private': connection.auth is not None}
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (time.perf_counter(), message))
+
+
+def parse_kline_message(message):
+    """
+    Extrae las velas de un mensaje 'kline.*' como tuplas
+    (start_time_ms, open, high, low, close, volume, turnover, confirmada).
+    """
+    return [
+        (int(k['start']), float(k['open']), float(k['high']), float(k['low']),
+         float(k['close']), float(k['volume']), float(k.get('turnover', 0.0)), bool(k['confirm']))
+        for k in message.get('data', [])
+    ]
+
+
+def parse_position_message(message, symbol):
+    """Devuelve (tamaño, lado, avg_entry_price) del símbolo con el mismo formato que get_current_position, o None."""
+    for position in message.get('data', []):
+        if position.get('symbol') != symbol:
+            continue
+        size = float(position.get('size') or 0)
+        if size > 0:
+            return size, position['side'].capitalize(), float(position['avgPrice'])
+        return 0.0, "None", None
+    return None
+
+
+def parse_wallet_message(message, coin="USDT"):
+    """Devuelve el walletBalance de 'coin' en un mensaje 'wallet', o None si no aparece."""
+    for account in message.get('data', []):
+        for c in account.get('coin', []):
+            if c.get('coin') == coin:
+                return float(c['walletBalance'])
+    return None
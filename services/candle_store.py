@@ -0,0 +1,225 @@
+# services/candle_store.py
+import os
+import time
+
+import numpy as np
+
+import config  # Para acceder a la carpeta del almacén y al tamaño del backfill inicial
+
+# Cada vela se guarda como un registro binario de tamaño fijo (56 bytes).
+# El archivo se abre con np.memmap, así que las columnas son vistas sin copia sobre el disco.
+CANDLE_DTYPE = np.dtype([
+    ('start_time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+    ('turnover', '<f8'),
+])
+
+# Duración de cada intervalo de Bybit en milisegundos.
+# Los intervalos semanales y mensuales no tienen una duración fija y no se soportan.
+INTERVAL_MS = {
+    "1": 60_000, "3": 180_000, "5": 300_000, "15": 900_000, "30": 1_800_000,
+    "60": 3_600_000, "120": 7_200_000, "240": 14_400_000, "360": 21_600_000, "720": 43_200_000,
+    "D": 86_400_000,
+}
+
+# Máximo de velas que devuelve Bybit por solicitud de get_kline
+KLINE_PAGE_LIMIT = 1000
+
+
+def interval_to_ms(interval):
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Intervalo no soportado por el almacén de velas: {interval}")
+    return INTERVAL_MS[interval]
+
+
+class Candle:
+    """Una vela suelta (p. ej. la vela en formación) como objeto compacto, sin diccionario por instancia."""
+
+    __slots__ = CANDLE_DTYPE.names
+
+    def __init__(self, start_time, open, high, low, close, volume, turnover):
+        self.start_time = start_time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.turnover = turnover
+
+    @classmethod
+    def from_record(cls, record):
+        """Crea la vela a partir de un registro de un array con CANDLE_DTYPE."""
+        return cls(*record.tolist())
+
+    def __iter__(self):
+        # Permite tuple(candle) y asignarla a un elemento de un array con CANDLE_DTYPE
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __getitem__(self, index):
+        # Mismo orden que las klines de Bybit: candle[4] es el cierre
+        return getattr(self, self.__slots__[index])
+
+    def __repr__(self):
+        return f"Candle({', '.join(f'{name}={getattr(self, name)}' for name in self.__slots__)})"
+
+
+def parse_klines(klines, out=None):
+    """
+    Convierte klines de Bybit (listas de strings, como las devuelve get_klines o en el orden descendente
+    de la respuesta cruda de la API) en un array con CANDLE_DTYPE en orden cronológico. La conversión de texto a número la hace NumPy en un solo paso,
+    sin DataFrame ni tuplas intermedias. 'out' permite reutilizar un array preasignado con al menos
+    len(klines) filas; se devuelve la vista con las filas escritas.
+    """
+    n = len(klines)
+    if out is None:
+        out = np.empty(n, dtype=CANDLE_DTYPE)
+    elif len(out) < n:
+        raise ValueError(f"El array de destino tiene {len(out)} filas y hacen falta {n}")
+    candles = out[:n]
+    if not n:
+        return candles
+    # Los timestamps en ms (< 2**53) se representan sin pérdida como float64
+    values = np.array(klines, dtype=np.float64)
+    if n > 1 and values[0, 0] > values[-1, 0]:
+        values = values[::-1]
+    for i, name in enumerate(CANDLE_DTYPE.names):
+        candles[name] = values[:, i]
+    return candles
+
+
+class CandleStore:
+    """
+    Almacén de velas cerradas en disco para un par (símbolo, intervalo), de solo anexado.
+
+    En cada sync() solo se piden a Bybit las velas posteriores a la última guardada,
+    paginando de a KLINE_PAGE_LIMIT velas si el bot estuvo detenido. La vela en formación
+    no se guarda: queda disponible en el atributo 'forming' (Candle).
+    """
+
+    def __init__(self, symbol, interval, folder=None, backfill_bars=None, clock=None):
+        """clock: función que devuelve la hora actual en segundos (time.time por defecto; el simulador usa su reloj)."""
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_ms = interval_to_ms(interval)
+        self.folder = folder or config.CANDLE_STORE_FOLDER
+        self.backfill_bars = backfill_bars if backfill_bars is not None else config.CANDLE_STORE_BACKFILL
+        self.path = os.path.join(self.folder, f"{symbol}_{interval}.candles")
+        self.clock = clock or time.time
+        self.forming = None
+        self._view = None
+        self._page = np.empty(KLINE_PAGE_LIMIT, dtype=CANDLE_DTYPE) # Se reutiliza para convertir cada página
+
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        self._repair()
+
+    def _repair(self):
+        # Si el proceso se cortó a mitad de una escritura, descartamos el registro incompleto
+        if os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+            if size % CANDLE_DTYPE.itemsize:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(size - size % CANDLE_DTYPE.itemsize)
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // CANDLE_DTYPE.itemsize
+
+    def view(self):
+        """Todas las velas guardadas como array estructurado de solo lectura (memory-mapped, sin copia)."""
+        if self._view is None or len(self._view) != len(self):
+            if len(self) == 0:
+                self._view = np.empty(0, dtype=CANDLE_DTYPE)
+            else:
+                self._view = np.memmap(self.path, dtype=CANDLE_DTYPE, mode='r')
+        return self._view
+
+    def column(self, name):
+        """Vista sin copia de una columna ('start_time', 'open', 'high', 'low', 'close', 'volume', 'turnover')."""
+        return self.view()[name]
+
+    def closes(self):
+        return self.column('close')
+
+    def start_times(self):
+        return self.column('start_time')
+
+    @property
+    def last_start_time(self):
+        view = self.view()
+        return int(view['start_time'][-1]) if len(view) else None
+
+    def append(self, rows):
+        """
+        Agrega velas cerradas (array con CANDLE_DTYPE, o tuplas/listas en ese orden, la más antigua primero).
+        Las velas que no son posteriores a la última guardada se ignoran. Devuelve cuántas se agregaron.
+        Lanza ValueError si las velas no están ordenadas o no caen en la grilla del intervalo.
+        """
+        last = self.last_start_time
+        if isinstance(rows, np.ndarray) and rows.dtype == CANDLE_DTYPE:
+            records = rows
+        elif len(rows):
+            records = np.array([tuple(r) for r in rows], dtype=CANDLE_DTYPE)
+        else:
+            records = np.empty(0, dtype=CANDLE_DTYPE)
+        if last is not None and len(records):
+            records = records[records['start_time'] > last]
+        if not len(records):
+            return 0
+        # Un hueco es válido solo si es de velas enteras (Bybit no tuvo datos): una vela fuera de la
+        # grilla o desordenada dejaría índices que ya no corresponden a start_time
+        start_times = records['start_time'] if last is None else np.concatenate(([last], records['start_time']))
+        steps = np.diff(start_times)
+        if np.any(steps <= 0) or np.any(steps % self.interval_ms) or records['start_time'][0] % self.interval_ms:
+            raise ValueError(f"Velas desordenadas o fuera de la grilla de {self.interval_ms} ms para {self.path}")
+        with open(self.path, 'ab') as f:
+            f.write(records.tobytes())
+        self._view = None
+        return len(records)
+
+    def sync(self, client, now_ms=None):
+        """
+        Descarga de Bybit las velas cerradas posteriores a la última guardada y las anexa.
+        Si el almacén está vacío, descarga las últimas 'backfill_bars' velas.
+        Devuelve la cantidad de velas nuevas; la vela en formación (la más reciente que devuelve Bybit)
+        queda en self.forming.
+        Si una página falla, se guarda lo descargado hasta ese punto y el próximo sync retoma desde ahí.
+        """
+        now_ms = now_ms if now_ms is not None else int(self.clock() * 1000)
+        last = self.last_start_time
+        initial_backfill = last is None
+        if initial_backfill:
+            start = (now_ms // self.interval_ms - self.backfill_bars) * self.interval_ms
+        else:
+            start = last + self.interval_ms
+
+        chunks = []
+        complete = True
+        while start <= now_ms:
+            end = start + (KLINE_PAGE_LIMIT - 1) * self.interval_ms
+            page = client.get_klines(self.symbol, self.interval, limit=KLINE_PAGE_LIMIT, start=start, end=end)
+            if page is None:
+                # Error de la API (no una ventana vacía): no se avanza el cursor para no dejar un hueco
+                complete = False
+                break
+            if page:
+                candles = parse_klines(page, out=self._page if len(page) <= KLINE_PAGE_LIMIT else None)
+                chunks.append(candles.copy())
+            # Las ventanas vacías (huecos en los datos de Bybit o previas al listado del par) se saltean:
+            # si el cursor no avanzara, un hueco detendría todos los sync siguientes en el mismo punto
+            start = end + self.interval_ms
+
+        if not chunks:
+            self.forming = None
+            return 0
+        candles = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        # La vela más reciente que devuelve Bybit es la que está en formación: no se decide con el reloj
+        # local, que puede estar adelantado respecto del de Bybit y guardar una vela que aún cambia.
+        # Si faltó una página no se sabe cuál es; la última recibida se vuelve a pedir en el próximo sync
+        self.forming = Candle.from_record(candles[-1]) if complete else None
+        return self.append(candles[:-1])
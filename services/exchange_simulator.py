@@ -0,0 +1,301 @@
+# services/exchange_simulator.py
+"""
+Simulador de Bybit en el mismo proceso, para correr el bot sin conexión, hacer pruebas de carga y
+reproducir días de mercado mucho más rápido que en tiempo real.
+
+SimulatedHTTPSession tiene la interfaz de pybit.unified_trading.HTTP que usa BybitClient, así que
+el bot corre sin cambios con BybitClient(session=SimulatedHTTPSession(exchange)). Las respuestas
+las produce un SimulatedExchange a partir de velas grabadas o sintéticas, según un reloj virtual
+(SimulatedClock) que solo avanza cuando lo indica quien maneja la simulación (ver simulate.py).
+"""
+import itertools
+import threading
+
+import numpy as np
+
+from services.candle_store import CANDLE_DTYPE, interval_to_ms
+
+DEFAULT_TAKER_FEE_RATE = 0.00055 # Comisión taker de Bybit en perpetuos USDT (0.055 %)
+DEFAULT_SLIPPAGE_BPS = 1.0       # Deslizamiento en contra de cada orden de mercado, en puntos básicos
+DEFAULT_LATENCY_MS = 50.0        # Demora entre el envío de la orden y su ejecución
+
+
+class SimulatedClock:
+    """Reloj virtual en milisegundos. time() tiene la misma firma que time.time."""
+
+    def __init__(self, start_ms):
+        self.now_ms = int(start_ms)
+
+    def time(self):
+        return self.now_ms / 1000
+
+    def advance(self, seconds):
+        self.now_ms += int(seconds * 1000)
+
+
+def candles_from_file(path):
+    """
+    Carga velas grabadas como array con CANDLE_DTYPE, la más antigua primero.
+    Formatos: .candles (almacén de velas), .npy (columnas de KLINE_COLUMNS) o .csv (con o sin encabezado).
+    """
+    if path.endswith('.candles'):
+        return np.array(np.memmap(path, dtype=CANDLE_DTYPE, mode='r'))
+    if path.endswith('.npy'):
+        data = np.load(path)
+    else:
+        import pandas as pd
+
+        from services.backtester import KLINE_COLUMNS
+        with open(path, 'r') as f:
+            has_header = 'close' in f.readline()
+        df = pd.read_csv(path, header=0 if has_header else None, names=None if has_header else KLINE_COLUMNS)
+        if 'turnover' not in df:
+            df['turnover'] = df['close'] * df['volume']
+        data = df[list(CANDLE_DTYPE.names)].to_numpy(dtype=np.float64)
+    candles = np.empty(len(data), dtype=CANDLE_DTYPE)
+    for i, name in enumerate(CANDLE_DTYPE.names):
+        candles[name] = data[:, i]
+    return np.sort(candles, order='start_time')
+
+
+def synthetic_candle_array(n, interval, start_price=30000.0, seed=None):
+    """n velas sintéticas (paseo aleatorio de services/fake_ws_server) como array con CANDLE_DTYPE."""
+    from services.fake_ws_server import synthetic_candles
+    rows = synthetic_candles(n, start_price=start_price, interval_ms=interval_to_ms(interval), seed=seed)
+    return np.array([(*row, row[4] * row[5]) for row in rows], dtype=CANDLE_DTYPE)
+
+
+def _intrabar_path(candle):
+    # Recorrido supuesto dentro de la vela: apertura -> mínimo -> máximo -> cierre si es alcista y
+    # apertura -> máximo -> mínimo -> cierre si es bajista (la convención habitual con datos OHLC)
+    open_price, high, low, close = float(candle['open']), float(candle['high']), float(candle['low']), float(candle['close'])
+    if close >= open_price:
+        return open_price, low, high, close
+    return open_price, high, low, close
+
+
+def _intrabar(candle, fraction):
+    """(precio, máximo, mínimo) de la vela tras transcurrir 'fraction' (0 a 1) de su duración."""
+    path = _intrabar_path(candle)
+    position = min(max(fraction, 0.0), 1.0) * 3
+    segment = min(int(position), 2)
+    price = path[segment] + (path[segment + 1] - path[segment]) * (position - segment)
+    visited = path[:segment + 1] + (price,)
+    return price, max(visited), min(visited)
+
+
+class SimulatedExchange:
+    """
+    Motor de ejecución simulado: sirve las velas conocidas hasta la hora del reloj (la vela en formación
+    solo con lo transcurrido), ejecuta órdenes de mercado y lleva posiciones netas y balance en USDT.
+
+    Las órdenes de mercado se ejecutan por completo al precio del momento envío + latency_ms,
+    con deslizamiento en contra de slippage_bps y comisión fee_rate sobre el nominal.
+    La ejecución se informa en la misma respuesta (orderStatus "Filled"), porque el reloj virtual
+    no avanza mientras el bot espera la orden.
+    """
+
+    def __init__(self, candles, clock, initial_balance=10000.0, fee_rate=DEFAULT_TAKER_FEE_RATE,
+                 slippage_bps=DEFAULT_SLIPPAGE_BPS, latency_ms=DEFAULT_LATENCY_MS, coin="USDT"):
+        # candles: {(símbolo, intervalo): array con CANDLE_DTYPE, la más antigua primero}
+        self.candles = dict(candles)
+        self.clock = clock
+        self.initial_balance = initial_balance
+        self.balance = initial_balance
+        self.fee_rate = fee_rate
+        self.slippage_bps = slippage_bps
+        self.latency_ms = latency_ms
+        self.coin = coin
+        self.positions = {} # símbolo -> (tamaño con signo, avg_entry_price)
+        self.orders = {}
+        self.fees_paid = 0.0
+        self.realized_pnl = 0.0
+        self._order_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Funciones llamadas con el dict de cada orden ejecutada (p. ej. el stream privado de services/fake_ws_server)
+        self.order_listeners = []
+        # Para los precios de ejecución se usa el intervalo más fino disponible de cada símbolo
+        self._price_markets = {}
+        for symbol, interval in sorted(self.candles, key=lambda key: interval_to_ms(key[1]), reverse=True):
+            self._price_markets[symbol] = (symbol, interval)
+
+    @property
+    def start_ms(self):
+        return min(int(data['start_time'][0]) for data in self.candles.values() if len(data))
+
+    @property
+    def end_ms(self):
+        return max(int(data['start_time'][-1]) + interval_to_ms(interval)
+                   for (_, interval), data in self.candles.items() if len(data))
+
+    def klines(self, symbol, interval, limit=200, start=None, end=None):
+        """Velas con start_time <= ahora (y dentro de [start, end]) como listas de strings, la más nueva primero."""
+        data = self.candles.get((symbol, interval))
+        if data is None:
+            return None
+        now = self.clock.now_ms
+        interval_ms = interval_to_ms(interval)
+        start_times = data['start_time']
+        hi = int(np.searchsorted(start_times, now if end is None else min(now, end), side='right'))
+        lo = 0 if start is None else int(np.searchsorted(start_times, start, side='left'))
+        lo = max(lo, hi - limit)
+        rows = []
+        for i in range(hi - 1, lo - 1, -1):
+            candle = data[i]
+            start_time = int(candle['start_time'])
+            fraction = (now - start_time) / interval_ms
+            if fraction < 1.0:
+                close, high, low = _intrabar(candle, fraction)
+                volume, turnover = candle['volume'] * fraction, candle['turnover'] * fraction
+            else:
+                close, high, low = candle['close'], candle['high'], candle['low']
+                volume, turnover = candle['volume'], candle['turnover']
+            rows.append([str(start_time), str(float(candle['open'])), str(float(high)), str(float(low)),
+                         str(float(close)), str(float(volume)), str(float(turnover))])
+        return rows
+
+    def price(self, symbol, at_ms=None):
+        """Precio de 'symbol' en at_ms (por defecto, ahora). None si no hay velas para esa hora."""
+        key = self._price_markets.get(symbol)
+        if key is None:
+            return None
+        data = self.candles[key]
+        at_ms = self.clock.now_ms if at_ms is None else at_ms
+        i = int(np.searchsorted(data['start_time'], at_ms, side='right')) - 1
+        if i < 0:
+            return None
+        candle = data[i]
+        fraction = (at_ms - int(candle['start_time'])) / interval_to_ms(key[1])
+        return _intrabar(candle, fraction)[0] if fraction < 1.0 else float(candle['close'])
+
+    def market_order(self, symbol, side, qty, order_link_id=""):
+        """Ejecuta una orden de mercado. Devuelve el dict de la orden (formato de Bybit) o lanza ValueError."""
+        if side not in ("Buy", "Sell") or qty <= 0:
+            raise ValueError(f"Orden no válida: {side} {qty}")
+        now = self.clock.now_ms
+        price = self.price(symbol, now + self.latency_ms)
+        if price is None:
+            raise ValueError(f"Sin precio para {symbol}")
+        direction = 1 if side == "Buy" else -1
+        fill_price = price * (1 + direction * self.slippage_bps / 10_000)
+        fee = qty * fill_price * self.fee_rate
+
+        with self._lock:
+            size, avg_price = self.positions.get(symbol, (0.0, None))
+            signed_qty = direction * qty
+            if size == 0 or (size > 0) == (signed_qty > 0):
+                # Abre o aumenta la posición: nuevo precio promedio de entrada
+                new_size = size + signed_qty
+                avg_price = ((abs(size) * (avg_price or 0.0)) + qty * fill_price) / abs(new_size)
+            else:
+                # Reduce, cierra o revierte: se realiza el PnL de la parte cerrada
+                closed = min(abs(size), qty)
+                pnl = (fill_price - avg_price) * closed * (1 if size > 0 else -1)
+                self.realized_pnl += pnl
+                self.balance += pnl
+                new_size = size + signed_qty
+                if abs(new_size) < 1e-12:
+                    new_size, avg_price = 0.0, None
+                elif (new_size > 0) != (size > 0):
+                    avg_price = fill_price # La parte que excede el cierre abre la posición contraria
+            self.positions[symbol] = (new_size, avg_price)
+            self.balance -= fee
+            self.fees_paid += fee
+
+            order_id = f"sim-{next(self._order_ids)}"
+            order = {
+                'orderId': order_id, 'symbol': symbol, 'side': side, 'orderType': "Market",
+                'qty': str(qty), 'orderStatus': "Filled", 'avgPrice': str(fill_price),
+                'cumExecQty': str(qty), 'cumExecFee': str(fee), 'createdTime': str(now),
+                'updatedTime': str(int(now + self.latency_ms)), 'orderLinkId': order_link_id,
+            }
+            self.orders[order_id] = order
+        for listener in self.order_listeners:
+            listener(order)
+        return order
+
+    def position(self, symbol):
+        """Posición de 'symbol' con el formato de get_positions de Bybit."""
+        size, avg_price = self.positions.get(symbol, (0.0, None))
+        return {
+            'symbol': symbol,
+            'side': "" if size == 0 else ("Buy" if size > 0 else "Sell"),
+            'size': str(abs(size)),
+            'avgPrice': str(avg_price or 0),
+        }
+
+    def summary(self):
+        unrealized = 0.0
+        for symbol, (size, avg_price) in self.positions.items():
+            price = self.price(symbol)
+            if size and price is not None:
+                unrealized += (price - avg_price) * size
+        return {
+            'orders': len(self.orders),
+            'fees_paid': self.fees_paid,
+            'realized_pnl': self.realized_pnl,
+            'balance': self.balance,
+            'unrealized_pnl': unrealized,
+            'equity': self.balance + unrealized,
+            'open_positions': {symbol: size for symbol, (size, _) in self.positions.items() if size},
+        }
+
+
+def _ok(result):
+    return {'retCode': 0, 'retMsg': "OK", 'result': result}
+
+
+def _error(message):
+    return {'retCode': 10001, 'retMsg': message, 'result': {}}
+
+
+class SimulatedHTTPSession:
+    """Los métodos de pybit.unified_trading.HTTP que usa BybitClient, respondidos por un SimulatedExchange."""
+
+    api_key = None
+    api_secret = None
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self._link_ids = {} # orderLinkId -> orderId
+
+    def get_kline(self, category, symbol, interval, limit=200, start=None, end=None):
+        rows = self.exchange.klines(symbol, interval, limit=limit, start=start, end=end)
+        if rows is None:
+            return _error(f"Sin velas simuladas para {symbol} ({interval})")
+        return _ok({'symbol': symbol, 'category': category, 'list': rows})
+
+    def place_order(self, category, symbol, side, orderType, qty, **params):
+        if orderType != "Market":
+            return _error("El simulador solo ejecuta órdenes de mercado")
+        link_id = params.get('orderLinkId') or ""
+        if link_id and link_id in self._link_ids:
+            return {'retCode': 110072, 'retMsg': "OrderLinkedID is duplicate", 'result': {}}
+        try:
+            order = self.exchange.market_order(symbol, side, float(qty), order_link_id=link_id)
+        except ValueError as e:
+            return _error(str(e))
+        if link_id:
+            self._link_ids[link_id] = order['orderId']
+        return _ok({'orderId': order['orderId'], 'orderLinkId': link_id})
+
+    def get_open_orders(self, category, symbol=None, orderId=None, **params):
+        # Como en Bybit, las órdenes ejecutadas recientemente también aparecen aquí
+        return self.get_order_history(category, symbol=symbol, orderId=orderId, **params)
+
+    def get_order_history(self, category, symbol=None, orderId=None, **params):
+        if orderId is None and params.get('orderLinkId'):
+            orderId = self._link_ids.get(params['orderLinkId'])
+        orders = [self.exchange.orders[orderId]] if orderId in self.exchange.orders else []
+        return _ok({'list': orders, 'nextPageCursor': ""})
+
+    def get_positions(self, category, symbol=None, settleCoin=None, limit=20, cursor=None):
+        if symbol is not None:
+            positions = [self.exchange.position(symbol)]
+        else:
+            positions = [self.exchange.position(s) for s, (size, _) in self.exchange.positions.items() if size]
+        return _ok({'list': positions, 'nextPageCursor': ""})
+
+    def get_wallet_balance(self, accountType, coin=None):
+        coins = [{'coin': self.exchange.coin, 'walletBalance': str(self.exchange.balance)}]
+        return _ok({'list': [{'accountType': accountType, 'coin': coins}]})
@@ -0,0 +1,259 @@
+# services/fake_rest_server.py
+"""
+Servidor HTTP local que imita la API REST V5 de Bybit para probar la capa de solicitudes de
+BybitClient (límites, reintentos, conexiones keep-alive) sin conexión.
+
+Las respuestas las produce un SimulatedExchange (services/exchange_simulator.py) con el reloj real,
+sobre velas sintéticas que siguen formándose mientras el servidor corre. Además:
+    - aplica un límite de solicitudes por endpoint y por segundo e informa su estado en los
+      encabezados X-Bapi-Limit, X-Bapi-Limit-Status y X-Bapi-Limit-Reset-Timestamp, como Bybit;
+      al superarlo responde retCode 10006
+    - inyecta fallas al azar: HTTP 429, retCode 10006 y respuestas demoradas (timeouts del cliente)
+    - con clock_skew_ms, su reloj va adelantado respecto del cliente y rechaza con retCode 10002 las
+      solicitudes firmadas cuyo timestamp queda fuera de recv_window, como Bybit
+
+Uso:
+    python -m services.fake_rest_server --port 8766 --error-rate 0.05 --timeout-rate 0.02
+y en config.py:
+    API_BASE_URL = "http://127.0.0.1:8766"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import config
+from services.candle_store import interval_to_ms
+from services.exchange_simulator import (
+    SimulatedExchange,
+    SimulatedHTTPSession,
+    synthetic_candle_array,
+)
+
+# Ruta de la API V5 -> método de SimulatedHTTPSession que la responde
+ROUTES = {
+    "/v5/market/kline": "get_kline",
+    "/v5/order/create": "place_order",
+    "/v5/order/realtime": "get_open_orders",
+    "/v5/order/history": "get_order_history",
+    "/v5/position/list": "get_positions",
+    "/v5/account/wallet-balance": "get_wallet_balance",
+}
+_INT_PARAMS = ("limit", "start", "end")
+
+
+class WallClock:
+    """Reloj real con la interfaz de SimulatedClock que usa SimulatedExchange."""
+
+    @property
+    def now_ms(self):
+        return int(time.time() * 1000)
+
+    def time(self):
+        return time.time()
+
+
+def live_candles(markets, hours_ahead=24, history=1000, seed=None):
+    """
+    Velas sintéticas para cada (símbolo, intervalo): 'history' velas hasta ahora y las de las
+    próximas 'hours_ahead' horas, que el SimulatedExchange va revelando con el reloj real.
+    """
+    candles = {}
+    for i, (symbol, interval) in enumerate(markets):
+        interval_ms = interval_to_ms(interval)
+        ahead = int(hours_ahead * 3_600_000 // interval_ms) + 1
+        data = synthetic_candle_array(history + ahead, interval, seed=None if seed is None else seed + i)
+        data['start_time'] += ahead * interval_ms # synthetic_candle_array termina en la hora actual
+        candles[(symbol, interval)] = data
+    return candles
+
+
+class FakeBybitRestServer(ThreadingHTTPServer):
+    """
+    limit_per_second: solicitudes por segundo y por endpoint antes de responder 10006.
+    error_rate / rate_limit_rate / timeout_rate: probabilidad de responder HTTP 429, retCode 10006
+    o demorar la respuesta stall_seconds (más que el timeout del cliente).
+    clock_skew_ms: milisegundos que el reloj del servidor va adelantado respecto del cliente.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, exchange, host="127.0.0.1", port=8766, limit_per_second=50, error_rate=0.0,
+                 rate_limit_rate=0.0, timeout_rate=0.0, stall_seconds=None, clock_skew_ms=0, seed=None):
+        super().__init__((host, port), _Handler)
+        self.session = SimulatedHTTPSession(exchange)
+        self.limit_per_second = limit_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.stall_seconds = stall_seconds if stall_seconds is not None else config.API_TIMEOUT_SECONDS + 1
+        self.clock_skew_ms = clock_skew_ms
+        self.stats = {"connections": 0, "requests": 0, "ok": 0, "http_429": 0, "rate_limited": 0, "stalled": 0,
+                      "recv_window": 0}
+        self._random = random.Random(seed)
+        self._windows = {} # ruta -> [segundo de la ventana, solicitudes en la ventana]
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def fault(self):
+        """Falla a inyectar en la próxima respuesta: '429', '10006', 'stall' o None."""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return "429"
+        roll -= self.error_rate
+        if roll < self.rate_limit_rate:
+            return "10006"
+        roll -= self.rate_limit_rate
+        return "stall" if roll < self.timeout_rate else None
+
+    def take_limit(self, path):
+        """Cuenta la solicitud en la ventana de un segundo del endpoint. Devuelve (restantes, reinicio en ms)."""
+        now = time.time()
+        second = int(now)
+        with self._lock:
+            window = self._windows.setdefault(path, [second, 0])
+            if window[0] != second:
+                window[:] = [second, 0]
+            window[1] += 1
+            return self.limit_per_second - window[1], (second + 1) * 1000
+
+    def start_in_thread(self):
+        thread = threading.Thread(target=self.serve_forever, name="fake-rest-server", daemon=True)
+        thread.start()
+        return thread
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Conexiones keep-alive, como Bybit
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass # Sin una línea por solicitud en la consola
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        self._handle(parts.path, dict(parse_qsl(parts.query)))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self._handle(urlsplit(self.path).path, json.loads(body) if body else {})
+
+    def _handle(self, path, params):
+        server = self.server
+        server.count("requests")
+        method = ROUTES.get(path)
+        if method is None:
+            self._send(404, {"retCode": 10001, "retMsg": f"Ruta desconocida: {path}", "result": {}})
+            return
+        if not self._timestamp_in_window():
+            server.count("recv_window")
+            self._send(200, {"retCode": 10002, "retMsg": "invalid request, please check your server timestamp "
+                                                         "or recv_window param", "result": {}})
+            return
+
+        fault = server.fault()
+        if fault == "stall":
+            server.count("stalled")
+            time.sleep(server.stall_seconds)
+        elif fault == "429":
+            server.count("http_429")
+            self._send(429, {"retCode": 10006, "retMsg": "Too many visits!", "result": {}},
+                       {"X-Bapi-Limit-Reset-Timestamp": str(int(time.time() * 1000) + 1000)})
+            return
+
+        remaining, reset_ms = server.take_limit(path)
+        headers = {
+            "X-Bapi-Limit": str(server.limit_per_second),
+            "X-Bapi-Limit-Status": str(max(remaining, 0)),
+            "X-Bapi-Limit-Reset-Timestamp": str(reset_ms),
+        }
+        if remaining < 0 or fault == "10006":
+            server.count("rate_limited")
+            self._send(200, {"retCode": 10006, "retMsg": "Too many visits!", "result": {}}, headers)
+            return
+
+        for key in _INT_PARAMS:
+            if key in params:
+                params[key] = int(params[key])
+        try:
+            response = getattr(server.session, method)(**params)
+        except TypeError as e:
+            response = {"retCode": 10001, "retMsg": str(e), "result": {}}
+        server.count("ok")
+        self._send(200, response, headers)
+
+    def _timestamp_in_window(self):
+        # Regla de Bybit para las solicitudes firmadas: hora_servidor - recv_window <= timestamp < hora_servidor + 1000
+        timestamp = self.headers.get("X-BAPI-TIMESTAMP")
+        if timestamp is None:
+            return True
+        recv_window = int(self.headers.get("X-BAPI-RECV-WINDOW") or 5000)
+        server_ms = int(time.time() * 1000) + self.server.clock_skew_ms
+        return server_ms - recv_window <= int(timestamp) < server_ms + 1000
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True # El cliente ya cortó por timeout
+
+
+def build_server(markets=None, host="127.0.0.1", port=8766, balance=10000.0, seed=None, **faults):
+    """FakeBybitRestServer sobre un SimulatedExchange con velas en vivo para 'markets' (por defecto config.MARKETS)."""
+    exchange = SimulatedExchange(live_candles(markets or config.MARKETS, seed=seed), WallClock(), initial_balance=balance)
+    return FakeBybitRestServer(exchange, host, port, seed=seed, **faults)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor REST falso de Bybit para pruebas sin conexión.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--limit-per-second", type=int, default=50, help="Solicitudes por segundo y por endpoint")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de responder HTTP 429")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probabilidad de responder retCode 10006")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Probabilidad de demorar la respuesta")
+    parser.add_argument("--stall-seconds", type=float, default=None,
+                        help="Demora de las respuestas demoradas (por defecto, API_TIMEOUT_SECONDS + 1)")
+    parser.add_argument("--clock-skew-ms", type=int, default=0, help="Adelanto del reloj del servidor (retCode 10002)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = build_server(host=args.host, port=args.port, seed=args.seed, limit_per_second=args.limit_per_second,
+                          error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                          timeout_rate=args.timeout_rate, stall_seconds=args.stall_seconds,
+                          clock_skew_ms=args.clock_skew_ms)
+    print(f"Servidor REST falso escuchando en {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Estadísticas: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
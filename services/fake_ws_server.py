@@ -0,0 +1,319 @@
+# services/fake_ws_server.py
+"""
+Servidor WebSocket local que imita los streams V5 de Bybit para probar el modo streaming sin conexión.
+
+Atiende dos rutas:
+    /v5/public/linear -> reproduce velas en cada topic 'kline.<intervalo>.<símbolo>' suscripto
+    /v5/private       -> acepta cualquier 'auth' y envía un snapshot de 'position' y 'wallet'; con un
+                         SimulatedExchange, además informa cada orden ejecutada en 'order', 'execution',
+                         'position' y 'wallet'
+
+Las velas reproducidas empiezan en el intervalo actual y siguen hacia adelante, así que siempre son
+posteriores a las que ya tiene el almacén de velas del bot.
+
+Uso:
+    python -m services.fake_ws_server --port 8765 --rest-port 8766 --seconds-per-candle 0.5
+y en config.py:
+    WS_PUBLIC_URL = "ws://127.0.0.1:8765/v5/public/linear"
+    WS_PRIVATE_URL = "ws://127.0.0.1:8765/v5/private"
+    API_BASE_URL = "http://127.0.0.1:8766"
+Con --rest-port el mismo proceso sirve la API REST (services/fake_rest_server.py) sobre el mismo
+SimulatedExchange: las velas del stream continúan las del historial REST y las órdenes se informan
+en el stream privado.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import struct
+import time
+
+from services.candle_store import interval_to_ms
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def synthetic_candles(n, start_price=30000.0, interval_ms=60_000, seed=None):
+    """Genera n velas (start_ms, open, high, low, close, volume) siguiendo un paseo aleatorio."""
+    rng = random.Random(seed)
+    start_ms = int(time.time() // 60 * 60_000) - n * interval_ms
+    candles = []
+    price = start_price
+    for i in range(n):
+        open_price = price
+        price = max(1.0, price + rng.gauss(0, start_price * 0.001))
+        high, low = max(open_price, price) * 1.0005, min(open_price, price) * 0.9995
+        candles.append((start_ms + i * interval_ms, open_price, high, low, price, rng.uniform(1, 10)))
+    return candles
+
+
+def load_candles(path):
+    """Lee velas de un CSV con columnas start_time, open, high, low, close, volume (con o sin encabezado)."""
+    import pandas as pd
+
+    from services.backtester import KLINE_COLUMNS
+    with open(path, 'r') as f:
+        has_header = 'close' in f.readline()
+    df = pd.read_csv(path, header=0 if has_header else None, names=None if has_header else KLINE_COLUMNS)
+    df = df.sort_values('start_time')
+    return list(df[['start_time', 'open', 'high', 'low', 'close', 'volume']].itertuples(index=False, name=None))
+
+
+def _kline_message(symbol, interval, interval_ms, candle, confirm):
+    start, open_price, high, low, close, volume = candle
+    return {
+        "topic": f"kline.{interval}.{symbol}",
+        "type": "snapshot",
+        "ts": int(time.time() * 1000),
+        "data": [{
+            "start": int(start), "end": int(start) + interval_ms - 1, "interval": interval,
+            "open": str(open_price), "high": str(high), "low": str(low), "close": str(close),
+            "volume": str(volume), "turnover": str(volume * close), "confirm": confirm,
+            "timestamp": int(time.time() * 1000),
+        }],
+    }
+
+
+def _order_messages(order, position, balance, coin="USDT"):
+    """Mensajes del stream privado para una orden ejecutada: {topic: mensaje}."""
+    now = int(time.time() * 1000)
+    order_data = dict(order, category="linear")
+    execution = {
+        "category": "linear", "symbol": order['symbol'], "orderId": order['orderId'],
+        "orderLinkId": order.get('orderLinkId', ""), "side": order['side'], "orderType": order['orderType'],
+        "execType": "Trade", "execPrice": order['avgPrice'], "execQty": order['cumExecQty'],
+        "execFee": order['cumExecFee'], "execTime": order['updatedTime'],
+    }
+    return {
+        "order": {"topic": "order", "creationTime": now, "data": [order_data]},
+        "execution": {"topic": "execution", "creationTime": now, "data": [execution]},
+        "position": {"topic": "position", "creationTime": now, "data": [dict(position, category="linear")]},
+        "wallet": {"topic": "wallet", "creationTime": now, "data": [
+            {"accountType": "UNIFIED", "coin": [{"coin": coin, "walletBalance": str(balance)}]}]},
+    }
+
+
+class FakeBybitWebSocketServer:
+    """
+    Servidor mínimo (RFC 6455, solo frames de texto) suficiente para el cliente de services/bybit_stream.py.
+
+    candles: velas (start_ms, open, high, low, close, volume) a reproducir: una lista para todos los topics,
+             un dict {(símbolo, intervalo): lista}, o None para velas sintéticas distintas por topic.
+             Sus start_ms se reemplazan por intervalos consecutivos a partir del actual.
+    exchange: SimulatedExchange (p. ej. el de un FakeBybitRestServer en el mismo proceso). Si tiene velas
+              del topic, se reproducen sus velas posteriores a la hora actual; sus órdenes se informan en el
+              stream privado y los snapshots de posición y balance salen de él.
+    """
+
+    def __init__(self, candles=None, host="127.0.0.1", port=8765, seconds_per_candle=1.0,
+                 balance=10000.0, exchange=None, synthetic_count=500, seed=None):
+        self.candles = candles
+        self.host = host
+        self.port = port
+        self.seconds_per_candle = seconds_per_candle
+        self.balance = balance
+        self.exchange = exchange
+        self.synthetic_count = synthetic_count
+        self.seed = seed
+        self._next_start = {} # (símbolo, intervalo) -> start_ms de la próxima vela (se retoma al reconectar)
+        self._private = {} # writer del stream privado -> topics suscriptos
+        self._server = None
+        self._loop = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self.exchange is not None:
+            self.exchange.order_listeners.append(self._on_order)
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        print(f"Servidor WebSocket falso escuchando en ws://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self.exchange is not None and self._on_order in self.exchange.order_listeners:
+            self.exchange.order_listeners.remove(self._on_order)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_client(self, reader, writer):
+        replay_tasks = []
+        try:
+            path = await self._handshake(reader, writer)
+            private = path.startswith('/v5/private')
+            if private:
+                self._private[writer] = set()
+            while True:
+                message = await self._read_message(reader, writer)
+                if message is None:
+                    break
+                request = json.loads(message)
+                op = request.get('op')
+                if op == 'ping':
+                    await self._send(writer, {"op": "pong", "success": True})
+                elif op == 'auth':
+                    await self._send(writer, {"op": "auth", "success": True})
+                elif op == 'subscribe':
+                    await self._send(writer, {"op": "subscribe", "success": True})
+                    for topic in request.get('args', []):
+                        if topic.startswith('kline.') and not private:
+                            _, interval, symbol = topic.split('.', 2)
+                            replay_tasks.append(asyncio.create_task(self._replay_klines(writer, symbol, interval)))
+                        elif private:
+                            self._private[writer].add(topic)
+                            if topic == 'position':
+                                await self._send(writer, {"topic": "position", "data": self._positions()})
+                            elif topic == 'wallet':
+                                await self._send(writer, {"topic": "wallet", "data": [
+                                    {"coin": [{"coin": "USDT", "walletBalance": str(self._balance())}]}]})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in replay_tasks:
+                task.cancel()
+            self._private.pop(writer, None)
+            writer.close()
+
+    def _positions(self):
+        if self.exchange is None:
+            return []
+        return [dict(self.exchange.position(symbol), category="linear")
+                for symbol, (size, _) in self.exchange.positions.items() if size]
+
+    def _balance(self):
+        return self.exchange.balance if self.exchange is not None else self.balance
+
+    def _topic_candles(self, symbol, interval, interval_ms, start_ms):
+        """Velas a reproducir en el topic con start_time >= start_ms (ver la documentación de la clase)."""
+        data = self.exchange.candles.get((symbol, interval)) if self.exchange is not None else None
+        if data is not None:
+            data = data[data['start_time'] >= start_ms]
+            return [(int(c['start_time']), float(c['open']), float(c['high']), float(c['low']),
+                     float(c['close']), float(c['volume'])) for c in data]
+        if isinstance(self.candles, dict):
+            candles = self.candles.get((symbol, interval))
+        else:
+            candles = self.candles
+        if candles is None:
+            seed = None if self.seed is None else self.seed + sum(map(ord, f"{symbol}.{interval}"))
+            candles = synthetic_candles(self.synthetic_count, interval_ms=interval_ms, seed=seed)
+        return [(start_ms + i * interval_ms, *candle[1:]) for i, candle in enumerate(candles)]
+
+    async def _replay_klines(self, writer, symbol, interval):
+        # Cada vela se envía primero sin confirmar (como hace Bybit mientras se forma) y luego confirmada
+        interval_ms = interval_to_ms(interval)
+        key = (symbol, interval)
+        start_ms = max(int(time.time() * 1000) // interval_ms * interval_ms, self._next_start.get(key, 0))
+        for candle in self._topic_candles(symbol, interval, interval_ms, start_ms):
+            await self._send(writer, _kline_message(symbol, interval, interval_ms, candle, False))
+            await asyncio.sleep(self.seconds_per_candle)
+            await self._send(writer, _kline_message(symbol, interval, interval_ms, candle, True))
+            self._next_start[key] = candle[0] + interval_ms
+
+    def _on_order(self, order):
+        # Lo llama el SimulatedExchange desde el hilo que ejecutó la orden (p. ej. del servidor REST)
+        messages = _order_messages(order, self.exchange.position(order['symbol']), self.exchange.balance,
+                                   self.exchange.coin)
+        asyncio.run_coroutine_threadsafe(self._push_private(messages), self._loop)
+
+    async def _push_private(self, messages):
+        for writer, topics in list(self._private.items()):
+            for topic, message in messages.items():
+                if topic in topics:
+                    try:
+                        await self._send(writer, message)
+                    except ConnectionError:
+                        break
+
+    async def _handshake(self, reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        lines = request.decode().split("\r\n")
+        path = lines[0].split(" ")[1]
+        headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + _WS_GUID).encode()).digest()).decode()
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        await writer.drain()
+        return path
+
+    async def _read_message(self, reader, writer):
+        """Lee un frame del cliente. Devuelve el texto, o None si el cliente cerró la conexión."""
+        while True:
+            first, second = await reader.readexactly(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await reader.readexactly(8))[0]
+            mask = await reader.readexactly(4) if second & 0x80 else b"\x00\x00\x00\x00"
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(await reader.readexactly(length)))
+            if opcode == 0x8: # close
+                return None
+            if opcode == 0x9: # ping -> pong
+                await self._write_frame(writer, 0xA, payload)
+                continue
+            if opcode == 0x1:
+                return payload.decode()
+
+    async def _send(self, writer, message):
+        await self._write_frame(writer, 0x1, json.dumps(message).encode())
+
+    async def _write_frame(self, writer, opcode, payload):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 1 << 16:
+            header += bytes([126]) + struct.pack("!H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack("!Q", len(payload))
+        writer.write(header + payload)
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor WebSocket falso de Bybit para pruebas sin conexión.")
+    parser.add_argument("--file", default=None, help="CSV de velas a reproducir en cada topic (por defecto, velas sintéticas)")
+    parser.add_argument("--candles", type=int, default=500, help="Cantidad de velas sintéticas por topic")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rest-port", type=int, default=None,
+                        help="Sirve también la API REST falsa en este puerto, con el mismo SimulatedExchange")
+    parser.add_argument("--markets", nargs="+", default=None, metavar="SÍMBOLO:INTERVALO",
+                        help="Mercados de la API REST falsa (por defecto, config.MARKETS)")
+    parser.add_argument("--seconds-per-candle", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    candles = load_candles(args.file) if args.file else None
+    rest_server = exchange = None
+    if args.rest_port is not None:
+        from services.fake_rest_server import build_server
+        markets = [tuple(market.split(":", 1)) for market in args.markets] if args.markets else None
+        rest_server = build_server(markets, host=args.host, port=args.rest_port, seed=args.seed)
+        exchange = rest_server.session.exchange
+        rest_server.start_in_thread()
+        print(f"Servidor REST falso escuchando en {rest_server.url}")
+    server = FakeBybitWebSocketServer(candles, args.host, args.port, args.seconds_per_candle, exchange=exchange,
+                                      synthetic_count=args.candles, seed=args.seed)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if rest_server is not None:
+            rest_server.shutdown()
+            rest_server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# services/market_scheduler.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.metrics import metrics
+
+# Espera máxima (segundos) tras errores consecutivos en un mismo mercado
+MAX_ERROR_BACKOFF_SECONDS = 300
+
+
+class SymbolState:
+    """Estado propio de cada mercado (símbolo, intervalo) que opera el bot."""
+
+    def __init__(self, symbol, interval, trade_quantity):
+        self.symbol = symbol
+        self.interval = interval
+        self.trade_quantity = trade_quantity
+        self.candle_store = None
+        self.strategy_engine = None
+        self.position = (0.0, "None", None) # (tamaño, lado, avg_entry_price) como en get_current_position
+        self.consecutive_errors = 0
+        self.next_run_at = 0.0       # time.monotonic() a partir del cual se puede ejecutar la próxima iteración
+        self.running = False
+        self.last_tick_seconds = None
+
+    @property
+    def key(self):
+        return self.symbol, self.interval
+
+
+class MarketScheduler:
+    """
+    Ejecuta la iteración de la estrategia de cada mercado en un pool de hilos, cada
+    'check_interval' segundos por mercado. Un mercado lento no demora a los demás:
+    si su iteración anterior sigue en curso simplemente no se vuelve a encolar, y los
+    errores de un mercado solo espacian sus propias iteraciones (backoff exponencial).
+    """
+
+    def __init__(self, states, tick_fn, check_interval, max_workers=None):
+        self.states = list(states)
+        self.tick_fn = tick_fn
+        self.check_interval = check_interval
+        self.max_workers = max_workers or min(32, max(1, len(self.states)))
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def run_forever(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="market") as executor:
+            while not self._stop.is_set():
+                self._wakeup.clear()
+                now = time.monotonic()
+                for state in self.states:
+                    if not state.running and now >= state.next_run_at:
+                        state.running = True
+                        executor.submit(self._run_tick, state)
+                pending = [s.next_run_at for s in self.states if not s.running]
+                timeout = max(0.0, min(pending) - time.monotonic()) if pending else self.check_interval
+                self._wakeup.wait(timeout)
+
+    def run_once(self):
+        """Ejecuta una iteración de todos los mercados en paralelo y espera a que terminen."""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="market") as executor:
+            for state in self.states:
+                state.running = True
+            list(executor.map(self._run_tick, self.states))
+
+    def _run_tick(self, state):
+        started_at = time.monotonic()
+        try:
+            self.tick_fn(state)
+            state.consecutive_errors = 0
+            state.next_run_at = started_at + self.check_interval
+        except Exception as e: # noqa: BLE001 - el error de un mercado no debe detener a los demás
+            state.consecutive_errors += 1
+            metrics.inc("bot_errors_total", stage="tick", symbol=state.symbol)
+            if state.consecutive_errors > 1:
+                metrics.inc("bot_tick_retries_total", symbol=state.symbol)
+            backoff = min(MAX_ERROR_BACKOFF_SECONDS, self.check_interval * 2 ** (state.consecutive_errors - 1))
+            state.next_run_at = time.monotonic() + backoff
+            print(f"¡Error en el mercado {state.symbol} ({state.interval})! Error: {e}. Reintentando en {backoff:.0f} segundos...")
+        finally:
+            state.last_tick_seconds = time.monotonic() - started_at
+            state.running = False
+            self._wakeup.set()
@@ -0,0 +1,189 @@
+# services/metrics.py
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config  # Para saber si las métricas están activadas
+
+# Límites superiores (en segundos) de los buckets de los histogramas de latencia
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NullTimer:
+    """Timer que no hace nada: es lo que devuelve timer() con las métricas desactivadas."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self._registry = registry
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._registry.observe(self._name, time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+class _Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+
+class Metrics:
+    """
+    Contadores e histogramas de latencia del bot, con etiquetas (p. ej. endpoint o símbolo).
+
+    Con enabled=False todas las operaciones vuelven de inmediato y timer() devuelve un
+    context manager vacío compartido, así que la instrumentación del bucle no tiene costo apreciable.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name, **labels):
+        """Context manager que registra la duración del bloque en el histograma 'name'."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self):
+        """Todas las métricas en el formato de texto de Prometheus."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h.bucket_counts), h.count, h.sum)) for key, h in self._histograms.items())
+
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), (bucket_counts, count, total) in histograms:
+            if name not in declared:
+                lines.append(f"# TYPE {name} histogram")
+                declared.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self, histogram_name="bot_stage_seconds", label="stage"):
+        """Resumen de una línea: latencia media y máxima por etapa, más los contadores de la API."""
+        with self._lock:
+            stages = sorted(
+                (dict(labels).get(label, '-'), h.count, h.sum, h.max)
+                for (name, labels), h in self._histograms.items() if name == histogram_name
+            )
+            counters = {}
+            for (name, _), value in self._counters.items():
+                counters[name] = counters.get(name, 0) + value
+        parts = [f"{stage}: n={count} avg={total / count * 1000:.1f}ms max={worst * 1000:.1f}ms"
+                 for stage, count, total, worst in stages if count]
+        parts += [f"{name}={value}" for name, value in sorted(counters.items())]
+        return "[métricas] " + (" | ".join(parts) if parts else "sin datos")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def start_http_server(registry, port, host="127.0.0.1"):
+    """Expone las métricas en http://host:port/metrics desde un hilo en segundo plano."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # Sin una línea en la consola por cada scrape
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Métricas disponibles en http://{host}:{port}/metrics")
+    return server
+
+
+def start_summary_reporter(registry, interval_seconds):
+    """Imprime registry.summary_line() cada 'interval_seconds' desde un hilo en segundo plano."""
+    stop = threading.Event()
+
+    def report():
+        while not stop.wait(interval_seconds):
+            print(registry.summary_line())
+
+    threading.Thread(target=report, name="metrics-summary", daemon=True).start()
+    return stop
+
+
+# Registro global que usan el bucle principal, el cliente de Bybit y el gestor de órdenes
+metrics = Metrics(enabled=config.METRICS_ENABLED)
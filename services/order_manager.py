@@ -0,0 +1,214 @@
+# services/order_manager.py
+import threading
+import time
+from collections import OrderedDict
+
+import config  # Para acceder al timeout de ejecución de órdenes
+from services.metrics import metrics
+
+# Estados de orden de Bybit V5 en los que la orden ya no va a cambiar
+FILLED_STATUSES = {"Filled"}
+FINAL_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"}
+# Estado propio (no de Bybit) de una orden que no llegó a un estado final en fill_timeout:
+# pudo ejecutarse o no, así que no se registra como operación
+UNKNOWN_STATUS = "Unknown"
+# Actualizaciones del stream guardadas para órdenes que submit todavía no registró
+EARLY_UPDATES_LIMIT = 256
+
+
+class OrderFill:
+    """Resultado de una orden enviada: estado final (o el último conocido) y precio real de ejecución."""
+
+    def __init__(self, order_id, symbol, side, qty, status="New", avg_price=None, filled_qty=0.0):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.qty = qty
+        self.status = status
+        self.avg_price = avg_price
+        self.filled_qty = filled_qty
+
+    @property
+    def filled(self):
+        return self.status in FILLED_STATUSES
+
+    def price_or(self, fallback):
+        """Precio de ejecución si se conoce; si no, 'fallback' (p. ej. el precio de la vela)."""
+        return self.avg_price if self.avg_price else fallback
+
+    def __repr__(self):
+        return f"OrderFill({self.order_id}, {self.symbol} {self.side} {self.qty}, {self.status}, avg_price={self.avg_price})"
+
+
+class OrderManager:
+    """
+    Ciclo de vida de las órdenes: envía la orden, guarda su orderId y espera a que se ejecute
+    antes de devolver el control, en lugar de dormir un tiempo fijo.
+
+    La ejecución se detecta por polling a la API con backoff exponencial (la primera consulta es
+    inmediata) o, si el bot recibe el stream privado 'order', en cuanto llega la actualización
+    (handle_order_message). Bybit puede enviar esa actualización antes de responder a place_order:
+    se guarda y submit la aplica al registrar la orden.
+    """
+
+    def __init__(self, client, fill_timeout=None, poll_initial=0.1, poll_max=2.0):
+        self.client = client
+        self.fill_timeout = fill_timeout if fill_timeout is not None else config.ORDER_FILL_TIMEOUT_SECONDS
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.pending = {} # orderId -> OrderFill de las órdenes que aún no llegaron a un estado final
+        self._events = {}
+        self._early = OrderedDict() # orderId -> última actualización del stream de una orden aún no registrada
+        self._lock = threading.Lock()
+
+    def submit(self, symbol, side, qty):
+        """Envía una orden de mercado y la registra como pendiente. Devuelve el OrderFill o None si fue rechazada."""
+        response = self.client.place_order(symbol, side, qty)
+        if not response or not response.get('orderId'):
+            metrics.inc("orders_total", result="rejected")
+            return None
+        fill = OrderFill(response['orderId'], symbol, side, qty)
+        with self._lock:
+            self.pending[fill.order_id] = fill
+            self._events[fill.order_id] = threading.Event()
+            early = self._early.pop(fill.order_id, None)
+        if early is not None:
+            self._apply_update(fill, early)
+        return fill
+
+    def wait_for_fill(self, fill):
+        """
+        Espera a que la orden llegue a un estado final, como máximo fill_timeout segundos.
+        Devuelve el mismo OrderFill actualizado; si se agotó el tiempo, con status UNKNOWN_STATUS
+        y ya sin seguimiento (la posición real se vuelve a consultar a la API).
+        """
+        event = self._events.get(fill.order_id)
+        started_at = time.monotonic()
+        deadline = started_at + self.fill_timeout
+        delay = self.poll_initial
+        wait = 0.0 # La primera consulta no espera: una orden de mercado suele estar ejecutada al responder
+        while fill.status not in FINAL_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"La orden {fill.order_id} ({fill.symbol}) no se ejecutó en {self.fill_timeout}s. Último estado: {fill.status}")
+                metrics.inc("orders_total", result="timeout")
+                self._forget(fill.order_id)
+                fill.status = UNKNOWN_STATUS
+                return fill
+            # Si llega la actualización por el stream, el evento despierta la espera antes del próximo polling
+            if wait and event is not None and event.wait(min(wait, remaining)):
+                continue
+            order = self.client.get_order(fill.symbol, fill.order_id)
+            if order:
+                self._apply_update(fill, order)
+            wait, delay = delay, min(delay * 2, self.poll_max)
+        self._forget(fill.order_id)
+        metrics.inc("orders_total", result=fill.status)
+        metrics.observe("order_fill_seconds", time.monotonic() - started_at)
+        return fill
+
+    def execute(self, symbol, side, qty):
+        """Envía una orden de mercado y espera su ejecución. Devuelve el OrderFill o None si fue rechazada."""
+        fill = self.submit(symbol, side, qty)
+        if fill is None:
+            return None
+        return self.wait_for_fill(fill)
+
+    def close_position(self, symbol, current_position_side, qty):
+        """Cierra la posición abierta con una orden del lado opuesto y espera su ejecución."""
+        if current_position_side not in ("Buy", "Sell"):
+            print(f"Error: Lado de posición desconocido o no válido para cerrar: {current_position_side}")
+            return None
+        close_side = "Sell" if current_position_side == "Buy" else "Buy"
+        print(f"Cerrando posición: Símbolo={symbol}, Lado de cierre={close_side}, Cantidad={qty}")
+        return self.execute(symbol, close_side, qty)
+
+    def reverse_position(self, symbol, current_position_side, current_qty, new_qty, single_order=None):
+        """
+        Revierte la posición (Long -> Short o Short -> Long). Devuelve (fill_cierre, fill_apertura).
+        single_order=True envía una sola orden por current_qty + new_qty (ambos fills son la misma orden);
+        si no, cierra, espera la ejecución del cierre y abre inmediatamente después.
+        """
+        if single_order is None:
+            single_order = config.REVERSE_IN_SINGLE_ORDER
+        new_side = "Sell" if current_position_side == "Buy" else "Buy"
+        if single_order:
+            # Redondeo para no enviar errores de punto flotante (ej. 0.0030000000000000005) a la API
+            total_qty = round(current_qty + new_qty, 8)
+            print(f"Revirtiendo posición en una sola orden: {symbol} {new_side} {total_qty}")
+            fill = self.execute(symbol, new_side, total_qty)
+            return fill, fill
+
+        close_fill = self.close_position(symbol, current_position_side, current_qty)
+        if close_fill is None or not close_fill.filled:
+            # Sin confirmación del cierre no se abre la posición contraria
+            return close_fill, None
+        return close_fill, self.execute(symbol, new_side, new_qty)
+
+    def pending_orders(self):
+        """Órdenes pendientes como tuplas (order_id, symbol, side, qty, status, avg_price, filled_qty)."""
+        with self._lock:
+            return [(f.order_id, f.symbol, f.side, f.qty, f.status, f.avg_price, f.filled_qty) for f in self.pending.values()]
+
+    def restore_pending(self, orders):
+        """Vuelve a registrar órdenes pendientes de una ejecución anterior (tuplas de pending_orders)."""
+        with self._lock:
+            for order in orders:
+                fill = OrderFill(*order)
+                self.pending[fill.order_id] = fill
+                self._events[fill.order_id] = threading.Event()
+
+    def reconcile(self):
+        """
+        Consulta una vez el estado de cada orden pendiente (p. ej. al reiniciar el bot) y olvida las que
+        ya llegaron a un estado final. Devuelve los OrderFill de esas órdenes.
+        """
+        with self._lock:
+            fills = list(self.pending.values())
+        finished = []
+        for fill in fills:
+            order = self.client.get_order(fill.symbol, fill.order_id)
+            if order:
+                self._apply_update(fill, order)
+            if fill.status in FINAL_STATUSES:
+                self._forget(fill.order_id)
+                finished.append(fill)
+        return finished
+
+    def handle_order_message(self, message):
+        """Procesa un mensaje del stream privado 'order' y despierta a quien espera esa orden."""
+        for order in message.get('data', []):
+            order_id = order.get('orderId')
+            with self._lock:
+                fill = self.pending.get(order_id)
+                event = self._events.get(order_id)
+                if fill is None and order_id:
+                    self._remember_early(order_id, order)
+            if fill is not None:
+                self._apply_update(fill, order)
+                if fill.status in FINAL_STATUSES and event is not None:
+                    event.set()
+
+    def _remember_early(self, order_id, order):
+        # Se llama con el lock tomado. Una actualización final no se reemplaza por otra anterior que llegue
+        # después; las órdenes ajenas al bot (p. ej. manuales) solo ocupan hasta EARLY_UPDATES_LIMIT entradas
+        previous = self._early.pop(order_id, None)
+        if previous is not None and previous.get('orderStatus') in FINAL_STATUSES:
+            order = previous
+        self._early[order_id] = order
+        while len(self._early) > EARLY_UPDATES_LIMIT:
+            self._early.popitem(last=False)
+
+    @staticmethod
+    def _apply_update(fill, order):
+        fill.status = order.get('orderStatus', fill.status)
+        avg_price = order.get('avgPrice')
+        if avg_price not in (None, "", "0", "0.0"):
+            fill.avg_price = float(avg_price)
+        if order.get('cumExecQty') not in (None, ""):
+            fill.filled_qty = float(order['cumExecQty'])
+
+    def _forget(self, order_id):
+        with self._lock:
+            self.pending.pop(order_id, None)
+            self._events.pop(order_id, None)
@@ -0,0 +1,111 @@
+# services/param_sweep.py
+import itertools
+import os
+import random
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from services.backtester import (
+    close_cumsum,
+    crossover_signals,
+    load_ohlcv,
+    positions_from_signals,
+    sma_from_cumsum,
+    summarize_positions,
+)
+
+# Datos abiertos (memory-mapped) por cada proceso trabajador: ruta -> (closes, cumsum)
+_worker_datasets = {}
+
+
+def build_grid(short_periods, long_periods):
+    """Todas las combinaciones (corta, larga) válidas, es decir, con la SMA corta menor que la larga."""
+    return [(s, l) for s, l in itertools.product(short_periods, long_periods) if s < l]
+
+
+def sample_grid(grid, n_samples, seed=None):
+    """Búsqueda aleatoria: toma n_samples combinaciones del grid sin repetir."""
+    if n_samples >= len(grid):
+        return list(grid)
+    return random.Random(seed).sample(grid, n_samples)
+
+
+def share_dataset(folder, key, path):
+    """
+    Carga un archivo OHLCV, calcula la suma acumulada de los cierres una sola vez y guarda
+    ambos arrays como .npy en 'folder'. Los trabajadores los abren con mmap, así que
+    todos los procesos comparten las mismas páginas en memoria sin copiar los datos.
+    """
+    _, closes = load_ohlcv(path)
+    base = os.path.join(folder, key.replace(':', '_'))
+    np.save(base + '_closes.npy', closes)
+    np.save(base + '_cumsum.npy', close_cumsum(closes))
+    return base
+
+
+def _open_shared(base):
+    if base not in _worker_datasets:
+        _worker_datasets[base] = (
+            np.load(base + '_closes.npy', mmap_mode='r'),
+            np.load(base + '_cumsum.npy', mmap_mode='r'),
+        )
+    return _worker_datasets[base]
+
+
+def evaluate_batch(base, symbol, interval, combos, quantity, initial_balance):
+    """
+    Evalúa un lote de combinaciones (corta, larga) sobre un mismo dataset compartido.
+    Todas las SMA salen de la misma suma acumulada y cada ventana se calcula una sola vez
+    por lote, aunque aparezca en varias combinaciones.
+    """
+    closes, cumsum = _open_shared(base)
+    sma_cache = {}
+    results = []
+    for short_period, long_period in combos:
+        for window in (short_period, long_period):
+            if window not in sma_cache:
+                sma_cache[window] = sma_from_cumsum(cumsum, window)
+        positions = positions_from_signals(crossover_signals(sma_cache[short_period], sma_cache[long_period]))
+        summary = summarize_positions(closes, positions, quantity, initial_balance)
+        summary.update({'symbol': symbol, 'interval': interval, 'short': short_period, 'long': long_period})
+        results.append(summary)
+    return results
+
+
+def _batches(combos, batch_size):
+    # Ordenamos por SMA corta para que cada lote reutilice al máximo las ventanas ya calculadas
+    combos = sorted(combos)
+    for i in range(0, len(combos), batch_size):
+        yield combos[i:i + batch_size]
+
+
+def run_sweep(datasets, combos, quantity, initial_balance, max_workers=None, batch_size=16, rank_by='realized_pnl'):
+    """
+    Ejecuta el backtest de cada combinación (corta, larga) sobre cada dataset en un ProcessPoolExecutor.
+    datasets: dict {(symbol, interval): ruta_al_archivo_ohlcv}
+    Devuelve un DataFrame ordenado de mejor a peor según 'rank_by'.
+    """
+    shared_folder = tempfile.mkdtemp(prefix="sma_sweep_")
+    try:
+        shared = {(symbol, interval): share_dataset(shared_folder, f"{symbol}_{interval}", path)
+                  for (symbol, interval), path in datasets.items()}
+
+        results = []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(evaluate_batch, base, symbol, interval, batch, quantity, initial_balance)
+                for (symbol, interval), base in shared.items()
+                for batch in _batches(combos, batch_size)
+            ]
+            for future in as_completed(futures):
+                results.extend(future.result())
+    finally:
+        shutil.rmtree(shared_folder, ignore_errors=True)
+
+    columns = ['symbol', 'interval', 'short', 'long', 'realized_pnl', 'closed_trades', 'win_rate', 'max_drawdown', 'final_equity']
+    table = pd.DataFrame(results, columns=columns)
+    return table.sort_values(rank_by, ascending=(rank_by == 'max_drawdown')).reset_index(drop=True)
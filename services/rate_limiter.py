@@ -0,0 +1,90 @@
+# services/rate_limiter.py
+import threading
+import time
+
+# Prioridad de cada solicitud: las órdenes pueden usar la reserva del límite, los datos de mercado no
+PRIORITY_ORDER = 0
+PRIORITY_DATA = 1
+
+
+class RateLimiter:
+    """
+    Token bucket compartido entre hilos: permite 'rate_per_second' solicitudes por segundo
+    con ráfagas de hasta 'burst' solicitudes. acquire() bloquea hasta que haya un token libre.
+
+    'reserve' (fracción entre 0 y 1) deja esa parte del límite solo para las solicitudes con
+    PRIORITY_ORDER: cerca del límite, los datos de mercado esperan y las órdenes siguen saliendo.
+    Además del bucket local, respeta lo que informa Bybit en cada respuesta (update_from_headers):
+    si a un endpoint le quedan pocas solicitudes, se espera hasta que Bybit reinicie su ventana.
+    """
+
+    def __init__(self, rate_per_second, burst=None, reserve=0.0):
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second debe ser mayor que 0")
+        if not 0 <= reserve < 1:
+            raise ValueError("reserve debe estar entre 0 y 1")
+        self.rate_per_second = float(rate_per_second)
+        self.burst = float(burst if burst is not None else rate_per_second)
+        self.reserve = reserve
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._endpoints = {} # endpoint -> [restantes, límite, time.monotonic() del reinicio]
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def _endpoint_wait(self, endpoint, priority, now):
+        # Segundos a esperar según el último estado informado por Bybit para el endpoint (0 si se puede seguir)
+        state = self._endpoints.get(endpoint)
+        if state is None:
+            return 0.0
+        remaining, limit, reset_at = state
+        if now >= reset_at:
+            del self._endpoints[endpoint]
+            return 0.0
+        floor = 0 if priority == PRIORITY_ORDER else limit * self.reserve
+        return reset_at - now if remaining <= floor else 0.0
+
+    def acquire(self, endpoint=None, priority=PRIORITY_ORDER):
+        """Toma un token, esperando lo necesario. Devuelve los segundos que se esperó."""
+        floor = 0.0 if priority == PRIORITY_ORDER else self.burst * self.reserve
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait_seconds = self._endpoint_wait(endpoint, priority, now)
+                if not wait_seconds:
+                    self._refill(now)
+                    if self._tokens - floor >= 1:
+                        self._tokens -= 1
+                        if endpoint in self._endpoints:
+                            self._endpoints[endpoint][0] -= 1
+                        return waited
+                    wait_seconds = (floor + 1 - self._tokens) / self.rate_per_second
+            time.sleep(wait_seconds)
+            waited += wait_seconds
+
+    def update_from_headers(self, endpoint, headers):
+        """
+        Sincroniza el estado del endpoint con los encabezados de la respuesta de Bybit:
+        X-Bapi-Limit-Status (solicitudes restantes), X-Bapi-Limit (límite) y
+        X-Bapi-Limit-Reset-Timestamp (ms en que se reinicia la ventana).
+        """
+        try:
+            remaining = int(headers['X-Bapi-Limit-Status'])
+            limit = int(headers.get('X-Bapi-Limit', remaining))
+            reset_ms = int(headers['X-Bapi-Limit-Reset-Timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return
+        reset_at = time.monotonic() + max(0.0, reset_ms / 1000 - time.time())
+        with self._lock:
+            self._endpoints[endpoint] = [remaining, limit, reset_at]
+
+    def block(self, endpoint, seconds):
+        """Bloquea el endpoint durante 'seconds' (p. ej. tras un 429) para todos los hilos."""
+        with self._lock:
+            state = self._endpoints.get(endpoint)
+            limit = state[1] if state else 1
+            self._endpoints[endpoint] = [0, limit, time.monotonic() + seconds]
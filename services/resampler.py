@@ -0,0 +1,150 @@
+# services/resampler.py
+"""
+Velas de temporalidades mayores (5m, 15m, 1h...) construidas a partir de las velas de la temporalidad
+base de un mercado (normalmente 1m), sin pedir más klines a Bybit.
+
+Las velas mayores se alinean a la época UTC como las de Bybit: la vela de 15m que empieza a las
+10:15 agrupa las velas de 1m de 10:15 a 10:29 (apertura de la primera, cierre de la última, máximo
+y mínimo de todas, volumen y turnover sumados).
+"""
+import numpy as np
+
+from services.candle_store import CANDLE_DTYPE, Candle, interval_to_ms
+
+
+def check_timeframe(base_interval, interval):
+    """Cantidad de velas base por vela de 'interval'; ValueError si no es un múltiplo de la base."""
+    base_ms, interval_ms = interval_to_ms(base_interval), interval_to_ms(interval)
+    if interval_ms < base_ms or interval_ms % base_ms:
+        raise ValueError(f"El intervalo {interval} no es un múltiplo del intervalo base {base_interval}")
+    return interval_ms // base_ms
+
+
+def resample(candles, interval, complete_only=False, base_interval=None):
+    """
+    Agrupa velas (array con CANDLE_DTYPE, la más antigua primero) en velas de 'interval', vectorizado.
+    Con complete_only (requiere base_interval) se descartan los grupos a los que les faltan velas base
+    (p. ej. el primero y el último de una ventana que no empieza ni termina en un límite).
+    """
+    interval_ms = interval_to_ms(interval)
+    if not len(candles):
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    buckets = candles['start_time'] // interval_ms * interval_ms
+    starts = np.concatenate(([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+    ends = np.append(starts[1:], len(candles)) - 1
+    bars = np.empty(len(starts), dtype=CANDLE_DTYPE)
+    bars['start_time'] = buckets[starts]
+    bars['open'] = candles['open'][starts]
+    bars['high'] = np.maximum.reduceat(candles['high'], starts)
+    bars['low'] = np.minimum.reduceat(candles['low'], starts)
+    bars['close'] = candles['close'][ends]
+    bars['volume'] = np.add.reduceat(candles['volume'], starts)
+    bars['turnover'] = np.add.reduceat(candles['turnover'], starts)
+    if complete_only:
+        factor = check_timeframe(base_interval, interval)
+        bars = bars[ends - starts + 1 == factor]
+    return bars
+
+
+class CandleResampler:
+    """
+    Construye de forma incremental, en O(1) por vela base, las velas de 'interval' a partir de las
+    velas cerradas de 'base_interval'.
+
+    update(candle) registra una vela base cerrada y devuelve las velas mayores que quedaron cerradas
+    (normalmente ninguna; una al llegar la última vela base del grupo). forming(candle) devuelve la
+    vela mayor en formación incluyendo la vela base en formación, sin modificar el estado.
+    Las velas (base y resultantes) se manejan en el orden de CANDLE_DTYPE: Candle, registro o lista.
+    """
+
+    def __init__(self, base_interval, interval):
+        self.base_interval = base_interval
+        self.interval = interval
+        self.factor = check_timeframe(base_interval, interval)
+        self.base_ms = interval_to_ms(base_interval)
+        self.interval_ms = interval_to_ms(interval)
+        self._bar = None # Candle del grupo en curso
+        self._joined_late = False # El grupo en curso empezó a registrarse después de su primera vela base
+        self._last_base_start = None
+
+    def reset(self):
+        self._bar = None
+        self._joined_late = False
+        self._last_base_start = None
+
+    def get_state(self):
+        """Grupo en curso (lista en el orden de CANDLE_DTYPE o None) y última vela base, como datos simples."""
+        bar = None if self._bar is None else list(np.array(tuple(self._bar), dtype=CANDLE_DTYPE).tolist())
+        return {'bar': bar, 'joined_late': self._joined_late, 'last_base_start': self._last_base_start}
+
+    def set_state(self, state):
+        """Retoma el estado de get_state()."""
+        self._bar = None if state['bar'] is None else Candle(*state['bar'])
+        self._joined_late = bool(state['joined_late'])
+        self._last_base_start = state['last_base_start']
+
+    def warm_up(self, candles):
+        """
+        Reinicia el estado con velas base cerradas (array con CANDLE_DTYPE, la más antigua primero).
+        Devuelve las velas mayores completas como array; el grupo final incompleto queda en curso.
+        """
+        self.reset()
+        if not len(candles):
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        start_times = candles['start_time']
+        last_bucket = int(start_times[-1]) // self.interval_ms * self.interval_ms
+        if int(start_times[-1]) + self.base_ms == last_bucket + self.interval_ms:
+            split = len(candles) # El último grupo ya está completo
+        else:
+            split = int(np.searchsorted(start_times, last_bucket, side='left'))
+        bars = resample(candles[:split], self.interval, complete_only=True, base_interval=self.base_interval)
+        for candle in candles[split:]:
+            self.update(candle)
+        self._last_base_start = int(start_times[-1])
+        return bars
+
+    def update(self, candle):
+        """Registra una vela base cerrada. Devuelve la lista de velas mayores cerradas (Candle)."""
+        start_time = int(candle[0])
+        if self._last_base_start is not None and start_time <= self._last_base_start:
+            return [] # Vela repetida o anterior a la última registrada
+        first = self._last_base_start is None
+        self._last_base_start = start_time
+        bucket = start_time // self.interval_ms * self.interval_ms
+        closed = []
+        bar = self._bar
+        if bar is not None and bar.start_time != bucket:
+            # Faltaron velas base al final del grupo anterior: se cierra con lo que tiene
+            if not self._joined_late:
+                closed.append(bar)
+            bar = None
+        if bar is None:
+            # Sin la primera vela base del grupo (p. ej. al empezar a mitad de un grupo) la vela
+            # resultante sería parcial: se arma igual para forming() pero no se entrega como cerrada
+            self._joined_late = first and start_time != bucket
+            bar = Candle(bucket, float(candle[1]), float(candle[2]), float(candle[3]), float(candle[4]),
+                         float(candle[5]), float(candle[6]))
+        else:
+            bar.high = max(bar.high, float(candle[2]))
+            bar.low = min(bar.low, float(candle[3]))
+            bar.close = float(candle[4])
+            bar.volume += float(candle[5])
+            bar.turnover += float(candle[6])
+        if start_time + self.base_ms == bucket + self.interval_ms:
+            if not self._joined_late:
+                closed.append(bar)
+            bar = None
+        self._bar = bar
+        return closed
+
+    def forming(self, candle=None):
+        """Vela mayor en formación: el grupo en curso más 'candle' (la vela base en formación), o None."""
+        bar = self._bar
+        if candle is None:
+            return None if bar is None else Candle(*bar)
+        bucket = int(candle[0]) // self.interval_ms * self.interval_ms
+        if bar is None or bar.start_time != bucket:
+            return Candle(bucket, float(candle[1]), float(candle[2]), float(candle[3]), float(candle[4]),
+                          float(candle[5]), float(candle[6]))
+        return Candle(bucket, bar.open, max(bar.high, float(candle[2])), min(bar.low, float(candle[3])),
+                      float(candle[4]), bar.volume + float(candle[5]), bar.turnover + float(candle[6]))
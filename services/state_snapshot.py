@@ -0,0 +1,161 @@
+# services/state_snapshot.py
+"""
+Estado del bot guardado en disco después de cada iteración, para que un proceso reiniciado (p. ej.
+tras una caída) siga operando desde su primera iteración sin volver a precargar las estrategias.
+
+El snapshot guarda, por mercado, el estado del motor de estrategias (ventana de las últimas velas y
+estado incremental de los indicadores, como datos simples de get_state(): no los objetos del motor,
+así un cambio en las clases no impide leerlo) y la última vela que registró; además, las órdenes pendientes del
+OrderManager y el archivo de log de la sesión. Las velas cerradas ya están en el CandleStore. Se escribe de forma atómica
+(archivo temporal + os.replace): un corte a mitad de la escritura deja el snapshot anterior intacto.
+El estado de un mercado guardado hace más de max_age_candles velas se descarta y se precarga de cero.
+"""
+import copy
+import os
+import pickle
+import threading
+import time
+
+import config  # Para la antigüedad máxima del estado guardado
+from services import trade_logger
+from services.candle_store import interval_to_ms
+
+SNAPSHOT_VERSION = 2
+
+
+def _strategy_names(engine):
+    return [str(strategy) for strategy in engine.strategies]
+
+
+class StateSnapshot:
+    """
+    record(candle_store, engine, order_manager) toma el estado de un mercado al final de su iteración
+    (desde el hilo que la ejecutó, así el motor no cambia mientras se serializa) y reescribe el archivo.
+    Para no demorar el event loop (modo streaming), record se divide en capture (toma el estado del motor)
+    y flush (escribe el archivo con fsync), que puede correr en otro hilo.
+    Al arrancar, restore(candle_store, engine) recupera el motor de un mercado y restore_session
+    el log y las órdenes pendientes.
+    max_age_candles: velas del intervalo del mercado tras las cuales su estado guardado se descarta
+                     (por defecto config.STATE_SNAPSHOT_MAX_AGE_CANDLES; None no lo limita).
+    """
+
+    def __init__(self, path, max_age_candles=None):
+        self.path = path
+        self.max_age_candles = max_age_candles if max_age_candles is not None else config.STATE_SNAPSHOT_MAX_AGE_CANDLES
+        self._markets = {} # (símbolo, intervalo) -> dict con el estado serializado del mercado
+        self._lock = threading.Lock()
+        self.loaded = self._load()
+
+    def _load(self):
+        """Lee el snapshot anterior. Devuelve el dict guardado, o None si no hay uno válido."""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e: # noqa: BLE001 - un pickle dañado o de otra versión puede lanzar cualquier error
+            print(f"Ignorando el snapshot de estado {self.path}: {e}")
+            return None
+        if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+            print(f"Ignorando el snapshot de estado {self.path}: versión distinta")
+            return None
+        self._markets = dict(snapshot['markets'])
+        return snapshot
+
+    def record(self, candle_store, engine, order_manager=None):
+        """Guarda el motor de estrategias del mercado de 'candle_store' y reescribe el snapshot."""
+        self.capture(candle_store, engine)
+        self.flush(order_manager)
+
+    def capture(self, candle_store, engine):
+        """Toma el estado del motor de estrategias del mercado de 'candle_store' sin escribir el archivo."""
+        entry = {
+            'strategies': _strategy_names(engine),
+            'last_start_time': candle_store.last_start_time,
+            'engine': engine.get_state(),
+            'saved_at': time.time(),
+        }
+        with self._lock:
+            self._markets[(candle_store.symbol, candle_store.interval)] = entry
+
+    def flush(self, order_manager=None):
+        """Reescribe el snapshot con el último estado capturado de cada mercado."""
+        pending_orders = order_manager.pending_orders() if order_manager is not None else []
+        with self._lock:
+            self._write(pending_orders)
+
+    def _write(self, pending_orders):
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'session_log': trade_logger.session_log_filename,
+            'pending_orders': pending_orders,
+            'markets': self._markets,
+        }
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # Sin snapshot el bot sigue operando; al reiniciar solo se precarga como antes
+            print(f"Excepción al guardar el snapshot de estado {self.path}: {e}")
+
+    def restore(self, store, engine):
+        """
+        Recupera el motor del mercado de 'store' (CandleStore ya sincronizado) si el snapshot lo tiene
+        y 'engine' (el motor recién creado según config.py) tiene las mismas estrategias: el estado
+        guardado se carga en una copia de 'engine', que queda intacto si el estado no le corresponde.
+        Las velas cerradas que el almacén guardó después del snapshot se registran en el motor.
+        Devuelve el motor restaurado, o None si hay que precargarlo.
+        """
+        entry = self._markets.get((store.symbol, store.interval))
+        if entry is None or entry['strategies'] != _strategy_names(engine):
+            return None
+        last = store.last_start_time
+        if last is None or entry['last_start_time'] is None or last < entry['last_start_time']:
+            return None # El almacén de velas no llega hasta el snapshot (p. ej. se borró): se precarga de cero
+        age = time.time() - entry['saved_at']
+        if self.max_age_candles is not None and age > self.max_age_candles * interval_to_ms(store.interval) / 1000:
+            print(f"Ignorando el estado guardado de {store.symbol} ({store.interval}): tiene {age:.0f}s, "
+                  f"más de {self.max_age_candles} velas.")
+            return None
+        restored = copy.deepcopy(engine)
+        try:
+            restored.set_state(entry['engine'])
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Ignorando el estado guardado de {store.symbol} ({store.interval}): {e}")
+            return None
+        candles = store.view()
+        missed = candles[candles['start_time'] > entry['last_start_time']]
+        for candle in missed:
+            restored.update(candle)
+        print(f"Estado de {store.symbol} ({store.interval}) restaurado del snapshot de hace {age:.0f}s "
+              f"({len(missed)} velas nuevas desde entonces).")
+        return restored
+
+    def restore_session(self, order_manager=None):
+        """
+        Retoma el log de la sesión anterior y vuelve a registrar (y consulta) sus órdenes pendientes.
+        Las que se ejecutaron mientras el bot estaba detenido se registran en el log con la acción
+        RECONCILED_ORDER: el snapshot no sabe si abrían o cerraban una posición.
+        """
+        if self.loaded is None:
+            return
+        trade_logger.resume_session(self.loaded.get('session_log'))
+        pending = self.loaded.get('pending_orders') or []
+        if order_manager is None or not pending:
+            return
+        order_manager.restore_pending(pending)
+        for fill in order_manager.reconcile():
+            print(f"Orden pendiente de la ejecución anterior: {fill}")
+            if fill.filled:
+                trade_logger.log_trade(fill.symbol, "RECONCILED_ORDER", fill.side, fill.filled_qty or fill.qty,
+                                       fill.avg_price or 0.0, order_id=fill.order_id, status="FILLED")
+        if order_manager.pending:
+            print(f"Órdenes aún pendientes de la ejecución anterior: {list(order_manager.pending)}")
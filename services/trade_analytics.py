@@ -0,0 +1,302 @@
+# services/trade_analytics.py
+"""
+Análisis de los logs de operaciones de todas las sesiones (services/trade_logger.py).
+
+JournalCache consolida los archivos trade_log_* en un único archivo columnar (.npz de NumPy, sin
+dependencias extra) con los números ya convertidos y las filas ordenadas por símbolo y timestamp,
+más un índice con el rango de filas de cada símbolo. Cada refresh() solo lee los archivos nuevos o
+modificados (según mtime y tamaño) y descarta los que ya no existen.
+
+daily_stats() y session_stats() calculan con operaciones vectorizadas el PnL realizado, el win rate,
+el drawdown máximo y la exposición por símbolo y día (o por sesión).
+"""
+import os
+
+import numpy as np
+
+from services import trade_logger
+
+DAY_MS = 86_400_000
+
+# Columnas del archivo consolidado (las de TRADE_LOG_HEADER más la sesión de origen)
+CACHE_COLUMNS = ('timestamp', 'symbol', 'action', 'side', 'quantity', 'price', 'pnl', 'balance', 'order_id', 'status', 'session')
+_FRAME_COLUMNS = dict(zip(CACHE_COLUMNS, trade_logger.TRADE_LOG_HEADER + ['Session']))
+_FLOAT_COLUMNS = ('quantity', 'price', 'pnl', 'balance')
+# Estados de las aperturas ejecutadas: 'FILLED' desde que se confirma la ejecución (services/order_manager.py)
+# y 'SUBMITTED' en los logs anteriores, que registraban la apertura al enviarse la orden
+OPEN_FILLED_STATUSES = ("FILLED", "SUBMITTED")
+
+
+def _empty_columns():
+    columns = {name: np.empty(0, dtype=str) for name in CACHE_COLUMNS}
+    columns['timestamp'] = np.empty(0, dtype=np.int64)
+    for name in _FLOAT_COLUMNS:
+        columns[name] = np.empty(0, dtype=np.float64)
+    return columns
+
+
+def _columns_from_frame(df):
+    """DataFrame de trade_logger.read_journal -> columnas de NumPy (timestamp en ms UTC, sin zona horaria)."""
+    columns = {}
+    for name, frame_column in _FRAME_COLUMNS.items():
+        values = df[frame_column]
+        if name == 'timestamp':
+            columns[name] = values.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        elif name in _FLOAT_COLUMNS:
+            columns[name] = values.to_numpy(dtype=np.float64)
+        else:
+            columns[name] = values.astype(str).to_numpy(dtype=str)
+    return columns
+
+
+def filled_mask(columns):
+    """
+    Filas de operaciones ejecutadas: aperturas con estado de OPEN_FILLED_STATUSES y cierres
+    'CLOSED <LADO>' (ver main.py). Las órdenes rechazadas, canceladas o sin confirmar no cuentan.
+    """
+    status = columns['status']
+    opens = (columns['action'] == "OPEN_POSITION") & np.isin(status, OPEN_FILLED_STATUSES)
+    return opens | np.char.startswith(status, "CLOSED")
+
+
+class JournalCache:
+    """
+    Archivo consolidado de todos los logs de operaciones de 'folder'.
+
+    columns: dict columna -> array (todas del mismo largo), ordenadas por símbolo y luego por timestamp.
+    files: {nombre de archivo: (mtime_ns, tamaño)} de los logs ya incorporados.
+    """
+
+    def __init__(self, path, folder=None):
+        self.path = path
+        self.folder = folder if folder is not None else trade_logger.LOG_FOLDER
+        self.columns = _empty_columns()
+        self.files = {}
+        self._symbols = np.empty(0, dtype=str)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._load()
+
+    def __len__(self):
+        return len(self.columns['timestamp'])
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                self.columns = {name: data[name] for name in CACHE_COLUMNS}
+                self.files = {str(name): (int(mtime), int(size))
+                              for name, mtime, size in zip(data['files'], data['files_mtime_ns'], data['files_size'])}
+        except (OSError, KeyError, ValueError) as e:
+            # Un archivo consolidado dañado o de otra versión se reconstruye desde los logs
+            print(f"Ignorando el archivo consolidado {self.path}: {e}")
+            self.columns, self.files = _empty_columns(), {}
+        self._build_index()
+
+    def _build_index(self):
+        symbols = self.columns['symbol']
+        self._symbols = np.unique(symbols)
+        self._offsets = np.searchsorted(symbols, self._symbols, side='left').astype(np.int64)
+        self._offsets = np.append(self._offsets, len(symbols))
+
+    def refresh(self, max_workers=8):
+        """
+        Incorpora los logs nuevos o modificados de la carpeta y quita los que ya no existen.
+        Devuelve {'parsed': archivos leídos, 'reused': archivos sin cambios, 'removed': archivos quitados}.
+        """
+        current = {}
+        for path in trade_logger.session_log_files(self.folder):
+            stat = os.stat(path)
+            current[os.path.basename(path)] = (stat.st_mtime_ns, stat.st_size)
+        changed = sorted(name for name, signature in current.items() if self.files.get(name) != signature)
+        removed = sorted(name for name in self.files if name not in current)
+        stats = {'parsed': len(changed), 'reused': len(current) - len(changed), 'removed': len(removed)}
+        if not changed and not removed:
+            return stats
+
+        # Las filas de los archivos modificados (p. ej. la sesión en curso) se reemplazan por completo
+        stale = {name.rsplit('.', 1)[0] for name in changed + removed}
+        keep = ~np.isin(self.columns['session'], list(stale))
+        parts = [{name: values[keep] for name, values in self.columns.items()}]
+        if changed:
+            df = trade_logger.read_journal([os.path.join(self.folder, name) for name in changed], max_workers=max_workers)
+            parts.append(_columns_from_frame(df))
+        merged = {name: np.concatenate([part[name] for part in parts]) for name in CACHE_COLUMNS}
+        order = np.lexsort((merged['timestamp'], merged['symbol']))
+        self.columns = {name: values[order] for name, values in merged.items()}
+        self.files = current
+        self._build_index()
+        self.save()
+        return stats
+
+    def save(self):
+        """Escribe el archivo consolidado de forma atómica (archivo temporal + os.replace)."""
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        names = list(self.files)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **self.columns,
+                     files=np.array(names, dtype=str),
+                     files_mtime_ns=np.array([self.files[n][0] for n in names], dtype=np.int64),
+                     files_size=np.array([self.files[n][1] for n in names], dtype=np.int64))
+        os.replace(tmp_path, self.path)
+
+    @property
+    def symbols(self):
+        return [str(symbol) for symbol in self._symbols]
+
+    def select(self, symbols=None, start=None, end=None):
+        """
+        Filas de los símbolos indicados (por defecto, todos) con start <= timestamp < end (ms),
+        usando el índice por símbolo y búsqueda binaria sobre el timestamp. Devuelve un dict de columnas.
+        """
+        ranges = []
+        for symbol in (self._symbols if symbols is None else symbols):
+            i = int(np.searchsorted(self._symbols, symbol))
+            if i == len(self._symbols) or self._symbols[i] != symbol:
+                continue
+            lo, hi = int(self._offsets[i]), int(self._offsets[i + 1])
+            timestamps = self.columns['timestamp'][lo:hi]
+            if start is not None:
+                lo += int(np.searchsorted(timestamps, start, side='left'))
+            if end is not None:
+                hi = int(self._offsets[i]) + int(np.searchsorted(timestamps, end, side='left'))
+            ranges.append(np.arange(lo, max(lo, hi)))
+        rows = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+        return {name: values[rows] for name, values in self.columns.items()}
+
+
+def _exposure(timestamps, positions, prices, day_starts, end_ms):
+    """
+    Integrales de la exposición de un símbolo entre cada día de 'day_starts' y el siguiente:
+    (nominal medio |posición| * precio de entrada, fracción del día con posición abierta).
+    La posición posterior a cada operación se mantiene hasta la siguiente, o hasta end_ms.
+    """
+    notional = np.abs(positions) * prices
+    in_market = (positions != 0).astype(np.float64)
+    breakpoints = np.append(timestamps, max(end_ms, timestamps[-1])).astype(np.float64)
+    spans = np.diff(breakpoints)
+    # Integral acumulada en cada punto de quiebre; entre ellos es lineal, así que np.interp es exacto
+    edges = np.append(day_starts, day_starts[-1] + DAY_MS).astype(np.float64)
+    results = []
+    for level in (notional, in_market):
+        cumulative = np.concatenate(([0.0], np.cumsum(level * spans)))
+        integral = np.interp(edges, breakpoints, cumulative)
+        results.append(np.diff(integral) / DAY_MS)
+    return results
+
+
+def _positions_after(actions, sides, quantities):
+    """Posición con signo después de cada operación ejecutada: las aperturas la fijan y los cierres la anulan."""
+    signed = np.where(sides == "Buy", quantities, -quantities)
+    return np.where(actions == "OPEN_POSITION", signed, 0.0)
+
+
+def daily_stats(columns, end_ms=None):
+    """
+    Métricas por símbolo y día (UTC de los timestamps del log) a partir de columnas ordenadas por
+    símbolo y timestamp (JournalCache.columns o JournalCache.select()):
+        trades, wins, win_rate y realized_pnl de los cierres ejecutados
+        max_drawdown: caída máxima del PnL realizado acumulado dentro del día (desde 0)
+        avg_exposure: nominal medio en posición durante el día; time_in_market: fracción del día con posición
+    end_ms: hasta cuándo se mantiene la última posición abierta (por defecto, la última operación del log).
+    Devuelve un DataFrame de pandas.
+    """
+    import pandas as pd
+    filled = filled_mask(columns)
+    rows = {name: values[filled] for name, values in columns.items()}
+    result_columns = ['symbol', 'day', 'trades', 'wins', 'win_rate', 'realized_pnl', 'max_drawdown', 'avg_exposure', 'time_in_market']
+    if not len(rows['timestamp']):
+        return pd.DataFrame(columns=result_columns)
+    end_ms = int(rows['timestamp'].max()) if end_ms is None else end_ms
+
+    closes = rows['action'] == "CLOSE_POSITION"
+    df = pd.DataFrame({
+        'symbol': rows['symbol'][closes],
+        'day': rows['timestamp'][closes] // DAY_MS * DAY_MS,
+        'pnl': np.nan_to_num(rows['pnl'][closes]),
+    })
+    groups = df.groupby(['symbol', 'day'], sort=False)
+    cumulative = groups['pnl'].cumsum()
+    peak = cumulative.groupby([df['symbol'], df['day']]).cummax().clip(lower=0.0)
+    df['drawdown'] = peak - cumulative
+    df['win'] = df['pnl'] > 0
+    pnl_table = df.groupby(['symbol', 'day']).agg(trades=('pnl', 'size'), wins=('win', 'sum'),
+                                                  realized_pnl=('pnl', 'sum'), max_drawdown=('drawdown', 'max'))
+
+    # Exposición: todos los días entre la primera operación del símbolo y end_ms
+    frames = []
+    symbols = rows['symbol']
+    boundaries = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+    for lo, hi in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [len(symbols)]))):
+        timestamps = rows['timestamp'][lo:hi]
+        positions = _positions_after(rows['action'][lo:hi], rows['side'][lo:hi], rows['quantity'][lo:hi])
+        day_starts = np.arange(timestamps[0] // DAY_MS * DAY_MS, max(end_ms, int(timestamps[-1])) + 1, DAY_MS)
+        avg_exposure, time_in_market = _exposure(timestamps, positions, rows['price'][lo:hi], day_starts, end_ms)
+        frames.append(pd.DataFrame({'symbol': str(symbols[lo]), 'day': day_starts,
+                                    'avg_exposure': avg_exposure, 'time_in_market': time_in_market}))
+    exposure_table = pd.concat(frames, ignore_index=True).set_index(['symbol', 'day'])
+
+    table = exposure_table.join(pnl_table, how='outer').reset_index()
+    table[['trades', 'wins']] = table[['trades', 'wins']].fillna(0).astype(int)
+    table[['realized_pnl', 'max_drawdown', 'avg_exposure', 'time_in_market']] = \
+        table[['realized_pnl', 'max_drawdown', 'avg_exposure', 'time_in_market']].fillna(0.0)
+    table = table[(table['trades'] > 0) | (table['time_in_market'] > 0)]
+    table['win_rate'] = np.where(table['trades'] > 0, table['wins'] / table['trades'].clip(lower=1), 0.0)
+    table['day'] = pd.to_datetime(table['day'], unit='ms').dt.date
+    return table[result_columns].sort_values(['day', 'symbol']).reset_index(drop=True)
+
+
+def session_stats(columns):
+    """Operaciones, cierres, win rate, PnL realizado y drawdown máximo por sesión (archivo de log) y símbolo."""
+    import pandas as pd
+    filled = filled_mask(columns)
+    df = pd.DataFrame({
+        'session': columns['session'][filled],
+        'symbol': columns['symbol'][filled],
+        'timestamp': columns['timestamp'][filled],
+        'close': columns['action'][filled] == "CLOSE_POSITION",
+        'pnl': np.nan_to_num(columns['pnl'][filled]),
+    }).sort_values(['session', 'symbol', 'timestamp'], kind='stable')
+    df['pnl'] = df['pnl'].where(df['close'], 0.0)
+    df['win'] = df['close'] & (df['pnl'] > 0)
+    cumulative = df.groupby(['session', 'symbol'])['pnl'].cumsum()
+    df['drawdown'] = cumulative.groupby([df['session'], df['symbol']]).cummax().clip(lower=0.0) - cumulative
+    table = df.groupby(['session', 'symbol']).agg(
+        operations=('pnl', 'size'), trades=('close', 'sum'), wins=('win', 'sum'),
+        realized_pnl=('pnl', 'sum'), max_drawdown=('drawdown', 'max'),
+        start=('timestamp', 'min'), end=('timestamp', 'max')).reset_index()
+    table['win_rate'] = np.where(table['trades'] > 0, table['wins'] / table['trades'].clip(lower=1), 0.0)
+    table['start'] = pd.to_datetime(table['start'], unit='ms')
+    table['end'] = pd.to_datetime(table['end'], unit='ms')
+    return table
+
+
+def load_columns(folder=None, cache_path=None, symbols=None, start=None, end=None, max_workers=8):
+    """
+    Columnas de los logs de 'folder' (opcionalmente solo 'symbols' y start <= timestamp < end, en ms),
+    ordenadas por símbolo y timestamp. Con cache_path se usa (y actualiza) un JournalCache; sin él se
+    leen todos los archivos. Devuelve (columnas, estadísticas de lectura de refresh()).
+    """
+    folder = folder if folder is not None else trade_logger.LOG_FOLDER
+    if cache_path:
+        cache = JournalCache(cache_path, folder)
+        stats = cache.refresh(max_workers=max_workers)
+        return cache.select(symbols, start, end), stats
+
+    paths = trade_logger.session_log_files(folder)
+    stats = {'parsed': len(paths), 'reused': 0, 'removed': 0}
+    if not paths:
+        return _empty_columns(), stats
+    columns = _columns_from_frame(trade_logger.read_journal(paths, max_workers=max_workers))
+    keep = np.ones(len(columns['timestamp']), dtype=bool)
+    if symbols is not None:
+        keep &= np.isin(columns['symbol'], list(symbols))
+    if start is not None:
+        keep &= columns['timestamp'] >= start
+    if end is not None:
+        keep &= columns['timestamp'] < end
+    order = np.lexsort((columns['timestamp'][keep], columns['symbol'][keep]))
+    return {name: values[keep][order] for name, values in columns.items()}, stats
@@ -1,63 +1,371 @@
+import atexit
 import csv
-from datetime import datetime
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import config  # Para acceder al formato y la política de escritura del log
 
 # Define la carpeta donde se guardarán los logs
-LOG_FOLDER = "data" 
+LOG_FOLDER = "data"
 
 # Variable global para el nombre del archivo de log de la sesión actual.
 session_log_filename = None
 
+TRADE_LOG_HEADER = ['Timestamp', 'Symbol', 'Action', 'Side', 'Quantity', 'Price', 'PNL', 'BalanceAfterTrade', 'OrderID', 'Status']
+NUMERIC_COLUMNS = ['Quantity', 'Price', 'PNL', 'BalanceAfterTrade']
+
+# Formatos de archivo soportados y su extensión. Parquet y Arrow IPC requieren pyarrow (opcional).
+JOURNAL_FORMATS = {"csv": "csv", "parquet": "parquet", "arrow": "arrow"}
+# never: el sistema operativo decide cuándo escribir a disco; batch: fsync tras cada lote;
+# interval: fsync como máximo cada TRADE_LOG_FSYNC_SECONDS (y en flush/close) mientras haya filas sin sincronizar
+FSYNC_POLICIES = ("never", "batch", "interval")
+
+# Hora que se registra en cada operación; el simulador (simulate.py) la reemplaza por su reloj virtual
+clock = datetime.now
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise ImportError("Los formatos 'parquet' y 'arrow' del log requieren pyarrow: pip install pyarrow")
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class _CsvJournalFile:
+    """Mismo CSV que generaba log_trade: encabezado y valores numéricos formateados."""
+
+    def __init__(self, path):
+        # Al retomar una sesión (resume_session) se agregan filas al final del mismo archivo
+        resuming = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'a' if resuming else 'w', newline='') # noqa: SIM115 - abierto hasta close()
+        self._writer = csv.writer(self._file)
+        if not resuming:
+            self._writer.writerow(TRADE_LOG_HEADER)
+
+    def write(self, rows):
+        self._writer.writerows([
+            [
+                timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                symbol,
+                action,
+                side,
+                # --- Formateo de los valores numéricos para mejor legibilidad ---
+                f"{quantity:.8f}" if isinstance(quantity, (int, float)) else str(quantity),
+                f"{price:.2f}" if isinstance(price, (int, float)) else str(price),
+                f"{pnl:.2f}" if isinstance(pnl, (int, float)) else str(pnl),
+                f"{balance:.2f}" if isinstance(balance, (int, float)) else str(balance),
+                order_id,
+                status,
+            ]
+            for timestamp, symbol, action, side, quantity, price, pnl, balance, order_id, status in rows
+        ])
+        self._file.flush()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+
+
+class _ArrowJournalFile:
+    """
+    Columnas tipadas (números como float64, Timestamp como timestamp) en Parquet o Arrow IPC (stream).
+
+    Parquet escribe el índice del archivo (footer) recién al cerrarlo: hasta entonces, o si el proceso
+    se corta, el archivo no se puede leer y fsync no lo hace recuperable. Arrow IPC sí conserva los
+    lotes completos tras un corte (ver read_session_log).
+    """
+
+    def __init__(self, path, fmt):
+        self._pa = _import_pyarrow()
+        pa = self._pa
+        self._schema = pa.schema(
+            [('Timestamp', pa.timestamp('ms')), ('Symbol', pa.string()), ('Action', pa.string()), ('Side', pa.string())]
+            + [(column, pa.float64()) for column in NUMERIC_COLUMNS]
+            + [('OrderID', pa.string()), ('Status', pa.string())]
+        )
+        self._file = open(path, 'wb') # noqa: SIM115 - abierto hasta close()
+        if fmt == "parquet":
+            self._writer = pa.parquet.ParquetWriter(self._file, self._schema)
+        else:
+            self._writer = pa.ipc.new_stream(self._file, self._schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        arrays = [
+            list(columns[0]), list(columns[1]), list(columns[2]), list(columns[3]),
+            *[[_to_float(v) for v in columns[i]] for i in range(4, 8)],
+            [str(v) for v in columns[8]], [str(v) for v in columns[9]],
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        self._file.flush()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._writer.close()
+        self._file.close()
+
+
+class TradeJournal:
+    """
+    Log de operaciones de la sesión escrito por un hilo propio: append() solo encola la fila,
+    así que el bucle de trading nunca espera a que se escriba el disco. Las filas se escriben
+    por lotes: un lote se escribe al llegar a batch_size filas o cuando su primera fila lleva
+    flush_seconds en memoria, aunque sigan llegando filas. Con fsync "interval", lo escrito se sincroniza
+    a más tardar fsync_seconds después (sin esperar a otro lote) y siempre en flush() y close().
+    """
+
+    _STOP = object()
+
+    def __init__(self, folder=LOG_FOLDER, fmt="csv", fsync="batch", batch_size=100, flush_seconds=1.0, fsync_seconds=5.0,
+                 path=None):
+        """path: archivo de una sesión anterior a continuar (solo CSV); por defecto se crea uno nuevo en 'folder'."""
+        if fmt not in JOURNAL_FORMATS:
+            raise ValueError(f"Formato de log no soportado: {fmt}. Opciones: {', '.join(JOURNAL_FORMATS)}")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync no soportada: {fsync}. Opciones: {', '.join(FSYNC_POLICIES)}")
+        if fmt != "csv":
+            _import_pyarrow() # Falla al crear el log, no más tarde en el hilo de escritura
+
+        self.format = fmt
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.fsync_seconds = fsync_seconds
+        if path is not None and fmt != "csv":
+            raise ValueError("Solo se puede continuar un log de operaciones en formato CSV")
+        timestamp_file_name = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.path = path or os.path.join(folder, f'trade_log_{timestamp_file_name}.{JOURNAL_FORMATS[fmt]}')
+        self.rows_written = 0
+
+        # Asegurarse de que la carpeta de logs exista
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+            print(f"DEBUG: Carpeta '{folder}/' creada para logs.")
+
+        self._queue = queue.Queue()
+        self._file = None
+        self._last_fsync = float('-inf') # time.monotonic() del último fsync
+        self._unsynced = False # Hay filas escritas sin fsync (política "interval")
+        self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, row):
+        """Encola una fila (timestamp, symbol, action, side, quantity, price, pnl, balance, order_id, status)."""
+        self._queue.put(row)
+
+    def flush(self, timeout=None):
+        """Espera a que todas las filas encoladas hasta ahora estén escritas."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Escribe lo pendiente, cierra el archivo y detiene el hilo de escritura."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        batch = []
+        batch_deadline = None
+        while True:
+            try:
+                item = self._queue.get(timeout=self._wait_seconds(batch_deadline))
+            except queue.Empty:
+                # Venció el plazo del lote en memoria o el del fsync pendiente
+                if batch_deadline is not None and time.monotonic() >= batch_deadline:
+                    self._write(batch)
+                    batch, batch_deadline = [], None
+                self._sync()
+                continue
+
+            if item is self._STOP or isinstance(item, threading.Event):
+                self._write(batch)
+                batch, batch_deadline = [], None
+                self._sync(force=True)
+                if item is self._STOP:
+                    if self._file is not None:
+                        self._file.close()
+                    return
+                item.set()
+                continue
+
+            if not batch:
+                batch_deadline = time.monotonic() + self.flush_seconds
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch, batch_deadline = [], None
+
+    def _wait_seconds(self, batch_deadline):
+        # Hasta el primer plazo pendiente: escribir el lote en memoria o sincronizar lo ya escrito
+        deadlines = [batch_deadline] if batch_deadline is not None else []
+        if self._unsynced:
+            deadlines.append(self._last_fsync + self.fsync_seconds)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def _write(self, rows):
+        if not rows:
+            return
+        try:
+            if self._file is None:
+                # El archivo se crea con la primera operación, como antes
+                resuming = os.path.exists(self.path)
+                self._file = _CsvJournalFile(self.path) if self.format == "csv" else _ArrowJournalFile(self.path, self.format)
+                if not resuming:
+                    print(f"Nuevo archivo de log creado para esta sesión: {self.path}")
+            self._file.write(rows)
+            self.rows_written += len(rows)
+        except Exception as e: # noqa: BLE001
+            # Un error de disco no debe detener el hilo ni el bot: se informa y se sigue
+            print(f"Excepción al escribir el log de operaciones {self.path}: {e}")
+            return
+        if self.fsync == "batch":
+            self._unsynced = True
+            self._sync(force=True)
+        elif self.fsync == "interval":
+            self._unsynced = True
+            self._sync()
+
+    def _sync(self, force=False):
+        """fsync de lo escrito si quedó algo sin sincronizar y pasó fsync_seconds desde el último (o si force)."""
+        if not self._unsynced or (not force and time.monotonic() - self._last_fsync < self.fsync_seconds):
+            return
+        try:
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            print(f"Excepción al sincronizar el log de operaciones {self.path}: {e}")
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+
+def get_journal(path=None):
+    """
+    Log de la sesión actual; se crea con la primera operación según la configuración de config.py.
+    path: archivo de log a continuar en lugar de crear uno nuevo (ver resume_session).
+    """
+    global _journal, session_log_filename
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = TradeJournal(
+                    folder=LOG_FOLDER,
+                    fmt=config.TRADE_LOG_FORMAT,
+                    fsync=config.TRADE_LOG_FSYNC,
+                    batch_size=config.TRADE_LOG_BATCH_SIZE,
+                    flush_seconds=config.TRADE_LOG_FLUSH_SECONDS,
+                    fsync_seconds=config.TRADE_LOG_FSYNC_SECONDS,
+                    path=path,
+                )
+                session_log_filename = _journal.path
+                atexit.register(_journal.close)
+    return _journal
+
+
+def resume_session(path):
+    """
+    Tras un reinicio, continúa el log de la sesión anterior (ver services/state_snapshot.py) en lugar
+    de abrir un archivo nuevo. Solo con logs CSV que todavía existen; devuelve True si se retomó.
+    """
+    if _journal is not None or not path or config.TRADE_LOG_FORMAT != "csv" or not path.endswith(".csv") \
+            or not os.path.exists(path):
+        return False
+    get_journal(path)
+    print(f"Continuando el log de operaciones de la sesión anterior: {path}")
+    return True
+
+
 def log_trade(symbol, action, side, quantity, price, pnl=0.0, balance_after_trade=0.0, order_id='', status=''):
     """
-    Registra la información de la operación en un archivo CSV dentro de la carpeta LOG_FOLDER.
+    Registra la información de la operación en el log de la sesión dentro de la carpeta LOG_FOLDER.
     Cada vez que el bot arranca, se genera un nuevo archivo de log con un timestamp.
-    Los valores numéricos son formateados para una mejor legibilidad.
+    La escritura ocurre en segundo plano (TradeJournal): esta función no espera al disco.
     """
-    global session_log_filename 
+    journal = get_journal()
+    journal.append((clock(), symbol, action, side, quantity, price, pnl, balance_after_trade, order_id or '', status))
+    print(f"Operación registrada en {journal.path}")
 
-    # Asegurarse de que la carpeta de logs exista
-    if not os.path.exists(LOG_FOLDER):
-        os.makedirs(LOG_FOLDER)
-        print(f"DEBUG: Carpeta '{LOG_FOLDER}/' creada para logs.")
 
-    # Genera el nombre completo del archivo de log para esta sesión si aún no se ha hecho
-    if session_log_filename is None:
-        timestamp_file_name = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        # Combina la carpeta con el nombre del archivo
-        session_log_filename = os.path.join(LOG_FOLDER, f'trade_log_{timestamp_file_name}.csv')
-        
-        # Crea el nuevo archivo y escribe el encabezado
-        with open(session_log_filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            header = ['Timestamp', 'Symbol', 'Action', 'Side', 'Quantity', 'Price', 'PNL', 'BalanceAfterTrade', 'OrderID', 'Status']
-            writer.writerow(header)
-        print(f"Nuevo archivo de log creado para esta sesión: {session_log_filename}")
-
-    # Timestamp para la entrada individual del log
-    timestamp_log_entry = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # --- Formateo de los valores numéricos para mejor legibilidad ---
-    formatted_quantity = f"{quantity:.8f}" if isinstance(quantity, (int, float)) else str(quantity)
-    formatted_price = f"{price:.2f}" if isinstance(price, (int, float)) else str(price)
-    formatted_pnl = f"{pnl:.2f}" if isinstance(pnl, (int, float)) else str(pnl)
-    formatted_balance_after_trade = f"{balance_after_trade:.2f}" if isinstance(balance_after_trade, (int, float)) else str(balance_after_trade)
-    # -------------------------------------------------------------------
-
-    # Abre el archivo en modo 'a' (append) para añadir la nueva fila de datos
-    with open(session_log_filename, 'a', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow([
-            timestamp_log_entry,
-            symbol,
-            action,
-            side,
-            formatted_quantity,
-            formatted_price,
-            formatted_pnl,
-            formatted_balance_after_trade,
-            order_id,
-            status
-        ])
+def session_log_files(folder=LOG_FOLDER):
+    """Archivos de log de todas las sesiones (CSV, Parquet y Arrow), ordenados por nombre (= fecha)."""
+    if not os.path.exists(folder):
+        return []
+    extensions = tuple(f".{ext}" for ext in JOURNAL_FORMATS.values())
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.startswith('trade_log_') and name.endswith(extensions)
+    )
+
+
+def read_session_log(path):
+    """Lee un archivo de log como DataFrame con Timestamp como fecha y las columnas numéricas como float."""
+    import pandas as pd
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.arrow'):
+        pa = _import_pyarrow()
+        batches = []
+        with open(path, 'rb') as f:
+            reader = pa.ipc.open_stream(f)
+            while True:
+                try:
+                    batches.append(reader.read_next_batch())
+                except StopIteration:
+                    break
+                except pa.ArrowInvalid:
+                    break # Sesión interrumpida: se conservan los lotes completos
+        return pa.Table.from_batches(batches, schema=reader.schema).to_pandas()
+    df = pd.read_csv(path, dtype={'OrderID': str, 'Status': str}, keep_default_na=False, na_values={c: [''] for c in NUMERIC_COLUMNS})
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], format="%Y-%m-%d %H:%M:%S")
+    for column in NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+
+def read_journal(paths=None, max_workers=8):
+    """
+    Carga muchos archivos de log (por defecto, todas las sesiones de LOG_FOLDER) en un solo DataFrame.
+    Los archivos se leen en paralelo y cada fila indica la sesión de la que proviene.
+    Los archivos que no se pueden leer (p. ej. un Parquet sin cerrar, ver _ArrowJournalFile) se
+    omiten con un aviso en lugar de impedir el análisis de las demás sesiones.
+    """
+    import pandas as pd
+    paths = session_log_files() if paths is None else list(paths)
+
+    def read_with_session(path):
+        try:
+            df = read_session_log(path)
+        except (OSError, ValueError) as e:
+            print(f"Aviso: se omite el log {path}, no se pudo leer: {e}")
+            return None
+        df['Session'] = os.path.basename(path).rsplit('.', 1)[0]
+        return df
 
-    print(f"Operación registrada en {session_log_filename}")
\ No newline at end of file
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = [df for df in executor.map(read_with_session, paths) if df is not None]
+    if not frames:
+        return pd.DataFrame(columns=TRADE_LOG_HEADER + ['Session'])
+    return pd.concat(frames, ignore_index=True)
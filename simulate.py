@@ -0,0 +1,122 @@
+# simulate.py
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import config  # Para acceder a los parámetros de configuración
+import main  # El bucle del bot (run_symbol_tick) corre sin cambios contra el simulador
+from services import trade_logger
+from services.bybit_client import BybitClient
+from services.candle_store import CandleStore, interval_to_ms
+from services.exchange_simulator import (
+    DEFAULT_LATENCY_MS,
+    DEFAULT_SLIPPAGE_BPS,
+    DEFAULT_TAKER_FEE_RATE,
+    SimulatedClock,
+    SimulatedExchange,
+    SimulatedHTTPSession,
+    candles_from_file,
+    synthetic_candle_array,
+)
+from services.market_scheduler import MarketScheduler, SymbolState
+from services.order_manager import OrderManager
+from sweep import parse_dataset
+
+
+def run_simulation(exchange, states, check_interval, warm_up_bars, speed=None, max_workers=None, verbose=False):
+    """
+    Ejecuta el bucle del bot contra el simulador: cada check_interval segundos del reloj virtual, una
+    vuelta de todos los mercados con MarketScheduler.run_once y run_symbol_tick de main.py.
+    La simulación empieza warm_up_bars velas después de la primera vela (para precargar las
+    estrategias) y termina con la última. speed: None = lo más rápido posible; N = N segundos
+    simulados por segundo real. Devuelve (vueltas, segundos reales).
+    """
+    clock = exchange.clock
+    interval_ms = max(interval_to_ms(state.interval) for state in states)
+    clock.now_ms = exchange.start_ms + warm_up_bars * interval_ms
+    end_ms = exchange.end_ms
+
+    folder = tempfile.mkdtemp(prefix="sim_candles_")
+    previous_clock = trade_logger.clock
+    trade_logger.clock = lambda: datetime.fromtimestamp(clock.time())
+    try:
+        # Sin límite de solicitudes ni caché de cuenta: ambos miden tiempo real, no el del reloj virtual
+        client = BybitClient(session=SimulatedHTTPSession(exchange))
+        order_manager = OrderManager(client, poll_initial=0)
+        for state in states:
+            state.candle_store = CandleStore(state.symbol, state.interval, folder=folder,
+                                             backfill_bars=warm_up_bars, clock=clock.time)
+        scheduler = MarketScheduler(states, lambda state: main.run_symbol_tick(client, order_manager, state),
+                                    check_interval, max_workers=max_workers)
+
+        rounds = 0
+        started = time.perf_counter()
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            while clock.now_ms < end_ms:
+                scheduler.run_once()
+                rounds += 1
+                clock.advance(check_interval)
+                if speed:
+                    time.sleep(check_interval / speed)
+            if trade_logger._journal is not None:
+                trade_logger._journal.flush()
+        return rounds, time.perf_counter() - started
+    finally:
+        trade_logger.clock = previous_clock
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main_simulation():
+    parser = argparse.ArgumentParser(description="Corre el bot sin conexión contra un Bybit simulado, más rápido que en tiempo real.")
+    parser.add_argument("--data", action="append", default=[],
+                        help="Velas grabadas como SYMBOL:INTERVAL=archivo (.candles, .npy o .csv). Se puede repetir.")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Sin --data: cantidad de velas sintéticas por mercado de config.MARKETS")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--check-interval", type=float, default=config.CHECK_INTERVAL_SECONDS,
+                        help="Segundos simulados entre vueltas del bucle")
+    parser.add_argument("--warm-up-bars", type=int, default=200, help="Velas previas al inicio para precargar las estrategias")
+    parser.add_argument("--speed", type=float, default=None, help="Segundos simulados por segundo real (por defecto, sin esperas)")
+    parser.add_argument("--balance", type=float, default=config.BACKTEST_INITIAL_BALANCE, help="Balance inicial (USDT)")
+    parser.add_argument("--fee-rate", type=float, default=DEFAULT_TAKER_FEE_RATE)
+    parser.add_argument("--slippage-bps", type=float, default=DEFAULT_SLIPPAGE_BPS)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    parser.add_argument("--log-folder", default="data/simulations", help="Carpeta del log de operaciones de la simulación")
+    parser.add_argument("--verbose", action="store_true", help="Muestra la salida del bot")
+    args = parser.parse_args()
+
+    if args.data:
+        candles = {market: candles_from_file(path) for market, path in map(parse_dataset, args.data)}
+    else:
+        n = args.synthetic or args.warm_up_bars + 1440
+        candles = {(symbol, interval): synthetic_candle_array(n, interval, seed=None if args.seed is None else args.seed + i)
+                   for i, (symbol, interval) in enumerate(config.MARKETS)}
+
+    clock = SimulatedClock(0)
+    exchange = SimulatedExchange(candles, clock, initial_balance=args.balance, fee_rate=args.fee_rate,
+                                 slippage_bps=args.slippage_bps, latency_ms=args.latency_ms)
+    states = [SymbolState(symbol, interval, config.TRADE_QUANTITIES.get(symbol, config.TRADE_QUANTITY))
+              for symbol, interval in candles]
+    trade_logger.LOG_FOLDER = args.log_folder
+
+    rounds, elapsed = run_simulation(exchange, states, args.check_interval, args.warm_up_bars,
+                                     speed=args.speed, verbose=args.verbose)
+
+    simulated = rounds * args.check_interval
+    summary = exchange.summary()
+    print(f"Mercados: {', '.join(f'{s.symbol} ({s.interval})' for s in states)}")
+    print(f"Vueltas del bucle: {rounds} ({simulated / 3600:.1f} h simuladas en {elapsed:.2f} s, "
+          f"{simulated / elapsed if elapsed else float('inf'):.0f}x tiempo real)")
+    print(f"Órdenes: {summary['orders']}, Comisiones: {summary['fees_paid']:.2f}, PnL realizado: {summary['realized_pnl']:.2f}")
+    print(f"Balance final: {summary['balance']:.2f}, Equity: {summary['equity']:.2f}, Posiciones abiertas: {summary['open_positions']}")
+    if trade_logger.session_log_filename:
+        print(f"Operaciones guardadas en {trade_logger.session_log_filename}")
+
+
+if __name__ == "__main__":
+    main_simulation()
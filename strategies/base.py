@@ -0,0 +1,288 @@
+# strategies/base.py
+import importlib
+from typing import ClassVar
+
+import numpy as np
+
+from services.candle_store import CANDLE_DTYPE
+from services.resampler import CandleResampler
+from strategies.indicators import IndicatorCache
+
+# Códigos de las señales en la evaluación por lotes (los mismos que usa services/backtester.py)
+SIGNAL_CODES = {"BUY": 1, "SELL": -1, "HOLD": 0}
+CODE_SIGNALS = {1: "BUY", -1: "SELL", 0: "HOLD"}
+
+# Módulos con las estrategias incluidas: se importan (y se registran) al pedir el registro
+BUILTIN_STRATEGY_MODULES = ("strategies.simple_ma_strategy", "strategies.rsi_strategy")
+
+_registry = {}
+
+
+def register_strategy(name):
+    """Decorador que registra una subclase de Strategy con el nombre que se usa en config.STRATEGIES."""
+    def decorator(cls):
+        if name in _registry and _registry[name] is not cls:
+            raise ValueError(f"Ya hay una estrategia registrada con el nombre '{name}'")
+        cls.name = name
+        _registry[name] = cls
+        return cls
+    return decorator
+
+
+def _load_builtin_strategies():
+    for module in BUILTIN_STRATEGY_MODULES:
+        importlib.import_module(module)
+
+
+def available_strategies():
+    _load_builtin_strategies()
+    return sorted(_registry)
+
+
+def create_strategy(name, **params):
+    """Instancia la estrategia registrada como 'name' con sus propios parámetros."""
+    _load_builtin_strategies()
+    if name not in _registry:
+        raise ValueError(f"Estrategia desconocida: {name}. Opciones: {', '.join(sorted(_registry))}")
+    return _registry[name](**params)
+
+
+def candle_close(candle):
+    """Cierre de una vela (registro o tupla en el orden de CANDLE_DTYPE) o el propio número si ya es un cierre."""
+    if isinstance(candle, (int, float, np.number)):
+        return float(candle)
+    return float(candle[4])
+
+
+class Strategy:
+    """
+    Base de las estrategias. Cada instancia tiene sus propios parámetros (PARAMS son los valores por defecto).
+
+    Evaluación por lotes:
+        - signals(candles, indicators): código de señal (1 BUY, -1 SELL, 0 HOLD/WAIT) para cada vela
+          de un array con CANDLE_DTYPE, vectorizado con NumPy (backtests, búsquedas de parámetros).
+    Evaluación incremental (bucle en vivo):
+        - update(candle, indicators): registra una vela CERRADA y devuelve la señal en esa vela.
+        - evaluate(candle, indicators): señal con 'candle' como vela más reciente (p. ej. la vela
+          en formación) sin modificar el estado.
+    Por defecto update/evaluate toman la última señal de signals() sobre la ventana de 'indicators';
+    las estrategias con estado propio (como SMACrossoverEngine) los redefinen en O(1).
+    """
+
+    name = None
+    PARAMS: ClassVar[dict] = {}
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.PARAMS)
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos para la estrategia {self.name}: {', '.join(sorted(unknown))}")
+        self.params = dict(self.PARAMS)
+        self.params.update((key, value) for key, value in params.items() if value is not None)
+
+    @property
+    def lookback(self):
+        """Cantidad de velas que necesita la estrategia para dar una señal distinta de WAIT."""
+        raise NotImplementedError
+
+    def signals(self, candles, indicators=None):
+        raise NotImplementedError
+
+    def signal(self, candles, indicators=None):
+        """Señal (BUY, SELL, HOLD o WAIT) en la última vela de 'candles'."""
+        if len(candles) < self.lookback:
+            return "WAIT"
+        return CODE_SIGNALS[int(self.signals(candles, indicators)[-1])]
+
+    def warm_up(self, candles):
+        """Precarga el estado propio de la estrategia con velas cerradas (la más antigua primero)."""
+
+    def update(self, candle, indicators):
+        return self.signal(indicators.candles, indicators)
+
+    def evaluate(self, candle, indicators):
+        return self.signal(indicators.candles, indicators)
+
+    def get_state(self):
+        """Estado propio de la estrategia como datos simples (dict de números y listas), para StateSnapshot."""
+        return {}
+
+    def set_state(self, state):
+        """Retoma el estado de get_state() en una instancia con los mismos parámetros."""
+
+    def __repr__(self):
+        params = ", ".join(f"{key}={value}" for key, value in self.params.items())
+        return f"{self.name}({params})"
+
+
+def combine_signals(signals):
+    """
+    Señal del mercado a partir de las señales de sus estrategias: BUY o SELL solo si ninguna
+    estrategia da la señal contraria, WAIT si ninguna tiene datos suficientes y HOLD en otro caso.
+    """
+    buy = "BUY" in signals
+    sell = "SELL" in signals
+    if buy != sell:
+        return "BUY" if buy else "SELL"
+    if all(signal == "WAIT" for signal in signals):
+        return "WAIT"
+    return "HOLD"
+
+
+class StrategySet:
+    """
+    Estrategias que evalúa un mercado, con una ventana común de las últimas velas y una única
+    IndicatorCache: los indicadores que usan varias estrategias se calculan una vez por vela.
+
+    Ofrece la misma interfaz incremental que una estrategia (warm_up, update, evaluate) y
+    devuelve la señal combinada (combine_signals). La ventana es un array preasignado con
+    lugar para 'lookback' velas cerradas más la vela en formación.
+    """
+
+    def __init__(self, strategies):
+        self.strategies = list(strategies)
+        if not self.strategies:
+            raise ValueError("Se necesita al menos una estrategia.")
+        self.lookback = max(strategy.lookback for strategy in self.strategies)
+        self.indicators = IndicatorCache()
+        self.last_signals = {}
+        self._candles = np.zeros(self.lookback + 1, dtype=CANDLE_DTYPE)
+        self._count = 0
+
+    @classmethod
+    def from_config(cls, specs):
+        """Crea el conjunto a partir de una lista de (nombre, parámetros) como config.STRATEGIES."""
+        return cls(create_strategy(name, **(params or {})) for name, params in specs)
+
+    @property
+    def candles(self):
+        """Velas cerradas de la ventana (vista, la más antigua primero)."""
+        return self._candles[:self._count]
+
+    def warm_up(self, candles):
+        """Precarga la ventana y las estrategias con las velas cerradas más recientes (array con CANDLE_DTYPE)."""
+        for strategy in self.strategies:
+            strategy.warm_up(candles[-strategy.lookback:])
+        n = min(len(candles), self.lookback)
+        self._candles[:n] = candles[len(candles) - n:]
+        self._count = n
+
+    def update(self, candle):
+        """Registra una vela cerrada y devuelve la señal combinada en esa vela."""
+        if self._count == self.lookback:
+            self._candles[:self.lookback - 1] = self._candles[1:self.lookback]
+            self._count -= 1
+        self._candles[self._count] = tuple(candle)
+        self._count += 1
+        self.indicators.set_candles(self._candles[:self._count])
+        return self._combine({str(strategy): strategy.update(candle, self.indicators) for strategy in self.strategies})
+
+    def evaluate(self, candle):
+        """Señal combinada con 'candle' como vela más reciente, sin registrarla."""
+        self._candles[self._count] = tuple(candle)
+        self.indicators.set_candles(self._candles[:self._count + 1])
+        return self._combine({str(strategy): strategy.evaluate(candle, self.indicators) for strategy in self.strategies})
+
+    def get_state(self):
+        """Ventana de velas cerradas (lista de tuplas) y estado propio de cada estrategia."""
+        return {'candles': self.candles.tolist(), 'strategies': [strategy.get_state() for strategy in self.strategies]}
+
+    def set_state(self, state):
+        """Retoma el estado de get_state() en un conjunto con las mismas estrategias."""
+        candles = np.array([tuple(candle) for candle in state['candles']], dtype=CANDLE_DTYPE)
+        if len(candles) > self.lookback or len(state['strategies']) != len(self.strategies):
+            raise ValueError("El estado guardado no corresponde a estas estrategias.")
+        for strategy, strategy_state in zip(self.strategies, state['strategies']):
+            strategy.set_state(strategy_state)
+        self._candles[:len(candles)] = candles
+        self._count = len(candles)
+        self.indicators.set_candles(self.candles)
+
+    def _combine(self, signals):
+        self.last_signals = signals
+        signal = combine_signals(list(signals.values()))
+        if len(signals) > 1:
+            print(f"DEBUG: Señales por estrategia: {signals} -> {signal}")
+        return signal
+
+
+class MultiTimeframeStrategySet:
+    """
+    Estrategias de un mercado en varias temporalidades, todas alimentadas por las velas de la
+    temporalidad base del mercado: las velas de 5m, 15m, 1h... se construyen con un CandleResampler
+    (O(1) por vela), sin pedir más klines a Bybit.
+
+    Tiene la interfaz de StrategySet (warm_up, update, evaluate, lookback, strategies, last_signals)
+    con velas de la temporalidad base. La señal combina (combine_signals) la del conjunto base y la de
+    cada temporalidad mayor, evaluada sobre su vela en formación: la vela mayor en curso más la vela base.
+    """
+
+    def __init__(self, base_interval, base_set, timeframe_sets):
+        """base_set: StrategySet de la temporalidad base; timeframe_sets: {intervalo: StrategySet}."""
+        self.base_interval = base_interval
+        self.base_set = base_set
+        self.timeframes = {interval: (CandleResampler(base_interval, interval), strategy_set)
+                           for interval, strategy_set in timeframe_sets.items()}
+        # Velas base necesarias para completar la ventana de cada temporalidad (más un grupo incompleto al inicio)
+        self.lookback = max([base_set.lookback] + [
+            (strategy_set.lookback + 1) * resampler.factor for resampler, strategy_set in self.timeframes.values()])
+        self.last_signals = {}
+
+    @classmethod
+    def from_config(cls, base_interval, specs, timeframe_specs):
+        """specs como config.STRATEGIES; timeframe_specs como config.STRATEGY_TIMEFRAMES ({intervalo: specs})."""
+        return cls(base_interval, StrategySet.from_config(specs),
+                   {interval: StrategySet.from_config(tf_specs) for interval, tf_specs in timeframe_specs.items()})
+
+    @property
+    def strategies(self):
+        return self.base_set.strategies + [f"{strategy}@{interval}" for interval, (_, strategy_set) in self.timeframes.items()
+                                           for strategy in strategy_set.strategies]
+
+    def warm_up(self, candles):
+        """Precarga todas las temporalidades con velas base cerradas (array con CANDLE_DTYPE)."""
+        self.base_set.warm_up(candles[-self.base_set.lookback:])
+        for resampler, strategy_set in self.timeframes.values():
+            bars = resampler.warm_up(candles)
+            strategy_set.warm_up(bars[-strategy_set.lookback:])
+
+    def update(self, candle):
+        """Registra una vela base cerrada (y las velas mayores que cierra) y devuelve la señal combinada."""
+        signals = {self.base_interval: self.base_set.update(candle)}
+        for interval, (resampler, strategy_set) in self.timeframes.items():
+            closed = resampler.update(candle)
+            for bar in closed:
+                signals[interval] = strategy_set.update(bar)
+            if not closed:
+                bar = resampler.forming()
+                signals[interval] = strategy_set.evaluate(bar) if bar is not None else "WAIT"
+        return self._combine(signals)
+
+    def evaluate(self, candle):
+        """Señal combinada con 'candle' como vela base en formación, sin registrarla."""
+        signals = {self.base_interval: self.base_set.evaluate(candle)}
+        for interval, (resampler, strategy_set) in self.timeframes.items():
+            signals[interval] = strategy_set.evaluate(resampler.forming(candle))
+        return self._combine(signals)
+
+    def get_state(self):
+        """Estado del conjunto base y, por temporalidad, el de su resampler y su conjunto de estrategias."""
+        return {'base': self.base_set.get_state(),
+                'timeframes': {interval: {'resampler': resampler.get_state(), 'strategies': strategy_set.get_state()}
+                               for interval, (resampler, strategy_set) in self.timeframes.items()}}
+
+    def set_state(self, state):
+        """Retoma el estado de get_state() en un conjunto con las mismas temporalidades y estrategias."""
+        if set(state['timeframes']) != set(self.timeframes):
+            raise ValueError("El estado guardado no corresponde a estas temporalidades.")
+        self.base_set.set_state(state['base'])
+        for interval, (resampler, strategy_set) in self.timeframes.items():
+            resampler.set_state(state['timeframes'][interval]['resampler'])
+            strategy_set.set_state(state['timeframes'][interval]['strategies'])
+
+    def _combine(self, signals):
+        self.last_signals = {f"{key}@{self.base_interval}": value for key, value in self.base_set.last_signals.items()}
+        for interval, (_, strategy_set) in self.timeframes.items():
+            self.last_signals.update((f"{key}@{interval}", value) for key, value in strategy_set.last_signals.items())
+        signal = combine_signals(list(signals.values()))
+        print(f"DEBUG: Señales por temporalidad: {signals} -> {signal}")
+        return signal
@@ -0,0 +1,205 @@
+# strategies/indicators.py
+import math
+
+import numpy as np
+
+# Todas las funciones reciben arrays de NumPy (la vela más antigua primero) y devuelven arrays
+# del mismo largo, con NaN en las posiciones donde el indicador todavía no tiene datos suficientes.
+
+# Las SMA del cruce (SMACrossoverEngine y services/backtester.py) suman los precios como enteros de
+# 1/PRICE_SCALE (ticks de 1e-8): la suma de cada ventana es exacta y la media sale de una sola división,
+# así el motor en vivo y el backtest vectorizado calculan las mismas SMA bit a bit, también en los empates.
+PRICE_SCALE = 10 ** 8
+
+
+def sma(values, period):
+    """Media móvil simple de 'period' velas, calculada con una suma acumulada en O(n)."""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if period <= len(values):
+        cumsum = np.concatenate(([0.0], np.cumsum(values)))
+        result[period - 1:] = (cumsum[period:] - cumsum[:-period]) / period
+    return result
+
+
+def price_ticks(values):
+    """Precios como enteros de 1/PRICE_SCALE (int64), redondeados al más cercano como round()."""
+    return np.rint(np.asarray(values, dtype=np.float64) * PRICE_SCALE).astype(np.int64)
+
+
+def tick_cumsum(values):
+    """
+    Suma acumulada de los precios en ticks, con un 0 inicial. En series muy largas la suma total puede
+    desbordar int64; las diferencias entre dos posiciones (la suma de una ventana) siguen siendo exactas
+    porque la aritmética de int64 es modular.
+    """
+    cumsum = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(price_ticks(values), out=cumsum[1:])
+    return cumsum
+
+
+def sma_from_tick_cumsum(cumsum, period):
+    """SMA de 'period' velas a partir de tick_cumsum: suma exacta de la ventana y una única división."""
+    n = len(cumsum) - 1
+    result = np.full(n, np.nan)
+    if period <= n:
+        result[period - 1:] = (cumsum[period:] - cumsum[:-period]).astype(np.float64) / (period * PRICE_SCALE)
+    return result
+
+
+def _smooth(values, period, alpha):
+    """
+    Suavizado exponencial y[t] = y[t-1] + alpha * (x[t] - y[t-1]) sembrado con la SMA de las
+    primeras 'period' velas (como EMA y las medias de Wilder en las plataformas de trading).
+    La recurrencia se resuelve por bloques con la forma cerrada, sin un bucle de Python por vela.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    result = np.full(n, np.nan)
+    if period > n:
+        return result
+    result[period - 1] = values[:period].mean()
+    rest = values[period:]
+    if not len(rest):
+        return result
+    if alpha >= 1.0:
+        result[period:] = rest
+        return result
+
+    decay = 1.0 - alpha
+    # El bloque más largo en el que decay**-k no desborda un float64
+    block = max(1, min(1024, int(250 / -math.log10(decay))))
+    previous = result[period - 1]
+    for start in range(0, len(rest), block):
+        chunk = rest[start:start + block]
+        k = np.arange(1, len(chunk) + 1)
+        weights = decay ** -k
+        smoothed = decay ** k * (previous + alpha * np.cumsum(chunk * weights))
+        result[period + start:period + start + len(chunk)] = smoothed
+        previous = smoothed[-1]
+    return result
+
+
+def ema(values, period):
+    """Media móvil exponencial (alpha = 2 / (period + 1)), sembrada con la SMA de las primeras velas."""
+    return _smooth(values, period, 2.0 / (period + 1))
+
+
+def rsi(closes, period=14):
+    """Relative Strength Index de Wilder, entre 0 y 100."""
+    closes = np.asarray(closes, dtype=np.float64)
+    result = np.full(len(closes), np.nan)
+    if len(closes) <= period:
+        return result
+    deltas = np.diff(closes)
+    avg_gain = _smooth(np.maximum(deltas, 0.0), period, 1.0 / period)
+    avg_loss = _smooth(np.maximum(-deltas, 0.0), period, 1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # Sin pérdidas en la ventana el RSI es 100 (la división da inf o NaN)
+    values = np.where(avg_loss == 0.0, 100.0, values)
+    values[np.isnan(avg_gain)] = np.nan
+    result[1:] = values
+    return result
+
+
+def true_range(high, low, close):
+    """Rango verdadero de cada vela; la primera usa solo high - low."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    tr = high - low
+    if len(close) > 1:
+        prev_close = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+    return tr
+
+
+def atr(high, low, close, period=14):
+    """Average True Range de Wilder."""
+    return _smooth(true_range(high, low, close), period, 1.0 / period)
+
+
+def bollinger(closes, period=20, num_std=2.0):
+    """Bandas de Bollinger: (media, banda superior, banda inferior) con desvío estándar poblacional."""
+    closes = np.asarray(closes, dtype=np.float64)
+    middle = sma(closes, period)
+    std = np.full(len(closes), np.nan)
+    if period <= len(closes):
+        std[period - 1:] = np.lib.stride_tricks.sliding_window_view(closes, period).std(axis=1)
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def vwap(high, low, close, volume, window=None):
+    """
+    Precio promedio ponderado por volumen sobre el precio típico (high + low + close) / 3.
+    Sin 'window' es acumulado desde la primera vela; con 'window' es móvil de esa cantidad de velas.
+    """
+    typical = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64) + np.asarray(close, dtype=np.float64)) / 3.0
+    volume = np.asarray(volume, dtype=np.float64)
+    pv = np.cumsum(typical * volume)
+    vol = np.cumsum(volume)
+    if window is not None:
+        result = np.full(len(volume), np.nan)
+        if window <= len(volume):
+            pv = pv[window - 1:] - np.concatenate(([0.0], pv[:-window]))
+            vol = vol[window - 1:] - np.concatenate(([0.0], vol[:-window]))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[window - 1:] = pv / vol
+        return result
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pv / vol
+
+
+class IndicatorCache:
+    """
+    Indicadores de una ventana de velas (array con CANDLE_DTYPE) memorizados hasta que cambia la ventana.
+    Varias estrategias del mismo mercado comparten una instancia, así que cada indicador
+    (p. ej. la EMA de 20 o el RSI de 14) se calcula una sola vez por vela.
+    """
+
+    def __init__(self, candles=None):
+        self.candles = candles
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def set_candles(self, candles):
+        """Cambia la ventana (una vela nueva o la vela en formación) y descarta los valores calculados."""
+        self.candles = candles
+        self._values.clear()
+
+    def _cached(self, key, compute):
+        if key in self._values:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._values[key] = compute()
+        return self._values[key]
+
+    def column(self, name):
+        return self._cached(('column', name), lambda: np.ascontiguousarray(self.candles[name], dtype=np.float64))
+
+    def sma(self, period, source='close'):
+        return self._cached(('sma', period, source), lambda: sma(self.column(source), period))
+
+    def tick_sma(self, period):
+        """SMA de los cierres con sumas exactas en ticks (la de SMACrossoverEngine)."""
+        cumsum = self._cached(('tick_cumsum',), lambda: tick_cumsum(self.column('close')))
+        return self._cached(('tick_sma', period), lambda: sma_from_tick_cumsum(cumsum, period))
+
+    def ema(self, period, source='close'):
+        return self._cached(('ema', period, source), lambda: ema(self.column(source), period))
+
+    def rsi(self, period=14):
+        return self._cached(('rsi', period), lambda: rsi(self.column('close'), period))
+
+    def atr(self, period=14):
+        return self._cached(('atr', period), lambda: atr(self.column('high'), self.column('low'), self.column('close'), period))
+
+    def bollinger(self, period=20, num_std=2.0):
+        return self._cached(('bollinger', period, num_std), lambda: bollinger(self.column('close'), period, num_std))
+
+    def vwap(self, window=None):
+        return self._cached(('vwap', window), lambda: vwap(self.column('high'), self.column('low'), self.column('close'),
+                                                           self.column('volume'), window))
@@ -0,0 +1,35 @@
+# strategies/rsi_strategy.py
+from typing import ClassVar
+
+import numpy as np
+
+from strategies.base import Strategy, register_strategy
+from strategies.indicators import IndicatorCache
+
+
+@register_strategy("rsi_reversion")
+class RSIReversionStrategy(Strategy):
+    """
+    Reversión a la media con el RSI de Wilder: BUY cuando el RSI sale de la zona de sobreventa
+    (cruza 'oversold' hacia arriba) y SELL cuando sale de la zona de sobrecompra
+    (cruza 'overbought' hacia abajo). HOLD en cualquier otro caso.
+    """
+
+    PARAMS: ClassVar[dict] = {"period": 14, "oversold": 30.0, "overbought": 70.0}
+
+    @property
+    def lookback(self):
+        # El RSI de Wilder es recursivo: en vivo se calcula sobre una ventana de 10 * period velas
+        # para que el valor inicial de las medias ya no influya (peso < 0.01 % con period=14)
+        return 10 * self.params["period"] + 2
+
+    def signals(self, candles, indicators=None):
+        indicators = indicators if indicators is not None else IndicatorCache(candles)
+        rsi = indicators.rsi(self.params["period"])
+        signals = np.zeros(len(rsi), dtype=np.int8)
+        if len(signals) < 2:
+            return signals
+        prev, last = rsi[:-1], rsi[1:]
+        signals[1:][(prev < self.params["oversold"]) & (last >= self.params["oversold"])] = 1
+        signals[1:][(prev > self.params["overbought"]) & (last <= self.params["overbought"])] = -1
+        return signals
@@ -1,8 +1,22 @@
 # strategies/simple_ma_strategy.py
-import pandas as pd
-import config # Para acceder a los parámetros de la estrategia (SMA_SHORT_PERIOD, SMA_LONG_PERIOD)
+import math
+from typing import TYPE_CHECKING, ClassVar
 
-def generate_signal(df_klines: pd.DataFrame) -> str:
+import numpy as np
+
+import config  # Para acceder a los parámetros de la estrategia (SMA_SHORT_PERIOD, SMA_LONG_PERIOD)
+from strategies.base import Strategy, candle_close, register_strategy
+from strategies.indicators import (
+    PRICE_SCALE,
+    IndicatorCache,
+    sma_from_tick_cumsum,
+    tick_cumsum,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd  # Solo para la anotación de generate_signal: pandas se importa al llamarla
+
+def generate_signal(df_klines: "pd.DataFrame") -> str:
     """
     Genera una señal de trading (BUY, SELL, HOLD, WAIT) basada en el cruce de Medias Móviles Simples (SMA).
     
@@ -15,6 +29,7 @@ def generate_signal(df_klines: pd.DataFrame) -> str:
         str: "BUY" para señal de compra, "SELL" para señal de venta, 
              "HOLD" si no hay cruce o "WAIT" si no hay suficientes datos.
     """
+    import pandas as pd  # Opcional: el bucle del bot usa SMACrossoverEngine sobre arrays de NumPy
     # 1. Validación inicial de datos
     # Necesitamos al menos suficientes velas para calcular la SMA más larga.
     if df_klines.empty or len(df_klines) < config.SMA_LONG_PERIOD:
@@ -34,8 +49,11 @@ def generate_signal(df_klines: pd.DataFrame) -> str:
         return "WAIT"
 
     # 3. Calcular las Medias Móviles Simples (SMA)
-    df_klines['SMA_Short'] = df_klines['close'].rolling(window=config.SMA_SHORT_PERIOD).mean()
-    df_klines['SMA_Long'] = df_klines['close'].rolling(window=config.SMA_LONG_PERIOD).mean()
+    # Con sumas exactas en ticks (como SMACrossoverEngine y el backtester): las SMA iguales se detectan
+    # como iguales, sin depender del redondeo de rolling().mean()
+    cumsum = tick_cumsum(df_klines['close'].to_numpy(dtype=float))
+    df_klines['SMA_Short'] = sma_from_tick_cumsum(cumsum, config.SMA_SHORT_PERIOD)
+    df_klines['SMA_Long'] = sma_from_tick_cumsum(cumsum, config.SMA_LONG_PERIOD)
 
     # 4. Eliminar las filas iniciales que contienen valores NaN después del cálculo de las SMA
     # Esto ocurre porque las medias móviles necesitan un número de períodos para calcularse.
@@ -68,4 +86,172 @@ def generate_signal(df_klines: pd.DataFrame) -> str:
     # Si no hay cruce, no se toma ninguna acción
     else:
         print(f"DEBUG: Señal detectada: HOLD (No hay cruce claro. SMA Corta: {last_row['SMA_Short']:.2f}, SMA Larga: {last_row['SMA_Long']:.2f})")
-        return "HOLD"
\ No newline at end of file
+        return "HOLD"
+
+@register_strategy("sma_crossover")
+class SMACrossoverEngine(Strategy):
+    """
+    Versión incremental de generate_signal: mantiene las sumas de las dos SMA
+    sobre un buffer circular de tamaño fijo, de modo que cada vela nueva cuesta O(1)
+    en lugar de recalcular las medias sobre todo el DataFrame.
+
+    Produce las mismas señales (BUY, SELL, HOLD, WAIT) que generate_signal aplicada a la serie
+    completa de cierres que recibió el motor. Las sumas son enteros exactos de ticks de 1e-8
+    (ver strategies/indicators.PRICE_SCALE): no acumulan error de redondeo y las SMA coinciden
+    bit a bit con las del backtest vectorizado (services/backtester.py), también en los empates.
+
+    Uso típico:
+        - update(close): registra una vela CERRADA y devuelve la señal en esa vela.
+        - evaluate(close): calcula la señal como si 'close' fuera la vela más reciente
+          (por ejemplo, la vela en formación) sin modificar el estado.
+    'close' puede ser el cierre o la vela completa (registro o tupla en el orden de CANDLE_DTYPE).
+    """
+
+    # None: se usan config.SMA_SHORT_PERIOD y config.SMA_LONG_PERIOD
+    PARAMS: ClassVar[dict] = {"short_period": None, "long_period": None}
+
+    def __init__(self, short_period=None, long_period=None):
+        super().__init__(short_period=short_period, long_period=long_period)
+        self.short_period = int(short_period if short_period is not None else config.SMA_SHORT_PERIOD)
+        self.long_period = int(long_period if long_period is not None else config.SMA_LONG_PERIOD)
+        self.params = {"short_period": self.short_period, "long_period": self.long_period}
+        if self.short_period < 1 or self.long_period < 1:
+            raise ValueError("Los períodos de las SMA deben ser enteros positivos.")
+
+        self._capacity = max(self.short_period, self.long_period)
+        self._buffer = [0] * self._capacity # Cierres en ticks
+        self._pos = 0      # Índice donde se escribirá el próximo cierre
+        self._count = 0    # Cantidad total de cierres válidos recibidos
+        self._sum_short = 0 # Sumas exactas en ticks
+        self._sum_long = 0
+        self._prev_sma_short = None  # SMAs de la última vela registrada
+        self._prev_sma_long = None
+        self._last_signal = "WAIT"
+
+    @property
+    def lookback(self):
+        # Una vela más que la SMA larga: el cruce compara la última vela con la anterior
+        return max(self.short_period, self.long_period) + 1
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sma_short(self):
+        return self._prev_sma_short
+
+    @property
+    def sma_long(self):
+        return self._prev_sma_long
+
+    def warm_up(self, closes):
+        """Registra una secuencia de cierres o de velas (más antiguo primero) y devuelve la última señal."""
+        if getattr(closes, 'dtype', None) is not None and closes.dtype.names:
+            closes = closes['close']
+        signal = "WAIT"
+        for close in closes:
+            signal = self.update(close)
+        return signal
+
+    def update(self, close, indicators=None) -> str:
+        """Registra una vela cerrada y devuelve la señal correspondiente a esa vela."""
+        close = candle_close(close)
+        if not math.isfinite(close):
+            # Igual que generate_signal, los cierres no numéricos se descartan
+            return self._last_signal
+
+        tick = round(close * PRICE_SCALE)
+        sum_short, sum_long = self._next_sums(tick)
+        prev_short, prev_long = self._prev_sma_short, self._prev_sma_long
+
+        self._buffer[self._pos] = tick
+        self._pos = (self._pos + 1) % self._capacity
+        self._count += 1
+        self._sum_short, self._sum_long = sum_short, sum_long
+
+        sma_short, sma_long = self._smas(self._count, self._sum_short, self._sum_long)
+        self._prev_sma_short, self._prev_sma_long = sma_short, sma_long
+        self._last_signal = self._crossover(prev_short, prev_long, sma_short, sma_long)
+        return self._last_signal
+
+    def evaluate(self, close, indicators=None) -> str:
+        """
+        Señal que se obtendría si 'close' fuese la vela más reciente, sin registrarla.
+        Equivale a generate_signal sobre los cierres registrados más 'close'.
+        """
+        close = candle_close(close)
+        if not math.isfinite(close):
+            return self._last_signal
+
+        sum_short, sum_long = self._next_sums(round(close * PRICE_SCALE))
+        sma_short, sma_long = self._smas(self._count + 1, sum_short, sum_long)
+        signal = self._crossover(self._prev_sma_short, self._prev_sma_long, sma_short, sma_long)
+        if signal == "WAIT":
+            print(f"DEBUG: No hay suficientes datos para la estrategia. Necesita {self.long_period + 1} velas, tiene {self._count + 1}.")
+        else:
+            print(f"DEBUG: Señal incremental: {signal} (SMA Corta {sma_short:.2f}, SMA Larga {sma_long:.2f})")
+        return signal
+
+    def get_state(self):
+        """Buffer de cierres (en ticks), sumas y SMAs de la última vela, como datos simples."""
+        return {
+            'buffer': list(self._buffer), 'pos': self._pos, 'count': self._count,
+            'sum_short': self._sum_short, 'sum_long': self._sum_long,
+            'prev_sma_short': self._prev_sma_short, 'prev_sma_long': self._prev_sma_long,
+            'last_signal': self._last_signal,
+        }
+
+    def set_state(self, state):
+        """Retoma el estado de get_state() en un motor con los mismos períodos."""
+        if len(state['buffer']) != self._capacity:
+            raise ValueError(f"El estado guardado es de otros períodos (buffer de {len(state['buffer'])} cierres).")
+        self._buffer = [int(tick) for tick in state['buffer']]
+        self._pos = int(state['pos'])
+        self._count = int(state['count'])
+        self._sum_short, self._sum_long = int(state['sum_short']), int(state['sum_long'])
+        self._prev_sma_short, self._prev_sma_long = state['prev_sma_short'], state['prev_sma_long']
+        self._last_signal = state['last_signal']
+
+    def signals(self, candles, indicators=None):
+        """Señales del cruce para cada vela de 'candles' (1 BUY, -1 SELL, 0 HOLD/WAIT), como crossover_signals."""
+        indicators = indicators if indicators is not None else IndicatorCache(candles)
+        sma_short = indicators.tick_sma(self.short_period)
+        sma_long = indicators.tick_sma(self.long_period)
+        signals = np.zeros(len(sma_short), dtype=np.int8)
+        if len(signals) < 2:
+            return signals
+        prev_short, prev_long = sma_short[:-1], sma_long[:-1]
+        last_short, last_long = sma_short[1:], sma_long[1:]
+        # Las comparaciones con NaN son falsas: no hay señales mientras falten datos
+        signals[1:][(last_short > last_long) & (prev_short <= prev_long)] = 1
+        signals[1:][(last_short < last_long) & (prev_short >= prev_long)] = -1
+        return signals
+
+    def _next_sums(self, tick):
+        # Valor que sale de cada ventana al agregar 'tick' (se lee antes de sobrescribir el buffer)
+        sum_short = self._sum_short + tick
+        if self._count >= self.short_period:
+            sum_short -= self._buffer[(self._pos - self.short_period) % self._capacity]
+        sum_long = self._sum_long + tick
+        if self._count >= self.long_period:
+            sum_long -= self._buffer[(self._pos - self.long_period) % self._capacity]
+        return sum_short, sum_long
+
+    def _smas(self, count, sum_short, sum_long):
+        # Ambas SMA existen recién cuando hay velas suficientes para la más larga,
+        # igual que tras el dropna() de generate_signal. Misma operación que sma_from_tick_cumsum:
+        # la suma (exacta) se convierte a float y se divide una sola vez
+        if count < max(self.short_period, self.long_period):
+            return None, None
+        return float(sum_short) / (self.short_period * PRICE_SCALE), float(sum_long) / (self.long_period * PRICE_SCALE)
+
+    @staticmethod
+    def _crossover(prev_short, prev_long, sma_short, sma_long):
+        if prev_short is None or sma_short is None:
+            return "WAIT"
+        if sma_short > sma_long and prev_short <= prev_long:
+            return "BUY"
+        if sma_short < sma_long and prev_short >= prev_long:
+            return "SELL"
+        return "HOLD"
@@ -0,0 +1,59 @@
+# sweep.py
+import argparse
+import time
+
+import config  # Para acceder a los parámetros de configuración
+from services.param_sweep import build_grid, run_sweep, sample_grid
+
+
+def parse_range(text):
+    """Convierte "5:30:5" (inicio:fin:paso, fin incluido) o "5,10,20" en una lista de enteros."""
+    if ':' in text:
+        parts = [int(p) for p in text.split(':')]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        return list(range(start, stop + 1, step))
+    return [int(p) for p in text.split(',')]
+
+
+def parse_dataset(text):
+    """Convierte "BTCUSDT:1=data/btc_1m.csv" en ((symbol, interval), ruta)."""
+    market, path = text.split('=', 1)
+    symbol, _, interval = market.partition(':')
+    return (symbol, interval or config.INTERVAL), path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda en paralelo de SMA_SHORT_PERIOD / SMA_LONG_PERIOD.")
+    parser.add_argument("--data", action="append", required=True,
+                        help="Dataset como SYMBOL:INTERVAL=archivo (.csv o .npy). Se puede repetir.")
+    parser.add_argument("--short", default="5:30", help="Períodos de la SMA corta (ej. 5:30 o 5:30:5 o 5,10,20)")
+    parser.add_argument("--long", default="10:100:5", help="Períodos de la SMA larga")
+    parser.add_argument("--random", type=int, default=0, help="Si es > 0, evalúa solo N combinaciones al azar del grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos a usar (por defecto, uno por núcleo)")
+    parser.add_argument("--rank-by", default="realized_pnl", choices=["realized_pnl", "win_rate", "max_drawdown", "final_equity"])
+    parser.add_argument("--top", type=int, default=20, help="Cantidad de filas a mostrar")
+    parser.add_argument("--quantity", type=float, default=config.TRADE_QUANTITY)
+    parser.add_argument("--balance", type=float, default=config.BACKTEST_INITIAL_BALANCE)
+    parser.add_argument("--output", default=None, help="CSV donde guardar la tabla completa")
+    args = parser.parse_args()
+
+    datasets = dict(parse_dataset(d) for d in args.data)
+    combos = build_grid(parse_range(args.short), parse_range(args.long))
+    if args.random > 0:
+        combos = sample_grid(combos, args.random, seed=args.seed)
+
+    print(f"Evaluando {len(combos)} combinaciones sobre {len(datasets)} dataset(s)...")
+    t0 = time.perf_counter()
+    table = run_sweep(datasets, combos, args.quantity, args.balance, max_workers=args.workers, rank_by=args.rank_by)
+    print(f"Búsqueda completada en {time.perf_counter() - t0:.2f}s\n")
+    print(table.head(args.top).to_string(index=False))
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"\nTabla completa guardada en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# tests/test_account_cache.py
+import threading
+import time
+
+import pytest
+
+from services.bybit_client import AccountStateUnavailable, BybitClient
+from services.exchange_simulator import (
+    SimulatedClock,
+    SimulatedExchange,
+    SimulatedHTTPSession,
+    synthetic_candle_array,
+)
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT")
+
+
+class StubAccountSession(SimulatedHTTPSession):
+    """Consultas de cuenta contadas, con demora y fallas a pedido."""
+
+    def __init__(self, exchange):
+        super().__init__(exchange)
+        self.delay = 0.0
+        self.failing = False
+        self.position_calls = 0
+        self.fetch_started = threading.Event()
+
+    def _account_call(self):
+        self.fetch_started.set()
+        time.sleep(self.delay)
+        if self.failing:
+            raise ConnectionError("Bybit no responde")
+
+    # La respuesta refleja la cuenta al momento de recibir la solicitud, no al responder
+    def get_positions(self, **params):
+        self.position_calls += 1
+        response = super().get_positions(**params)
+        self._account_call()
+        return response
+
+    def get_wallet_balance(self, **params):
+        response = super().get_wallet_balance(**params)
+        self._account_call()
+        return response
+
+
+@pytest.fixture
+def account(capsys):
+    markets = {(symbol, "1"): synthetic_candle_array(50, "1", start_price=100.0 * (i + 1), seed=i)
+               for i, symbol in enumerate(SYMBOLS)}
+    exchange = SimulatedExchange(markets, SimulatedClock(int(markets[(SYMBOLS[0], "1")]['start_time'][40])))
+    session = StubAccountSession(exchange)
+    client = BybitClient(session=session, account_cache_ttl=60, max_retries=0)
+    return client, session
+
+
+def test_one_request_serves_every_symbol(account):
+    client, session = account
+    for symbol in SYMBOLS * 3:
+        assert client.get_current_position(symbol) == (0.0, "None", None)
+    assert session.position_calls == 1
+    assert client.account_cache.stats()['hits'] == 5
+
+
+def test_failed_refresh_after_an_order_does_not_return_the_old_position(account):
+    client, session = account
+    assert client.get_current_position(SYMBOLS[0])[0] == 0.0
+    assert client.place_order(SYMBOLS[0], "Buy", 0.5) is not None
+    session.failing = True
+    with pytest.raises(AccountStateUnavailable):
+        client.get_current_position(SYMBOLS[0])
+    session.failing = False
+    assert client.get_current_position(SYMBOLS[0])[:2] == (0.5, "Buy")
+
+
+def test_concurrent_misses_share_one_request_outside_the_lock(account):
+    client, session = account
+    session.delay = 0.2
+    results = []
+    threads = [threading.Thread(target=lambda symbol=symbol: results.append(client.get_current_position(symbol)))
+               for symbol in SYMBOLS * 4]
+    for thread in threads:
+        thread.start()
+    assert session.fetch_started.wait(1.0)
+    # Mientras la consulta está en curso, el lock está libre: una actualización del stream no espera a la red
+    started = time.monotonic()
+    client.account_cache.update_position("XRPUSDT", (1.0, "Buy", 0.5))
+    assert time.monotonic() - started < 0.1
+    for thread in threads:
+        thread.join()
+    assert len(results) == len(threads)
+    assert session.position_calls == 1
+
+
+def test_result_of_a_request_started_before_an_order_is_not_kept(account):
+    client, session = account
+    session.delay = 0.2
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append(client.get_current_position(SYMBOLS[0])))
+    reader.start()
+    assert session.fetch_started.wait(1.0)
+    # La orden se ejecuta mientras la consulta anterior todavía no respondió
+    session.delay = 0.0
+    assert client.place_order(SYMBOLS[0], "Sell", 0.5) is not None
+    reader.join()
+    # Quien preguntó antes de la orden recibe su respuesta; la caché no la guarda como vigente
+    assert seen == [(0.0, "None", None)]
+    assert client.get_current_position(SYMBOLS[0])[:2] == (0.5, "Sell")
@@ -0,0 +1,97 @@
+# tests/test_backtester.py
+# El backtest vectorizado debe dar las mismas señales y operaciones que el motor en vivo
+# (SMACrossoverEngine) vela a vela, también con precios en ticks donde las SMA empatan a menudo.
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.backtester import (
+    close_cumsum,
+    crossover_signals,
+    load_ohlcv,
+    run_backtest,
+    sma_from_cumsum,
+)
+from services.candle_store import CandleStore
+from services.exchange_simulator import synthetic_candle_array
+from strategies.base import SIGNAL_CODES
+from strategies.simple_ma_strategy import SMACrossoverEngine
+
+QUANTITY, BALANCE, SYMBOL = 0.01, 10000.0, "BTCUSDT"
+
+
+def tick_walk(n, seed, tick):
+    """Precios en múltiplos de 'tick' que cambian de a pocos ticks: muchos empates entre las SMA."""
+    rng = np.random.default_rng(seed)
+    return np.round(30000.0 + np.cumsum(rng.integers(-2, 3, n)) * tick, 8)
+
+
+def live_signals(closes, short_period, long_period):
+    engine = SMACrossoverEngine(short_period, long_period)
+    return [engine.update(close) for close in closes.tolist()]
+
+
+def live_trades(closes, signals):
+    """Filas (acción, lado, PnL, estado) que registra main.py al operar las señales del motor."""
+    rows, position, entry = [], 0, None
+    for close, signal in zip(closes.tolist(), signals):
+        target = SIGNAL_CODES.get(signal, 0)
+        if target == 0 or target == position:
+            continue
+        side = "Buy" if target > 0 else "Sell"
+        if position:
+            rows.append(("CLOSE_POSITION", side, f"{(close - entry) * QUANTITY * position:.2f}",
+                         "CLOSED LONG" if position > 0 else "CLOSED SHORT"))
+        rows.append(("OPEN_POSITION", side, "0.00", "FILLED"))
+        position, entry = target, close
+    return rows
+
+
+@pytest.mark.parametrize("short_period, long_period, tick", [(2, 4, 0.1), (3, 7, 1.0), (10, 20, 0.01), (5, 5, 0.1)])
+def test_signals_match_the_live_engine(short_period, long_period, tick, capsys):
+    closes = tick_walk(20_000, seed=short_period, tick=tick)
+    cumsum = close_cumsum(closes)
+    vectorized = crossover_signals(sma_from_cumsum(cumsum, short_period), sma_from_cumsum(cumsum, long_period))
+    expected = [SIGNAL_CODES.get(signal, 0) for signal in live_signals(closes, short_period, long_period)]
+    assert vectorized.tolist() == expected
+
+
+def test_smas_are_identical_to_the_live_engine():
+    closes = synthetic_candle_array(3000, "1", seed=4)['close']
+    cumsum = close_cumsum(closes)
+    engine = SMACrossoverEngine(9, 26)
+    engine.warm_up(closes)
+    # Mismo valor bit a bit, no solo aproximado
+    assert engine.sma_short == sma_from_cumsum(cumsum, 9)[-1]
+    assert engine.sma_long == sma_from_cumsum(cumsum, 26)[-1]
+
+
+@pytest.mark.parametrize("short_period, long_period", [(2, 4), (10, 20)])
+def test_trades_match_the_live_engine(short_period, long_period, capsys):
+    closes = tick_walk(5000, seed=long_period, tick=0.1)
+    start_times = np.arange(len(closes), dtype=np.int64) * 60_000
+    result = run_backtest(start_times, closes, short_period, long_period, QUANTITY, BALANCE, SYMBOL)
+    expected = live_trades(closes, live_signals(closes, short_period, long_period))
+    trades = result.trades
+    assert list(zip(trades['Action'], trades['Side'], trades['PNL'], trades['Status'])) == expected
+    assert result.summary['closed_trades'] == sum(row[0] == "CLOSE_POSITION" for row in expected)
+    assert result.summary['realized_pnl'] == pytest.approx(sum(float(row[2]) for row in expected), abs=0.01 * len(expected))
+
+
+def test_load_ohlcv_formats(tmp_path):
+    candles = synthetic_candle_array(50, "1", seed=8)
+    rows = [list(candle) for candle in candles.tolist()]
+    newest_first = tmp_path / "bybit.csv"
+    pd.DataFrame(rows[::-1]).to_csv(newest_first, header=False, index=False)
+    with_header = tmp_path / "header.csv"
+    pd.DataFrame(rows, columns=list(candles.dtype.names)).to_csv(with_header, index=False)
+    npy = tmp_path / "klines.npy"
+    np.save(npy, np.array(rows, dtype=np.float64))
+    store = CandleStore(SYMBOL, "1", folder=str(tmp_path))
+    store.append(candles)
+
+    for path in (newest_first, with_header, npy, store.path):
+        start_times, closes = load_ohlcv(str(path))
+        assert start_times.tolist() == candles['start_time'].tolist(), path
+        # El CSV puede perder el último dígito de los float al escribirlos y leerlos con pandas
+        assert np.allclose(closes, candles['close'], rtol=1e-12, atol=0), path
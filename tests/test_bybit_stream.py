@@ -0,0 +1,103 @@
+# tests/test_bybit_stream.py
+# Mensajes con el formato de los streams V5 de Bybit (kline, position, wallet, order) y la
+# recuperación por REST de las velas que no llegaron por el stream.
+import pytest
+
+import main
+from services.bybit_client import BybitClient
+from services.bybit_stream import (
+    parse_kline_message,
+    parse_position_message,
+    parse_wallet_message,
+)
+from services.candle_store import CandleStore
+from services.exchange_simulator import (
+    SimulatedClock,
+    SimulatedExchange,
+    SimulatedHTTPSession,
+    synthetic_candle_array,
+)
+from services.market_scheduler import SymbolState
+from services.order_manager import OrderManager
+from strategies.simple_ma_strategy import SMACrossoverEngine
+
+SYMBOL, INTERVAL = "BTCUSDT", "1"
+
+KLINE_MESSAGE = {
+    "topic": "kline.1.BTCUSDT", "type": "snapshot", "ts": 1672324988882,
+    "data": [
+        {"start": 1672324920000, "end": 1672324979999, "interval": "1", "open": "16649.5", "close": "16677",
+         "high": "16677", "low": "16608", "volume": "2.081", "turnover": "34666.4005", "confirm": True,
+         "timestamp": 1672324980000},
+        {"start": 1672324980000, "end": 1672325039999, "interval": "1", "open": "16677", "close": "16680.5",
+         "high": "16681", "low": "16675", "volume": "0.1", "turnover": "1667.9", "confirm": False,
+         "timestamp": 1672324988882},
+    ],
+}
+
+
+def test_parse_kline_message():
+    assert parse_kline_message(KLINE_MESSAGE) == [
+        (1672324920000, 16649.5, 16677.0, 16608.0, 16677.0, 2.081, 34666.4005, True),
+        (1672324980000, 16677.0, 16681.0, 16675.0, 16680.5, 0.1, 1667.9, False),
+    ]
+    assert parse_kline_message({"topic": "kline.1.BTCUSDT", "data": []}) == []
+
+
+def test_parse_position_message():
+    message = {"topic": "position", "creationTime": 1697682317044, "data": [
+        {"category": "linear", "symbol": "ETHUSDT", "side": "Sell", "size": "0.2", "avgPrice": "1600.5"},
+        {"category": "linear", "symbol": "BTCUSDT", "side": "Buy", "size": "0.01", "avgPrice": "28530.1"},
+    ]}
+    assert parse_position_message(message, "BTCUSDT") == (0.01, "Buy", 28530.1)
+    assert parse_position_message(message, "ETHUSDT") == (0.2, "Sell", 1600.5)
+    assert parse_position_message(message, "XRPUSDT") is None
+    closed = {"topic": "position", "data": [{"symbol": "BTCUSDT", "side": "", "size": "0", "avgPrice": "0"}]}
+    assert parse_position_message(closed, "BTCUSDT") == (0.0, "None", None)
+
+
+def test_parse_wallet_message():
+    message = {"topic": "wallet", "data": [{"accountType": "UNIFIED", "coin": [
+        {"coin": "BTC", "walletBalance": "0.5"}, {"coin": "USDT", "walletBalance": "1234.56"}]}]}
+    assert parse_wallet_message(message, "USDT") == 1234.56
+    assert parse_wallet_message(message, "ETH") is None
+
+
+def test_order_message_updates_the_pending_order(capsys):
+    candles = synthetic_candle_array(100, INTERVAL, seed=1)
+    exchange = SimulatedExchange({(SYMBOL, INTERVAL): candles}, SimulatedClock(int(candles['start_time'][50])))
+    manager = OrderManager(BybitClient(session=SimulatedHTTPSession(exchange)))
+    fill = manager.submit(SYMBOL, "Buy", 0.01)
+    manager.handle_order_message({"topic": "order", "creationTime": 1672364262474, "data": [
+        {"category": "linear", "symbol": SYMBOL, "orderId": fill.order_id, "side": "Buy", "orderType": "Market",
+         "orderStatus": "PartiallyFilled", "avgPrice": "30000.5", "cumExecQty": "0.004"},
+        {"category": "linear", "symbol": SYMBOL, "orderId": "otra-orden", "orderStatus": "Filled"},
+    ]})
+    assert (fill.status, fill.avg_price, fill.filled_qty) == ("PartiallyFilled", 30000.5, 0.004)
+    assert not fill.filled
+
+
+@pytest.mark.parametrize("before_index", [None, 208, 209])
+def test_catch_up_registers_the_candles_missed_by_the_stream(tmp_path, capsys, before_index):
+    candles = synthetic_candle_array(300, INTERVAL, seed=2)
+    clock = SimulatedClock(int(candles['start_time'][199]) + 30_000)
+    client = BybitClient(session=SimulatedHTTPSession(SimulatedExchange({(SYMBOL, INTERVAL): candles}, clock)))
+    state = SymbolState(SYMBOL, INTERVAL, 0.001)
+    state.candle_store = CandleStore(SYMBOL, INTERVAL, folder=str(tmp_path), backfill_bars=100, clock=clock.time)
+    state.candle_store.sync(client)
+    state.strategy_engine = SMACrossoverEngine(3, 5)
+    state.strategy_engine.warm_up(state.candle_store.view())
+
+    # El stream estuvo cortado 10 minutos: la última vela registrada es la 198
+    clock.advance(10 * 60)
+    before = None if before_index is None else int(candles['start_time'][before_index])
+    missed = main.catch_up(client, state, before)
+    registered_until = 209 if before_index is None else before_index # Sin 'before', hasta la última cerrada (208)
+    assert missed == registered_until - 199
+    assert state.candle_store.last_start_time == int(candles['start_time'][208])
+
+    reference = SMACrossoverEngine(3, 5)
+    reference.warm_up(candles[99:registered_until])
+    assert state.strategy_engine.count == reference.count
+    assert state.strategy_engine.sma_short == pytest.approx(reference.sma_short)
+    assert state.strategy_engine.sma_long == pytest.approx(reference.sma_long)
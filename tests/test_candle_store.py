@@ -0,0 +1,115 @@
+# tests/test_candle_store.py
+import numpy as np
+import pytest
+
+from services.bybit_client import BybitClient
+from services.candle_store import KLINE_PAGE_LIMIT, CandleStore
+from services.exchange_simulator import (
+    SimulatedClock,
+    SimulatedExchange,
+    SimulatedHTTPSession,
+    synthetic_candle_array,
+)
+
+SYMBOL, INTERVAL, MINUTE_MS = "BTCUSDT", "1", 60_000
+
+
+def make_market(candles, now_ms):
+    exchange = SimulatedExchange({(SYMBOL, INTERVAL): candles}, SimulatedClock(now_ms))
+    client = BybitClient(session=SimulatedHTTPSession(exchange))
+    return exchange, client
+
+
+def test_forming_candle_is_not_saved_when_the_local_clock_is_ahead(tmp_path, capsys):
+    candles = synthetic_candle_array(300, INTERVAL, seed=1)
+    now_ms = int(candles['start_time'][199]) + 30_000 # Bybit está a mitad de la vela 199
+    exchange, client = make_market(candles, now_ms)
+    store = CandleStore(SYMBOL, INTERVAL, folder=str(tmp_path), backfill_bars=100)
+    # El reloj local va 2 minutos adelantado: con él, la vela 199 parecería cerrada
+    store.sync(client, now_ms=now_ms + 2 * MINUTE_MS)
+    assert store.last_start_time == int(candles['start_time'][198])
+    assert store.forming.start_time == int(candles['start_time'][199])
+
+    exchange.clock.advance(60)
+    assert store.sync(client, now_ms=now_ms + 3 * MINUTE_MS) == 1
+    assert np.array_equal(store.view()[-1], candles[199])
+
+
+def test_sync_moves_past_gaps_in_the_exchange_data(tmp_path, capsys):
+    candles = synthetic_candle_array(4000, INTERVAL, seed=2)
+    saved, gap_end = 500, 500 + 2 * KLINE_PAGE_LIMIT # Bybit no tiene velas en dos páginas completas
+    with_gap = np.concatenate((candles[:saved], candles[gap_end:]))
+    now_ms = int(candles['start_time'][-1]) + 30_000
+    _, client = make_market(with_gap, now_ms)
+    store = CandleStore(SYMBOL, INTERVAL, folder=str(tmp_path), backfill_bars=0)
+    store.append(candles[:saved])
+
+    new_bars = store.sync(client, now_ms=now_ms)
+    assert new_bars == len(candles) - gap_end - 1
+    assert store.last_start_time == int(candles['start_time'][-2])
+    assert store.forming.start_time == int(candles['start_time'][-1])
+    assert store.sync(client, now_ms=now_ms) == 0
+
+
+class FailingPageSession(SimulatedHTTPSession):
+    """Responde con error en las llamadas a get_kline indicadas (contando desde 1)."""
+
+    def __init__(self, exchange, failing_calls):
+        super().__init__(exchange)
+        self.failing_calls = set(failing_calls)
+        self.kline_calls = 0
+
+    def get_kline(self, **params):
+        self.kline_calls += 1
+        if self.kline_calls in self.failing_calls:
+            return {'retCode': 10016, 'retMsg': "Service unavailable", 'result': {}}
+        return super().get_kline(**params)
+
+
+def test_failed_page_does_not_leave_a_hole(tmp_path, capsys):
+    candles = synthetic_candle_array(3500, INTERVAL, seed=3)
+    now_ms = int(candles['start_time'][-1]) + 30_000
+    exchange = SimulatedExchange({(SYMBOL, INTERVAL): candles}, SimulatedClock(now_ms))
+    session = FailingPageSession(exchange, failing_calls={2})
+    client = BybitClient(session=session, max_retries=0)
+    store = CandleStore(SYMBOL, INTERVAL, folder=str(tmp_path), backfill_bars=0)
+    store.append(candles[:100])
+
+    # Falla la segunda página: se guarda la primera (menos su última vela) y no se adivina la vela en formación
+    assert store.sync(client, now_ms=now_ms) == KLINE_PAGE_LIMIT - 1
+    assert store.forming is None
+    assert np.array_equal(store.view(), candles[:100 + KLINE_PAGE_LIMIT - 1])
+
+    # El siguiente sync retoma desde donde quedó y el almacén queda sin huecos
+    assert store.sync(client, now_ms=now_ms) == len(candles) - 1 - (100 + KLINE_PAGE_LIMIT - 1)
+    assert np.array_equal(store.view(), candles[:-1])
+    assert store.forming.start_time == int(candles['start_time'][-1])
+
+
+def test_failed_last_page_does_not_save_the_forming_candle(tmp_path, capsys):
+    candles = synthetic_candle_array(300, INTERVAL, seed=4)
+    now_ms = int(candles['start_time'][-1]) + 30_000
+    exchange = SimulatedExchange({(SYMBOL, INTERVAL): candles}, SimulatedClock(now_ms))
+    client = BybitClient(session=FailingPageSession(exchange, failing_calls={1}), max_retries=0)
+    store = CandleStore(SYMBOL, INTERVAL, folder=str(tmp_path), backfill_bars=0)
+    store.append(candles[:100])
+
+    assert store.sync(client, now_ms=now_ms) == 0
+    assert store.forming is None and len(store) == 100
+    assert store.sync(client, now_ms=now_ms) == len(candles) - 101
+    assert store.last_start_time == int(candles['start_time'][-2])
+
+
+def test_append_rejects_candles_off_the_interval_grid(tmp_path):
+    candles = synthetic_candle_array(10, INTERVAL, seed=5)
+    store = CandleStore(SYMBOL, INTERVAL, folder=str(tmp_path), backfill_bars=0)
+    store.append(candles[:5])
+    shifted = candles[5:].copy()
+    shifted['start_time'] += 30_000
+    with pytest.raises(ValueError):
+        store.append(shifted)
+    with pytest.raises(ValueError):
+        store.append(candles[[6, 5, 7]])
+    # Un hueco de velas enteras (Bybit sin datos) sí se acepta
+    assert store.append(candles[7:]) == 3
+    assert len(store) == 8
@@ -0,0 +1,145 @@
+# tests/test_indicators.py
+# Indicadores vectorizados de strategies/indicators.py contra implementaciones de referencia con
+# un bucle simple por vela (las fórmulas de los libros), con una tolerancia de 1e-8.
+import math
+from itertools import pairwise
+
+import numpy as np
+import pytest
+
+from services.exchange_simulator import synthetic_candle_array
+from strategies import indicators
+from strategies.indicators import IndicatorCache
+
+TOLERANCE = 1e-8
+
+
+@pytest.fixture(scope="module")
+def candles():
+    # Más de un bloque de la forma cerrada de _smooth (1024 velas) para ejercitar los empalmes
+    return synthetic_candle_array(3000, "1", seed=11)
+
+
+def assert_close(actual, expected):
+    actual, expected = np.asarray(actual), np.asarray(expected)
+    assert np.array_equal(np.isnan(actual), np.isnan(expected))
+    valid = ~np.isnan(expected)
+    assert np.max(np.abs(actual[valid] - expected[valid]), initial=0.0) <= TOLERANCE
+
+
+def loop_smooth(values, period, alpha):
+    result = [math.nan] * len(values)
+    if period > len(values):
+        return result
+    result[period - 1] = sum(values[:period]) / period
+    for i in range(period, len(values)):
+        result[i] = result[i - 1] + alpha * (values[i] - result[i - 1])
+    return result
+
+
+def loop_ema(values, period):
+    return loop_smooth(list(values), period, 2.0 / (period + 1))
+
+
+def loop_rsi(closes, period):
+    closes = list(closes)
+    result = [math.nan] * len(closes)
+    if len(closes) <= period:
+        return result
+    gains = [max(b - a, 0.0) for a, b in pairwise(closes)]
+    losses = [max(a - b, 0.0) for a, b in pairwise(closes)]
+    avg_gain, avg_loss = loop_smooth(gains, period, 1.0 / period), loop_smooth(losses, period, 1.0 / period)
+    for i in range(period, len(closes)):
+        gain, loss = avg_gain[i - 1], avg_loss[i - 1]
+        result[i] = 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+    return result
+
+
+def loop_atr(high, low, close, period):
+    tr = [high[0] - low[0]]
+    for i in range(1, len(close)):
+        tr.append(max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])))
+    return loop_smooth(tr, period, 1.0 / period)
+
+
+def loop_bollinger(closes, period, num_std):
+    middle, upper, lower = ([math.nan] * len(closes) for _ in range(3))
+    for i in range(period - 1, len(closes)):
+        window = closes[i - period + 1:i + 1]
+        mean = sum(window) / period
+        std = math.sqrt(sum((x - mean) ** 2 for x in window) / period)
+        middle[i], upper[i], lower[i] = mean, mean + num_std * std, mean - num_std * std
+    return middle, upper, lower
+
+
+def loop_vwap(high, low, close, volume, window=None):
+    result = [math.nan] * len(close)
+    for i in range(len(close)):
+        first = 0 if window is None else i - window + 1
+        if first < 0:
+            continue
+        pv = sum((high[j] + low[j] + close[j]) / 3.0 * volume[j] for j in range(first, i + 1))
+        result[i] = pv / sum(volume[first:i + 1])
+    return result
+
+
+@pytest.mark.parametrize("period", [1, 5, 20, 200])
+def test_sma(candles, period):
+    closes = candles['close'].tolist()
+    expected = [math.nan] * (period - 1) + [sum(closes[i - period + 1:i + 1]) / period for i in range(period - 1, len(closes))]
+    assert_close(indicators.sma(candles['close'], period), expected)
+
+
+@pytest.mark.parametrize("period", [1, 9, 26, 200])
+def test_ema(candles, period):
+    assert_close(indicators.ema(candles['close'], period), loop_ema(candles['close'].tolist(), period))
+
+
+@pytest.mark.parametrize("period", [2, 14, 50])
+def test_rsi(candles, period):
+    assert_close(indicators.rsi(candles['close'], period), loop_rsi(candles['close'], period))
+
+
+def test_rsi_without_losses_is_100():
+    closes = np.arange(1.0, 40.0)
+    values = indicators.rsi(closes, 14)
+    assert np.isnan(values[:14]).all() and (values[14:] == 100.0).all()
+
+
+@pytest.mark.parametrize("period", [1, 14, 100])
+def test_atr(candles, period):
+    high, low, close = (candles[name].tolist() for name in ('high', 'low', 'close'))
+    assert_close(indicators.atr(candles['high'], candles['low'], candles['close'], period),
+                 loop_atr(high, low, close, period))
+
+
+@pytest.mark.parametrize("period,num_std", [(20, 2.0), (50, 1.5)])
+def test_bollinger(candles, period, num_std):
+    for actual, expected in zip(indicators.bollinger(candles['close'], period, num_std),
+                                loop_bollinger(candles['close'].tolist(), period, num_std)):
+        assert_close(actual, expected)
+
+
+@pytest.mark.parametrize("window", [None, 1, 30])
+def test_vwap(candles, window):
+    subset = candles[:600] # La referencia es O(n * window)
+    columns = [subset[name] for name in ('high', 'low', 'close', 'volume')]
+    assert_close(indicators.vwap(*columns, window=window), loop_vwap(*(c.tolist() for c in columns), window=window))
+
+
+def test_short_inputs_are_all_nan():
+    closes = np.array([1.0, 2.0, 3.0])
+    for values in (indicators.sma(closes, 5), indicators.ema(closes, 5), indicators.rsi(closes, 3),
+                   indicators.atr(closes, closes, closes, 5), *indicators.bollinger(closes, 5),
+                   indicators.vwap(closes, closes, closes, closes, window=5)):
+        assert len(values) == 3 and np.isnan(values).all()
+
+
+def test_cache_computes_each_indicator_once_per_window(candles):
+    cache = IndicatorCache(candles[:100])
+    first = cache.ema(20)
+    assert cache.ema(20) is first and cache.sma(20) is not first
+    assert (cache.hits, cache.misses) == (2, 3) # 'close' se lee una vez para ambas medias
+    cache.set_candles(candles[1:101])
+    assert cache.ema(20) is not first
+    assert_close(cache.ema(20), indicators.ema(candles['close'][1:101], 20))
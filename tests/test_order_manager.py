@@ -0,0 +1,131 @@
+# tests/test_order_manager.py
+import threading
+import time
+
+import pytest
+
+from services.bybit_client import BybitClient
+from services.exchange_simulator import (
+    SimulatedClock,
+    SimulatedExchange,
+    SimulatedHTTPSession,
+    synthetic_candle_array,
+)
+from services.order_manager import UNKNOWN_STATUS, OrderManager
+
+SYMBOL, INTERVAL = "BTCUSDT", "1"
+
+
+class SlowReportSession(SimulatedHTTPSession):
+    """Las órdenes se ejecutan al enviarlas, pero la consulta REST las informa como 'New' (ejecución aún no visible)."""
+
+    def __init__(self, exchange):
+        super().__init__(exchange)
+        self.order_queries = 0
+
+    def get_order_history(self, category, symbol=None, orderId=None, **params):
+        self.order_queries += 1
+        response = super().get_order_history(category, symbol=symbol, orderId=orderId, **params)
+        response['result']['list'] = [dict(order, orderStatus="New", avgPrice="0", cumExecQty="0")
+                                      for order in response['result']['list']]
+        return response
+
+
+@pytest.fixture
+def market(capsys):
+    candles = synthetic_candle_array(300, INTERVAL, seed=1)
+    exchange = SimulatedExchange({(SYMBOL, INTERVAL): candles}, SimulatedClock(int(candles['start_time'][250])))
+
+    def build(session_class=SimulatedHTTPSession, **manager_params):
+        session = session_class(exchange)
+        manager = OrderManager(BybitClient(session=session, max_retries=0), **manager_params)
+        return exchange, session, manager
+
+    return build
+
+
+def exchange_size(exchange):
+    return exchange.positions.get(SYMBOL, (0.0, None))[0]
+
+
+def order_message(order):
+    return {'topic': 'order', 'data': [dict(order)]}
+
+
+def test_first_poll_is_immediate(market):
+    _, _, manager = market(poll_initial=5.0, fill_timeout=10.0)
+    started = time.monotonic()
+    fill = manager.execute(SYMBOL, "Buy", 0.01)
+    assert fill.filled and fill.avg_price
+    assert time.monotonic() - started < 1.0
+    assert not manager.pending
+
+
+def test_stream_update_before_the_rest_response_is_kept(market):
+    # El push del stream llega mientras place_order todavía no respondió (como en Bybit y en fake_ws_server)
+    exchange, session, manager = market(SlowReportSession, poll_initial=5.0, fill_timeout=10.0)
+    exchange.order_listeners.append(lambda order: manager.handle_order_message(order_message(order)))
+    started = time.monotonic()
+    fill = manager.execute(SYMBOL, "Sell", 0.01)
+    assert fill.filled and fill.filled_qty == pytest.approx(0.01)
+    assert time.monotonic() - started < 1.0
+    assert session.order_queries == 0
+
+
+def test_stream_update_wakes_the_wait(market):
+    exchange, session, manager = market(SlowReportSession, poll_initial=5.0, fill_timeout=10.0)
+    fill = manager.submit(SYMBOL, "Buy", 0.01)
+    order = exchange.orders[fill.order_id]
+    threading.Timer(0.05, manager.handle_order_message, args=(order_message(order),)).start()
+    started = time.monotonic()
+    manager.wait_for_fill(fill)
+    assert fill.filled
+    assert time.monotonic() - started < 1.0
+    assert session.order_queries == 1 # Solo la consulta inmediata; después despierta el stream
+
+
+@pytest.mark.parametrize("single_order", [False, True])
+def test_reverse_position(market, single_order):
+    exchange, _, manager = market(poll_initial=0.01)
+    assert manager.execute(SYMBOL, "Buy", 0.01).filled
+    close_fill, open_fill = manager.reverse_position(SYMBOL, "Buy", 0.01, 0.02, single_order=single_order)
+    assert close_fill.filled and open_fill.filled
+    assert (close_fill is open_fill) == single_order
+    assert exchange_size(exchange) == pytest.approx(-0.02)
+    assert not manager.pending
+
+
+def test_timed_out_order_is_marked_unknown_and_forgotten(market):
+    _, _, manager = market(SlowReportSession, poll_initial=0.01, fill_timeout=0.1)
+    fill = manager.execute(SYMBOL, "Buy", 0.01)
+    assert fill.status == UNKNOWN_STATUS and not fill.filled
+    assert not manager.pending and not manager.pending_orders()
+
+
+def test_reverse_does_not_open_after_an_unconfirmed_close(market):
+    exchange, _, manager = market(SlowReportSession, poll_initial=0.01, fill_timeout=0.1)
+    close_fill, open_fill = manager.reverse_position(SYMBOL, "Buy", 0.01, 0.01, single_order=False)
+    assert close_fill.status == UNKNOWN_STATUS and open_fill is None
+    assert len(exchange.orders) == 1
+
+
+@pytest.mark.parametrize("single_order", [False, True])
+def test_execute_signal_only_logs_confirmed_fills(market, monkeypatch, single_order):
+    import config
+    import main
+    monkeypatch.setattr(config, "REVERSE_IN_SINGLE_ORDER", single_order)
+    logged = []
+    monkeypatch.setattr(main, "log_trade", lambda *args, **kwargs: logged.append((args, kwargs)))
+
+    _, _, manager = market(SlowReportSession, poll_initial=0.01, fill_timeout=0.1)
+    main.execute_signal(manager, SYMBOL, "SELL", 30000.0, 0.01, "Buy", 29000.0, 1000.0, 0.01)
+    assert logged == []
+
+    exchange, _, manager = market(poll_initial=0.01)
+    main.execute_signal(manager, SYMBOL, "SELL", 30000.0, 0.01, "Buy", 29000.0, 1000.0, 0.01)
+    assert [args[1] for args, _ in logged] == ["CLOSE_POSITION", "OPEN_POSITION"]
+    close_args, close_kwargs = logged[0]
+    fill_price = float(exchange.orders[close_kwargs['order_id']]['avgPrice'])
+    assert close_args[4] == pytest.approx(fill_price)
+    assert close_kwargs['pnl'] == pytest.approx((fill_price - 29000.0) * 0.01)
+    assert logged[1][1]['status'] == "FILLED"
@@ -0,0 +1,105 @@
+# tests/test_request_layer.py
+# Capa de solicitudes de BybitClient contra el servidor REST falso (services/fake_rest_server.py),
+# que inyecta límites de solicitudes (HTTP 429, retCode 10006) y respuestas demoradas.
+import time
+
+import pytest
+
+import config
+from services.bybit_client import BybitClient, build_http_session
+from services.fake_rest_server import build_server
+from services.rate_limiter import RateLimiter
+
+SYMBOL, INTERVAL = "BTCUSDT", "1"
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(config, "API_RETRY_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(config, "API_RETRY_MAX_SECONDS", 0.05)
+
+
+@pytest.fixture
+def make_client():
+    servers = []
+
+    def make(max_retries=8, rate_limiter=None, **faults):
+        server = build_server(markets=[(SYMBOL, INTERVAL)], port=0, seed=7, **faults)
+        server.start_in_thread()
+        servers.append(server)
+        session = build_http_session(False, "test-key", "test-secret", base_url=server.url)
+        return BybitClient(session=session, rate_limiter=rate_limiter, max_retries=max_retries), server
+
+    yield make
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_rate_limited_responses_are_retried(make_client):
+    client, server = make_client(rate_limit_rate=0.5)
+    for _ in range(6):
+        assert client.get_klines(SYMBOL, INTERVAL, limit=5)
+    assert server.stats["rate_limited"] > 0
+    assert server.stats["ok"] == 6
+
+
+def test_http_429_is_retried(make_client):
+    client, server = make_client(error_rate=0.5)
+    for _ in range(6):
+        assert client.get_klines(SYMBOL, INTERVAL, limit=5)
+    assert server.stats["http_429"] > 0
+
+
+def test_timeouts_are_retried(make_client, monkeypatch):
+    monkeypatch.setattr(config, "API_TIMEOUT_SECONDS", 0.2)
+    client, server = make_client(timeout_rate=0.3, stall_seconds=0.4)
+    for _ in range(6):
+        assert client.get_klines(SYMBOL, INTERVAL, limit=5)
+    assert server.stats["stalled"] > 0
+
+
+def test_rate_limited_order_is_not_dropped(make_client):
+    client, server = make_client(rate_limit_rate=0.5)
+    for side in ("Buy", "Sell", "Buy"):
+        assert client.place_order(SYMBOL, side, 0.001) is not None
+    assert server.stats["rate_limited"] > 0
+
+
+def test_exhausted_retries_return_the_rate_limit_response(make_client):
+    client, server = make_client(max_retries=2, rate_limit_rate=1.0)
+    assert client.get_klines(SYMBOL, INTERVAL, limit=5) is None
+    assert server.stats["requests"] == 3
+
+
+def test_rate_limit_reaches_the_rate_limiter(make_client):
+    limiter = RateLimiter(1000)
+    client, _ = make_client(rate_limiter=limiter, max_retries=0, rate_limit_rate=1.0, limit_per_second=1)
+    time.sleep(1.01 - time.time() % 1) # Al comienzo de la ventana de un segundo del servidor
+    assert client.get_klines(SYMBOL, INTERVAL, limit=5) is None
+    # La respuesta 10006 informa que no quedan solicitudes: la próxima espera al reinicio de la ventana
+    assert 0.5 < limiter.acquire("get_kline") <= 1.0
+    assert limiter.acquire("otro_endpoint") == 0.0
+
+
+def test_recv_window_error_is_retried_by_pybit(make_client):
+    client, server = make_client(max_retries=0, clock_skew_ms=6000)
+    # Con el reloj 6 s atrasado, la ventana por defecto (5 s) no alcanza; pybit la amplía a 7.5 s
+    assert client.place_order(SYMBOL, "Buy", 0.001) is not None
+    assert server.stats["recv_window"] == 1
+    assert server.stats["ok"] == 1
+
+
+def test_connections_are_reused(make_client):
+    client, server = make_client()
+    for _ in range(10):
+        assert client.get_klines(SYMBOL, INTERVAL, limit=5)
+    assert server.stats["connections"] == 1
+
+
+def test_retry_waits_until_the_reported_reset(monkeypatch):
+    monkeypatch.setattr(config, "API_RETRY_MAX_SECONDS", 10.0)
+    reset_ms = int((time.time() + 2) * 1000)
+    for _ in range(20):
+        delay = BybitClient._retry_delay(0, {"X-Bapi-Limit-Reset-Timestamp": str(reset_ms)})
+        assert 1.9 < delay <= 2 + config.API_RETRY_BASE_SECONDS
@@ -0,0 +1,99 @@
+# tests/test_resampler.py
+# Las velas de 15m que arma el resampler desde las de 1m se comparan con una agregación de referencia
+# (un bucle simple por grupo de 15m: apertura, máximo, mínimo, cierre y sumas) sobre velas sintéticas
+# que empiezan y terminan a mitad de un grupo. No se compara con velas de 15m reales de Bybit.
+import numpy as np
+import pytest
+
+from services.candle_store import CANDLE_DTYPE
+from services.exchange_simulator import synthetic_candle_array
+from services.resampler import CandleResampler, resample
+
+BASE_MS, BUCKET_MS = 60_000, 900_000
+HEAD_OFFSET, TAIL, BUCKETS = 7, 4, 22 # Primer grupo empieza 7 min tarde; el último tiene 4 velas
+
+
+@pytest.fixture(scope="module")
+def base():
+    candles = synthetic_candle_array(400, "1", seed=16)
+    first = int(np.argmax(candles['start_time'] % BUCKET_MS == HEAD_OFFSET * BASE_MS))
+    count = (BUCKET_MS // BASE_MS - HEAD_OFFSET) + BUCKETS * BUCKET_MS // BASE_MS + TAIL
+    return candles[first:first + count]
+
+
+def reference_bars(candles):
+    """Velas de 15m de los grupos con las 15 velas de 1m, agregadas vela por vela."""
+    groups = {}
+    for candle in candles:
+        groups.setdefault(int(candle['start_time']) // BUCKET_MS * BUCKET_MS, []).append(candle)
+    bars = [(start, group[0]['open'], max(c['high'] for c in group), min(c['low'] for c in group), group[-1]['close'],
+             sum(c['volume'] for c in group), sum(c['turnover'] for c in group))
+            for start, group in sorted(groups.items()) if len(group) == BUCKET_MS // BASE_MS]
+    return np.array(bars, dtype=CANDLE_DTYPE)
+
+
+def as_array(bars):
+    return np.array([tuple(bar) for bar in bars], dtype=CANDLE_DTYPE)
+
+
+def assert_same_bars(local, expected):
+    assert list(local['start_time']) == list(expected['start_time'])
+    for column in ('open', 'high', 'low', 'close'):
+        assert np.array_equal(local[column], expected[column]), column
+    # Las sumas pueden diferir en el orden de las operaciones de punto flotante
+    for column in ('volume', 'turnover'):
+        assert np.allclose(local[column], expected[column], rtol=1e-12), column
+
+
+def test_data_starts_and_ends_mid_bucket(base):
+    assert base['start_time'][0] % BUCKET_MS == HEAD_OFFSET * BASE_MS
+    assert (base['start_time'][-1] + BASE_MS) % BUCKET_MS == TAIL * BASE_MS
+    assert len(reference_bars(base)) == BUCKETS
+
+
+def test_streaming_matches_reference_aggregation(base):
+    resampler = CandleResampler("1", "15")
+    closed = [bar for candle in base for bar in resampler.update(candle)]
+    assert_same_bars(as_array(closed), reference_bars(base))
+
+
+def test_partial_first_bucket_is_not_emitted(base):
+    resampler = CandleResampler("1", "15")
+    first_bucket = base['start_time'][0] // BUCKET_MS * BUCKET_MS
+    partial = base[base['start_time'] < first_bucket + BUCKET_MS]
+    closed = [bar for candle in partial[:-1] for bar in resampler.update(candle)]
+    # Mientras se forma existe como vela en formación, solo con las velas de 1m recibidas
+    forming = resampler.forming()
+    assert forming.start_time == first_bucket
+    assert forming.open == base['open'][0]
+    assert forming.high == partial[:-1]['high'].max()
+    # Al completarse el grupo no se entrega: le faltan las primeras velas de 1m
+    closed.extend(resampler.update(partial[-1]))
+    assert closed == []
+    assert resampler.update(base[len(partial)]) == []
+
+
+def test_forming_bar_of_the_trailing_partial_bucket(base):
+    resampler = CandleResampler("1", "15")
+    for candle in base[:-1]:
+        resampler.update(candle)
+    last_bucket = base['start_time'][-1] // BUCKET_MS * BUCKET_MS
+    tail = base[base['start_time'] >= last_bucket]
+    forming = resampler.forming(base[-1])
+    assert forming.start_time == last_bucket
+    assert forming.open == tail['open'][0]
+    assert forming.close == tail['close'][-1]
+    assert forming.high == tail['high'].max() and forming.low == tail['low'].min()
+
+
+@pytest.mark.parametrize("split", [1, 8, 9, 23, 150])
+def test_warm_up_from_unaligned_start_then_stream(base, split):
+    resampler = CandleResampler("1", "15")
+    warmed = resampler.warm_up(base[:split])
+    streamed = [bar for candle in base[split:] for bar in resampler.update(candle)]
+    assert_same_bars(np.concatenate((warmed, as_array(streamed))), reference_bars(base))
+
+
+def test_vectorized_resample_matches_reference_aggregation(base):
+    local = resample(base, "15", complete_only=True, base_interval="1")
+    assert_same_bars(local, reference_bars(base))
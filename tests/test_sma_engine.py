@@ -0,0 +1,87 @@
+# tests/test_sma_engine.py
+# SMACrossoverEngine debe dar exactamente las mismas señales que generate_signal sobre la serie completa.
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from strategies.simple_ma_strategy import SMACrossoverEngine, generate_signal
+
+
+@pytest.fixture(autouse=True)
+def quiet(capsys):
+    yield # generate_signal y evaluate imprimen una línea de depuración por llamada
+
+
+def reference_signals(closes, short_period, long_period, monkeypatch):
+    monkeypatch.setattr(config, "SMA_SHORT_PERIOD", short_period)
+    monkeypatch.setattr(config, "SMA_LONG_PERIOD", long_period)
+    return [generate_signal(pd.DataFrame({'close': closes[:i + 1]})) for i in range(len(closes))]
+
+
+def engine_signals(closes, short_period, long_period):
+    engine = SMACrossoverEngine(short_period, long_period)
+    return [engine.update(close) for close in closes]
+
+
+def random_walk(n, seed, integer=False):
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(-2, 3, n) if integer else rng.normal(0, 30, n)
+    return list(30000.0 + np.cumsum(steps).astype(float))
+
+
+@pytest.mark.parametrize("short_period, long_period, seed", [(10, 20, 1), (3, 7, 2), (20, 50, 3), (5, 5, 4), (9, 4, 5)])
+def test_update_matches_generate_signal_on_random_walks(short_period, long_period, seed, monkeypatch):
+    closes = random_walk(600, seed)
+    expected = reference_signals(closes, short_period, long_period, monkeypatch)
+    assert engine_signals(closes, short_period, long_period) == expected
+    assert {"BUY", "SELL"} <= set(expected) or short_period == long_period
+
+
+def test_long_series(monkeypatch):
+    # Las sumas en ticks son exactas: sin deriva por redondeo a lo largo de la serie
+    closes = random_walk(2050, seed=6)
+    assert engine_signals(closes, 10, 20) == reference_signals(closes, 10, 20, monkeypatch)
+
+
+def test_integer_prices_with_equal_smas(monkeypatch):
+    # Con precios enteros las dos SMA coinciden a menudo: se prueban los límites <= y >= del cruce
+    closes = random_walk(800, seed=7, integer=True)
+    assert engine_signals(closes, 2, 4) == reference_signals(closes, 2, 4, monkeypatch)
+
+
+def test_constant_prices_hold_after_warm_up(monkeypatch):
+    closes = [100.0] * 30
+    signals = engine_signals(closes, 5, 10)
+    assert signals == reference_signals(closes, 5, 10, monkeypatch)
+    assert signals[:10] == ["WAIT"] * 10 and set(signals[10:]) == {"HOLD"}
+
+
+def test_warm_up_waits_until_long_period_plus_one(monkeypatch):
+    closes = random_walk(25, seed=8)
+    signals = engine_signals(closes, 10, 20)
+    assert signals == reference_signals(closes, 10, 20, monkeypatch)
+    assert signals[:20] == ["WAIT"] * 20 and "WAIT" not in signals[20:]
+
+
+def test_evaluate_matches_generate_signal_without_changing_state(monkeypatch):
+    closes = random_walk(300, seed=9)
+    expected = reference_signals(closes, 10, 20, monkeypatch)
+    engine = SMACrossoverEngine(10, 20)
+    for i, close in enumerate(closes):
+        assert engine.evaluate(close) == expected[i]
+        assert engine.evaluate(close) == expected[i]
+        engine.update(close)
+        assert engine.count == i + 1
+
+
+def test_non_numeric_closes_are_skipped(monkeypatch):
+    closes = random_walk(80, seed=10)
+    with_gaps = list(closes)
+    for i in (5, 30, 60):
+        with_gaps.insert(i, float("nan"))
+    engine = SMACrossoverEngine(5, 10)
+    signals = [engine.update(close) for close in with_gaps]
+    assert [s for s, c in zip(signals, with_gaps) if not math.isnan(c)] == reference_signals(closes, 5, 10, monkeypatch)
@@ -0,0 +1,102 @@
+# tests/test_strategy_set.py
+# Registro de estrategias y señal combinada de varias estrategias (combine_signals / StrategySet):
+# una estrategia que da la señal contraria veta la operación.
+from typing import ClassVar
+
+import numpy as np
+import pytest
+
+from services.exchange_simulator import synthetic_candle_array
+from strategies.base import (
+    Strategy,
+    StrategySet,
+    available_strategies,
+    combine_signals,
+    create_strategy,
+    register_strategy,
+)
+from strategies.rsi_strategy import RSIReversionStrategy
+from strategies.simple_ma_strategy import SMACrossoverEngine
+
+
+@register_strategy("test_scripted")
+class ScriptedStrategy(Strategy):
+    """Devuelve las señales indicadas por vela (por start_time), para probar la combinación."""
+
+    PARAMS: ClassVar[dict] = {"script": None, "lookback": 1}
+
+    @property
+    def lookback(self):
+        return self.params["lookback"]
+
+    def signals(self, candles, indicators=None):
+        script = self.params["script"] or {}
+        return np.array([script.get(int(start), 0) for start in candles['start_time']], dtype=np.int8)
+
+
+def test_registry_lookup():
+    assert {"sma_crossover", "rsi_reversion"} <= set(available_strategies())
+    strategy = create_strategy("sma_crossover", short_period=3, long_period=7)
+    assert isinstance(strategy, SMACrossoverEngine)
+    assert (strategy.short_period, strategy.long_period, strategy.lookback) == (3, 7, 8)
+    rsi = create_strategy("rsi_reversion", period=7)
+    assert isinstance(rsi, RSIReversionStrategy)
+    assert rsi.params == {"period": 7, "oversold": 30.0, "overbought": 70.0}
+    assert str(rsi) == "rsi_reversion(period=7, oversold=30.0, overbought=70.0)"
+
+
+def test_registry_rejects_unknown_names_and_params():
+    with pytest.raises(ValueError, match="Estrategia desconocida"):
+        create_strategy("no_existe")
+    with pytest.raises(ValueError, match="Parámetros desconocidos"):
+        create_strategy("rsi_reversion", periodo=7)
+    with pytest.raises(ValueError, match="Ya hay una estrategia registrada"):
+        register_strategy("sma_crossover")(type("OtraSMA", (Strategy,), {}))
+
+
+@pytest.mark.parametrize("signals,expected", [
+    (["BUY"], "BUY"),
+    (["BUY", "HOLD"], "BUY"),
+    (["BUY", "WAIT"], "BUY"),
+    (["SELL", "HOLD", "WAIT"], "SELL"),
+    (["BUY", "BUY"], "BUY"),
+    (["BUY", "SELL"], "HOLD"), # Veto: señales contrarias
+    (["SELL", "BUY", "HOLD"], "HOLD"),
+    (["BUY", "SELL", "WAIT"], "HOLD"),
+    (["HOLD", "WAIT"], "HOLD"),
+    (["WAIT", "WAIT"], "WAIT"),
+])
+def test_combine_signals(signals, expected):
+    assert combine_signals(signals) == expected
+
+
+def test_strategy_set_vetoes_contrary_signals(capsys):
+    candles = synthetic_candle_array(12, "1", seed=5)
+    start = [int(t) for t in candles['start_time']]
+    # Vela 5: ambas compran; vela 7: una compra y la otra vende; vela 9: solo una vende
+    first = ScriptedStrategy(script={start[5]: 1, start[7]: 1})
+    second = ScriptedStrategy(script={start[5]: 1, start[7]: -1, start[9]: -1}, lookback=3)
+    strategy_set = StrategySet([first, second])
+    assert strategy_set.lookback == 3
+
+    combined = [strategy_set.update(candle) for candle in candles]
+    # Mientras la segunda no tiene 3 velas da WAIT, pero la primera ya da HOLD; en la vela 7 hay veto
+    expected = ["HOLD"] * 12
+    expected[5], expected[9] = "BUY", "SELL"
+    assert combined == expected
+    assert strategy_set.last_signals == {str(first): "HOLD", str(second): "HOLD"}
+
+
+def test_strategy_set_matches_each_strategy_alone(capsys):
+    candles = synthetic_candle_array(800, "1", seed=9)
+    specs = [("sma_crossover", {"short_period": 5, "long_period": 20}), ("rsi_reversion", {"period": 7})]
+    strategy_set = StrategySet.from_config(specs)
+    combined = [strategy_set.update(candle) for candle in candles]
+
+    alone = []
+    for name, params in specs:
+        # Cada estrategia por separado, con la evaluación por lotes sobre su propia ventana de 'lookback' velas
+        strategy = create_strategy(name, **params)
+        alone.append([strategy.signal(candles[max(0, i + 1 - strategy.lookback):i + 1]) for i in range(len(candles))])
+    assert combined == [combine_signals(list(signals)) for signals in zip(*alone)]
+    assert "BUY" in combined and "SELL" in combined
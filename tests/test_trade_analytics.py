@@ -0,0 +1,47 @@
+# tests/test_trade_analytics.py
+import pytest
+
+from services import trade_analytics
+
+HEADER = "Timestamp,Symbol,Action,Side,Quantity,Price,PNL,BalanceAfterTrade,OrderID,Status\n"
+
+
+def write_log(folder, name, rows):
+    path = folder / name
+    path.write_text(HEADER + "".join(f"{row}\n" for row in rows))
+    return path
+
+
+def test_submitted_opens_from_older_logs_count_as_filled(tmp_path):
+    # Log anterior a la confirmación de ejecución: las aperturas quedaban como SUBMITTED
+    write_log(tmp_path, "trade_log_2025-06-01_00-00-00.csv", [
+        "2025-06-01 00:00:00,BTCUSDT,OPEN_POSITION,Buy,0.00100000,30000.00,0.00,1000.00,a1,SUBMITTED",
+        "2025-06-01 12:00:00,BTCUSDT,CLOSE_POSITION,Sell,0.00100000,31000.00,1.00,1001.00,,CLOSED LONG",
+    ])
+    columns, _ = trade_analytics.load_columns(tmp_path)
+    table = trade_analytics.daily_stats(columns, end_ms=int(columns['timestamp'].max()))
+    row = table.iloc[0]
+    assert row['trades'] == 1 and row['realized_pnl'] == pytest.approx(1.0)
+    assert row['time_in_market'] == pytest.approx(0.5)
+    assert row['avg_exposure'] == pytest.approx(30000 * 0.001 * 0.5)
+
+
+def test_rejected_and_cancelled_opens_are_ignored(tmp_path):
+    write_log(tmp_path, "trade_log_2025-06-02_00-00-00.csv", [
+        "2025-06-02 00:00:00,BTCUSDT,OPEN_POSITION,Buy,0.00100000,30000.00,0.00,1000.00,a1,REJECTED",
+        "2025-06-02 06:00:00,BTCUSDT,OPEN_POSITION,Buy,0.00100000,30000.00,0.00,1000.00,a2,CANCELLED",
+        "2025-06-02 12:00:00,BTCUSDT,OPEN_POSITION,Sell,0.00100000,30000.00,0.00,1000.00,a3,FILLED",
+    ])
+    columns, _ = trade_analytics.load_columns(tmp_path)
+    assert list(columns['order_id'][trade_analytics.filled_mask(columns)]) == ["a3"]
+
+
+def test_unreadable_session_logs_are_skipped(tmp_path, capsys):
+    write_log(tmp_path, "trade_log_2025-06-03_00-00-00.csv", [
+        "2025-06-03 00:00:00,BTCUSDT,OPEN_POSITION,Buy,0.00100000,30000.00,0.00,1000.00,a1,FILLED",
+    ])
+    # Parquet de una sesión cortada: sin footer no se puede leer
+    (tmp_path / "trade_log_2025-06-04_00-00-00.parquet").write_bytes(b"PAR1" + b"\x00" * 64)
+    columns, _ = trade_analytics.load_columns(tmp_path)
+    assert list(columns['order_id']) == ["a1"]
+    assert "trade_log_2025-06-04_00-00-00.parquet" in capsys.readouterr().out
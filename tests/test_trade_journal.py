@@ -0,0 +1,125 @@
+# tests/test_trade_journal.py
+# TradeJournal: escritura por lotes en su propio hilo, plazo máximo de una fila en memoria,
+# políticas de fsync y los tres formatos de archivo (CSV, Arrow IPC y Parquet).
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from services.trade_logger import TradeJournal, read_session_log
+
+
+def row(i):
+    return (datetime(2026, 1, 2, 3, 4, i % 60), "BTCUSDT", "OPEN_POSITION", "Buy", 0.001 * (i + 1), 30000.0 + i,
+            0.0, 10000.0 - i, f"order-{i}", "FILLED")
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def fsync_calls(monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (calls.append(time.monotonic()), real_fsync(fd)))
+    return calls
+
+
+@pytest.fixture
+def journals(tmp_path, capsys):
+    created = []
+
+    def make(**params):
+        journal = TradeJournal(folder=str(tmp_path), **params)
+        created.append(journal)
+        return journal
+
+    yield make
+    for journal in created:
+        journal.close(timeout=2.0)
+
+
+def test_rows_are_written_in_batches(journals, fsync_calls):
+    journal = journals(batch_size=3, flush_seconds=10.0, fsync="batch")
+    for i in range(7):
+        journal.append(row(i))
+    assert wait_until(lambda: journal.rows_written == 6)
+    time.sleep(0.1)
+    # La séptima fila espera en memoria a completar el lote (o a su plazo)
+    assert journal.rows_written == 6 and len(fsync_calls) == 2
+    assert journal.flush(timeout=2.0)
+    assert journal.rows_written == 7 and len(fsync_calls) == 3
+
+
+def test_flush_deadline_holds_while_rows_keep_arriving(journals):
+    journal = journals(batch_size=100, flush_seconds=0.2, fsync="never")
+    first_at = time.monotonic()
+    written_at = None
+    for i in range(8):
+        journal.append(row(i))
+        time.sleep(0.1)
+        if written_at is None and journal.rows_written:
+            written_at = time.monotonic()
+    # La primera fila no espera a que dejen de llegar filas: sale a los flush_seconds
+    assert written_at is not None and written_at - first_at < 0.45
+
+
+def test_fsync_never(journals, fsync_calls):
+    journal = journals(fsync="never", flush_seconds=0.01)
+    for i in range(5):
+        journal.append(row(i))
+    assert journal.flush(timeout=2.0)
+    journal.close(timeout=2.0)
+    assert journal.rows_written == 5 and fsync_calls == []
+
+
+def test_fsync_interval_runs_on_a_timer(journals, fsync_calls):
+    journal = journals(fsync="interval", fsync_seconds=0.3, flush_seconds=0.01)
+    journal.append(row(0))
+    assert wait_until(lambda: len(fsync_calls) == 1) # El primer lote se sincroniza enseguida
+    journal.append(row(1))
+    assert wait_until(lambda: journal.rows_written == 2)
+    assert len(fsync_calls) == 1
+    # Sin más filas, el fsync pendiente corre igual al cumplirse fsync_seconds
+    assert wait_until(lambda: len(fsync_calls) == 2, timeout=1.0)
+    assert 0.25 < fsync_calls[1] - fsync_calls[0] < 0.6
+    time.sleep(0.4)
+    assert len(fsync_calls) == 2 # Nada nuevo que sincronizar
+
+
+def test_fsync_interval_syncs_on_flush(journals, fsync_calls):
+    journal = journals(fsync="interval", fsync_seconds=60.0, flush_seconds=0.01)
+    journal.append(row(0))
+    assert wait_until(lambda: len(fsync_calls) == 1)
+    journal.append(row(1))
+    assert journal.flush(timeout=2.0)
+    assert len(fsync_calls) == 2
+    journal.close(timeout=2.0)
+    assert len(fsync_calls) == 2
+
+
+@pytest.mark.parametrize("fmt", ["csv", "arrow", "parquet"])
+def test_formats_round_trip(journals, fmt):
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+    journal = journals(fmt=fmt, batch_size=4, flush_seconds=0.05)
+    rows = [row(i) for i in range(10)]
+    for r in rows:
+        journal.append(r)
+    journal.close(timeout=2.0)
+    assert journal.path.endswith(f".{fmt}")
+    df = read_session_log(journal.path)
+    assert list(df['OrderID']) == [r[8] for r in rows]
+    assert list(df['Symbol']) == ["BTCUSDT"] * 10
+    assert list(df['Timestamp']) == [r[0] for r in rows]
+    # El CSV redondea los precios a 2 decimales y las cantidades a 8
+    assert df['Quantity'].tolist() == pytest.approx([r[4] for r in rows], abs=1e-8)
+    assert df['Price'].tolist() == pytest.approx([r[5] for r in rows], abs=0.005)
+    assert df['BalanceAfterTrade'].tolist() == pytest.approx([r[7] for r in rows], abs=0.005)